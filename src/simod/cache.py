@@ -0,0 +1,469 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from enum import Enum
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import pandas as pd
+from pydantic import BaseModel
+
+from simod.cli_formatter import print_notice, print_warning
+
+T = TypeVar("T")
+
+# Maximum size (in bytes) of the default cache for pre-processed event logs
+DEFAULT_PREPROCESSING_CACHE_MAX_SIZE = 2 * 10**9
+# Maximum number of entries of the in-memory cache of simulation results
+DEFAULT_SIMULATION_CACHE_MAX_ENTRIES = 10_000
+
+
+def _get_code_version() -> str:
+    try:
+        return metadata.version("simod")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class ArtifactCache:
+    """
+    Content-addressed on-disk cache for the artifacts produced by the pipeline (preprocessed logs, discovered process
+    and resource models, simulated logs), shared across runs.
+
+    Each artifact is stored under a key computed by hashing the content of its inputs (the bytes of the input files,
+    the values of the input event logs, and the relevant settings), together with the version of Simod. When the total
+    size of the cache exceeds [max_size], the least recently used artifacts are removed.
+
+    Attributes
+    ----------
+    directory : :class:`pathlib.Path`
+        Directory where the artifacts are stored (one subdirectory per type of artifact).
+    max_size : int
+        Maximum size (in bytes) of the stored artifacts.
+
+    Notes
+    -----
+    - The instances can be sent to worker processes to store artifacts there, but the hit/miss statistics are only
+      recorded in the process performing the lookups (see :meth:`get_path`).
+    - The files are written to a temporary path and then renamed, so concurrent runs sharing the same directory never
+      read half-written artifacts.
+    - The total size of the artifacts is computed by scanning the directory on the first store, and tracked afterward
+      with the sizes of the stored artifacts. The directory is only scanned again (evicting the least recently used
+      artifacts) when the tracked size exceeds [max_size], which also accounts for the artifacts stored by other
+      processes sharing the directory.
+    """
+
+    directory: Path
+    max_size: int
+
+    def __init__(self, directory: Path, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self._code_version = _get_code_version()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._evictions = 0
+        self._size: Optional[int] = None  # Total size of the artifacts (scanned on the first store, then tracked)
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def key(self, *parts: Any) -> str:
+        """
+        Computes the key of an artifact from its inputs.
+
+        Parameters
+        ----------
+        *parts : Any
+            Inputs of the artifact. Paths to existing files are hashed by content, DataFrames by their values, pydantic
+            models by their fields, and any other value (e.g., dataclasses) by its representation.
+
+        Returns
+        -------
+        str
+            Hexadecimal SHA-256 digest identifying the artifact.
+        """
+        digest = hashlib.sha256(self._code_version.encode("utf-8"))
+        for part in parts:
+            _update_digest(digest, part)
+        return digest.hexdigest()
+
+    def get_path(self, namespace: str, key: str, suffix: str = "") -> Optional[Path]:
+        """
+        Looks up an artifact, recording the hit or miss in the statistics of [namespace].
+
+        Parameters
+        ----------
+        namespace : str
+            Type of artifact (e.g., ``"process_model"``).
+        key : str
+            Key of the artifact (see :meth:`key`).
+        suffix : str
+            File extension of the artifact.
+
+        Returns
+        -------
+        :class:`pathlib.Path`, optional
+            Path to the stored artifact, or ``None`` if it is not in the cache.
+        """
+        path = self._artifact_path(namespace, key, suffix)
+        hit = path.exists()
+        if hit:
+            # Mark as recently used
+            try:
+                os.utime(path)
+            except OSError:
+                hit = False  # Evicted in the meantime
+        with self._lock:
+            stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+        return path if hit else None
+
+    def put_file(self, namespace: str, key: str, source: Path, suffix: str = ""):
+        """
+        Stores a copy of the file in [source] as the artifact [key] of [namespace].
+        """
+        self._store(namespace, key, suffix, lambda tmp_path: shutil.copyfile(source, tmp_path))
+
+    def get_object(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Retrieves the Python object stored as the artifact [key] of [namespace], or ``None`` if it is not cached.
+        """
+        path = self.get_path(namespace, key, ".pkl")
+        return self.read_object(path) if path is not None else None
+
+    @staticmethod
+    def read_object(path: Path) -> Optional[Any]:
+        """
+        Reads a Python object artifact from the path returned by :meth:`get_path`, or returns ``None`` if it cannot be
+        read (e.g., it was evicted in the meantime).
+        """
+        try:
+            with path.open("rb") as file:
+                return pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError) as error:
+            print_warning(f"Ignoring unreadable cached artifact {path}: {error}")
+        return None
+
+    def put_object(self, namespace: str, key: str, value: Any):
+        """
+        Stores the Python object [value] (pickled) as the artifact [key] of [namespace].
+        """
+
+        def _write(tmp_path: Path):
+            with tmp_path.open("wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._store(namespace, key, ".pkl", _write)
+
+    def get_or_compute(self, namespace: str, key: str, compute: Callable[[], T]) -> T:
+        """
+        Returns the Python object stored as the artifact [key] of [namespace], computing (and storing) it if it is not
+        cached.
+        """
+        value = self.get_object(namespace, key)
+        if value is None:
+            value = compute()
+            self.put_object(namespace, key, value)
+        return value
+
+    def stats(self) -> dict:
+        """
+        Hit/miss statistics of the lookups performed by this instance.
+
+        Returns
+        -------
+        dict
+            Total number of hits, misses, and evictions, plus the hits and misses of each type of artifact.
+        """
+        with self._lock:
+            return {
+                "hits": sum(stats["hits"] for stats in self._stats.values()),
+                "misses": sum(stats["misses"] for stats in self._stats.values()),
+                "evictions": self._evictions,
+                "artifacts": {namespace: dict(stats) for namespace, stats in self._stats.items()},
+            }
+
+    def _artifact_path(self, namespace: str, key: str, suffix: str) -> Path:
+        return self.directory / namespace / f"{key}{suffix}"
+
+    def _store(self, namespace: str, key: str, suffix: str, write: Callable[[Path], Any]):
+        path = self._artifact_path(namespace, key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            write(tmp_path)
+            added_size = tmp_path.stat().st_size - _get_file_size(path)
+            os.replace(tmp_path, path)
+        except OSError as error:
+            print_warning(f"Artifact could not be stored in the cache: {error}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += added_size
+            needs_scan = self._size is None or self._size > self.max_size
+        if needs_scan:
+            self._evict()
+
+    def _evict(self):
+        # Scan the stored artifacts, removing the least recently used ones until the cache fits in its maximum size
+        artifacts = []
+        for path in self.directory.glob("*/*"):
+            if path.is_file() and not path.name.startswith("."):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                artifacts.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in artifacts)
+        for _, size, path in sorted(artifacts, key=lambda artifact: artifact[0]):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+            with self._lock:
+                self._evictions += 1
+        with self._lock:
+            self._size = total_size
+
+
+def _get_file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class MemoryCache:
+    """
+    Bounded in-memory cache of small Python objects (e.g., the distances obtained by a simulation replication), shared
+    by all the threads of the process. When it exceeds [max_entries], the least recently used entries are removed.
+
+    Attributes
+    ----------
+    max_entries : int
+        Maximum number of stored entries.
+    """
+
+    max_entries: int
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._size: Optional[int] = None  # Total size of the artifacts (scanned on the first store, then tracked)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the object stored under [key] (marking it as recently used), or ``None`` if it is not cached.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any):
+        """
+        Stores [value] under [key], removing the least recently used entries if the cache is full.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """
+        Removes all the stored entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Number of hits, misses, and evictions of this cache, and number of stored entries.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+            }
+
+
+def hash_parts(*parts: Any) -> str:
+    """
+    Computes a key identifying [parts], hashing them as :meth:`ArtifactCache.key` does (but independently of the
+    version of Simod, for caches that do not outlive the process).
+
+    :param parts: values to hash (files by content, DataFrames by their values...).
+    :return: hexadecimal SHA-256 digest of the parts.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        _update_digest(digest, part)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, part: Any):
+    if isinstance(part, pd.DataFrame):
+        digest.update(repr(list(zip(part.columns, part.dtypes.astype(str)))).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+    elif isinstance(part, Path) and part.is_file():
+        with part.open("rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    elif isinstance(part, BaseModel):
+        digest.update(part.model_dump_json().encode("utf-8"))
+    elif isinstance(part, (list, tuple)):
+        digest.update(f"{type(part).__name__}[{len(part)}]".encode("utf-8"))
+        for element in part:
+            _update_digest(digest, element)
+    elif isinstance(part, Enum):
+        digest.update(repr(part.value).encode("utf-8"))
+    else:
+        digest.update(repr(part).encode("utf-8"))
+    # Separator, so consecutive parts cannot be confused
+    digest.update(b"\x00")
+
+
+# Cache shared by the whole pipeline (if enabled)
+_cache: Optional[ArtifactCache] = None
+
+
+def enable_artifact_cache(directory: Path, max_size: int) -> ArtifactCache:
+    """
+    Enables the artifact cache used by the pipeline (if not already enabled in the same directory).
+
+    Parameters
+    ----------
+    directory : :class:`pathlib.Path`
+        Directory to store the artifacts.
+    max_size : int
+        Maximum size (in bytes) of the stored artifacts.
+
+    Returns
+    -------
+    :class:`ArtifactCache`
+        The enabled cache.
+    """
+    global _cache
+
+    if _cache is None or _cache.directory != directory:
+        _cache = ArtifactCache(directory, max_size)
+        print_notice(f"Using artifact cache in {directory}")
+    else:
+        _cache.max_size = max_size
+    return _cache
+
+
+def disable_artifact_cache():
+    """
+    Disables the artifact cache (the stored artifacts are kept on disk).
+    """
+    global _cache
+
+    _cache = None
+
+
+def get_artifact_cache() -> Optional[ArtifactCache]:
+    """
+    Returns the artifact cache used by the pipeline, or ``None`` if it is not enabled.
+    """
+    return _cache
+
+
+# Whether to cache the pre-processed event logs, and default cache to use if the artifact cache is not enabled
+_preprocessing_cache_enabled = True
+_default_preprocessing_cache: Optional[ArtifactCache] = None
+
+
+def get_default_cache_dir() -> Path:
+    """
+    Returns the default directory of the cache for pre-processed event logs: the value of the ``SIMOD_CACHE_DIR``
+    environment variable if set, or ``simod`` under the user cache directory (``$XDG_CACHE_HOME`` or ``~/.cache``).
+    """
+    if "SIMOD_CACHE_DIR" in os.environ:
+        return Path(os.environ["SIMOD_CACHE_DIR"])
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "simod"
+
+
+def enable_preprocessing_cache():
+    """
+    Enables the cache of pre-processed event logs (enabled by default).
+    """
+    global _preprocessing_cache_enabled
+
+    _preprocessing_cache_enabled = True
+
+
+def disable_preprocessing_cache():
+    """
+    Disables the cache of pre-processed event logs, so the event logs are always read and pre-processed (the stored
+    pre-processed logs are kept on disk).
+    """
+    global _preprocessing_cache_enabled
+
+    _preprocessing_cache_enabled = False
+
+
+def get_preprocessing_cache() -> Optional[ArtifactCache]:
+    """
+    Returns the cache for the pre-processed event logs: the artifact cache if enabled, or a cache in the default
+    directory (see :func:`get_default_cache_dir`) otherwise.
+
+    Returns
+    -------
+    :class:`ArtifactCache`, optional
+        The cache to use, or ``None`` if disabled (see :func:`disable_preprocessing_cache`) or the default directory
+        cannot be created.
+    """
+    global _default_preprocessing_cache
+
+    if not _preprocessing_cache_enabled:
+        return None
+    elif _cache is not None:
+        return _cache
+
+    directory = get_default_cache_dir()
+    if _default_preprocessing_cache is None or _default_preprocessing_cache.directory != directory:
+        try:
+            _default_preprocessing_cache = ArtifactCache(directory, DEFAULT_PREPROCESSING_CACHE_MAX_SIZE)
+        except OSError as error:
+            print_warning(f"Pre-processing cache could not be created in {directory}: {error}")
+            return None
+    return _default_preprocessing_cache
+
+
+# Cache of the results of the seeded simulation replications of the process
+_simulation_cache = MemoryCache(DEFAULT_SIMULATION_CACHE_MAX_ENTRIES)
+
+
+def get_simulation_cache() -> MemoryCache:
+    """
+    Returns the in-memory cache of the results (distances) of the seeded simulation replications, shared by all the
+    simulations of the process.
+    """
+    return _simulation_cache
@@ -0,0 +1,124 @@
+import os
+import pickle
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+from simod.cli_formatter import print_warning
+
+
+def save_state(path: Path, state: dict):
+    """
+    Pickles [state] into [path], writing it to a temporary file first so an interruption never leaves a half-written
+    state behind.
+
+    :param path: path to the file where to store the state.
+    :param state: dictionary with the (picklable) objects to store.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with tmp_path.open("wb") as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_state(path: Path) -> Optional[dict]:
+    """
+    Reads a state stored with :func:`save_state`.
+
+    :param path: path to the file storing the state.
+    :return: the stored dictionary, or None if the file does not exist or cannot be read.
+    """
+    if not path.exists():
+        return None
+    try:
+        with path.open("rb") as file:
+            return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as error:
+        print_warning(f"Ignoring unreadable checkpoint {path}: {error}")
+        return None
+
+
+class PipelineCheckpoint:
+    """
+    Checkpoint of the stages of the SIMOD pipeline completed so far, used to resume an interrupted run.
+
+    Each completed stage stores its results (e.g., the BPS model discovered so far and the best hyperparameters) in a
+    file of [directory]. Additionally, the hyperparameter optimization stages save their progress (the hyperopt trials
+    and the measurements of the evaluated iterations) after each iteration, so an interrupted optimization can continue
+    from the last evaluated iteration.
+
+    Attributes
+    ----------
+    directory : :class:`pathlib.Path`
+        Directory where the checkpoint files are stored.
+    """
+
+    directory: Path
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def save_settings(self, settings: Any, seed: Optional[int] = None, fingerprint: Optional[str] = None):
+        """
+        Stores the configuration of the run, so it can be resumed without providing it again, together with the seed
+        used by the run (if not configured, the one drawn by the run, so the resumed run uses the same one) and the
+        fingerprint of its configuration and event log (see :meth:`matches`).
+        """
+        save_state(self.directory / "settings.pkl", {"settings": settings, "seed": seed, "fingerprint": fingerprint})
+
+    def load_settings(self) -> Optional[Any]:
+        """
+        Returns the configuration stored with :meth:`save_settings`, or ``None`` if not stored.
+        """
+        state = load_state(self.directory / "settings.pkl")
+        return state["settings"] if state is not None else None
+
+    def load_seed(self) -> Optional[int]:
+        """
+        Returns the seed stored with :meth:`save_settings`, or ``None`` if not stored.
+        """
+        state = load_state(self.directory / "settings.pkl")
+        return state.get("seed") if state is not None else None
+
+    def matches(self, fingerprint: str) -> bool:
+        """
+        Whether the stored stages and optimization progress (if any) were obtained by a run with the configuration and
+        event log identified by [fingerprint] (i.e., the fingerprint stored with :meth:`save_settings`).
+        """
+        state = load_state(self.directory / "settings.pkl")
+        if state is None:
+            # Nothing to resume from
+            return not any(self.directory.glob("*.pkl"))
+        return state.get("fingerprint") == fingerprint
+
+    def is_completed(self, stage: str) -> bool:
+        """Whether [stage] was completed and its results stored."""
+        return self._stage_path(stage).exists()
+
+    def save_stage(self, stage: str, **results: Any):
+        """
+        Stores the results of [stage], marking it as completed.
+        """
+        save_state(self._stage_path(stage), results)
+
+    def load_stage(self, stage: str) -> Optional[dict]:
+        """
+        Returns the results stored for [stage], or ``None`` if the stage was not completed.
+        """
+        return load_state(self._stage_path(stage))
+
+    def optimizer_progress_path(self, stage: str) -> Path:
+        """Path to the file where the optimizer of [stage] saves its progress after each iteration."""
+        return self.directory / f"{stage}.progress.pkl"
+
+    def clear(self):
+        """
+        Removes the stored stages and optimization progress (e.g., to start a new run in the same directory).
+        """
+        for path in self.directory.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+    def _stage_path(self, stage: str) -> Path:
+        return self.directory / f"{stage}.pkl"
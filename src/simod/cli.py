@@ -6,6 +6,8 @@ import click
 import yaml
 from pix_framework.filesystem.file_manager import get_random_folder_id
 
+from simod.cache import disable_preprocessing_cache, enable_artifact_cache
+from simod.checkpoint import PipelineCheckpoint
 from simod.event_log.event_log import EventLog
 from simod.runtime_meter import RuntimeMeter
 from simod.settings.simod_settings import SimodSettings
@@ -50,6 +52,24 @@ from simod.simod import Simod
     help="Path to the event log file when using the --one-shot flag. "
     "Columns must be named 'case_id', 'activity', 'start_time', 'end_time', 'resource'.",
 )
+@click.option(
+    "--resume",
+    default=None,
+    required=False,
+    type=click.Path(exists=True, file_okay=False, resolve_path=True, path_type=Path),
+    help="Path to the output directory of an interrupted run to resume it, skipping its completed stages. "
+    "The configuration of the interrupted run is used if --configuration is not provided, and the run is not resumed "
+    "if the configuration or the event log differ from the ones of the interrupted run.",
+)
+@click.option(
+    "--no-preprocessing-cache",
+    default=False,
+    is_flag=True,
+    required=False,
+    type=bool,
+    help="Always read and pre-process the event log, instead of reusing the pre-processed log of a previous run with "
+    "the same event log and pre-processing settings.",
+)
 @click.option(
     "--schema-yaml",
     required=False,
@@ -68,6 +88,8 @@ def main(
     output: Optional[Path],
     one_shot: bool,
     event_log: Optional[Path],
+    resume: Optional[Path],
+    no_preprocessing_cache: bool,
     schema_yaml: bool,
     schema_json: bool,
 ) -> None:
@@ -83,14 +105,27 @@ def main(
         settings = SimodSettings.one_shot()
         settings.common.train_log_path = event_log
         settings.common.test_log_path = None
+    elif resume is not None and configuration is None:
+        settings = PipelineCheckpoint(resume / "checkpoint").load_settings()
+        if settings is None:
+            raise click.BadParameter(f"No checkpoint found in {resume}", param_hint="--resume")
     else:
         settings = SimodSettings.from_path(configuration)
 
-    output = output if output is not None else (Path.cwd() / "outputs" / get_random_folder_id()).absolute()
+    if resume is not None:
+        output = resume
+    elif output is None:
+        output = (Path.cwd() / "outputs" / get_random_folder_id()).absolute()
 
     # To measure the runtime of each stage
     runtimes = RuntimeMeter()
 
+    # Artifact cache shared across runs (enabled before preprocessing, so the preprocessed log can be reused)
+    if settings.common.cache_dir is not None:
+        enable_artifact_cache(settings.common.cache_dir, int(settings.common.cache_max_size_gb * 1e9))
+    if no_preprocessing_cache:
+        disable_preprocessing_cache()
+
     # Read and preprocess event log
     runtimes.start(RuntimeMeter.PREPROCESSING)
     event_log = EventLog.from_path(
@@ -99,11 +134,16 @@ def main(
         test_log_path=settings.common.test_log_path,
         preprocessing_settings=settings.preprocessing,
         need_test_partition=settings.common.perform_final_evaluation,
+        read_data_attributes=(
+            settings.common.discover_data_attributes
+            or settings.resource_model.discover_prioritization_rules
+            or settings.control_flow.discover_branch_rules
+        ),
     )
     runtimes.stop(RuntimeMeter.PREPROCESSING)
 
     # Instantiate and run Simod
-    simod = Simod(settings, event_log=event_log, output_dir=output)
+    simod = Simod(settings, event_log=event_log, output_dir=output, resume=resume is not None)
     simod.run(runtimes=runtimes)
 
 
@@ -1,16 +1,21 @@
+import hashlib
+import shutil
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Tuple
 
+import networkx as nx
 from lxml import etree
 
+from simod.cache import get_artifact_cache
 from simod.cli_formatter import print_step
+from simod.control_flow.java_gateway import run_java_command
 from simod.control_flow.settings import HyperoptIterationParams
 from simod.settings.control_flow_settings import (
     ProcessModelDiscoveryAlgorithm,
 )
-from simod.utilities import execute_external_command, is_windows
+from simod.utilities import is_windows
 
 split_miner_jar_path: Path = Path(__file__).parent / "lib/split-miner-1.7.1-all.jar"
 bpmn_layout_jar_path: Path = Path(__file__).parent / "lib/bpmn-layout-1.0.6-jar-with-dependencies.jar"
@@ -36,7 +41,27 @@ def discover_process_model(log_path: Path, output_model_path: Path, params: Hype
         ------
         ValueError
             If the specified process model discovery algorithm is unknown.
+
+        Notes
+        -----
+        - If the artifact cache is enabled (see :mod:`simod.cache`), the model is reused when it was already discovered
+          from the same event log with the same parameters.
         """
+    cache = get_artifact_cache()
+    if cache is not None:
+        key = cache.key(
+            log_path,
+            params.mining_algorithm,
+            params.epsilon,
+            params.eta,
+            params.prioritize_parallelism,
+            params.replace_or_joins,
+        )
+        cached_model_path = cache.get_path("process_model", key, ".bpmn")
+        if cached_model_path is not None:
+            print_step("Reusing cached process model")
+            shutil.copyfile(cached_model_path, output_model_path)
+            return
     if params.mining_algorithm is ProcessModelDiscoveryAlgorithm.SPLIT_MINER_V1:
         discover_process_model_with_split_miner_v1(
             SplitMinerV1Settings(
@@ -57,6 +82,8 @@ def discover_process_model(log_path: Path, output_model_path: Path, params: Hype
     # Post-process to transform implicit activity self-loops into explicit (modeled through gateways)
     print(f"Post-processing discovered process model to explicitly model self-loops through gateways.")
     post_process_bpmn_self_loops(output_model_path)
+    if cache is not None:
+        cache.put_file("process_model", key, output_model_path, ".bpmn")
 
 
 def _generate_node_id():
@@ -130,6 +157,77 @@ def post_process_bpmn_self_loops(bpmn_model_path: Path):
     tree.write(bpmn_model_path, xml_declaration=True, encoding="UTF-8", pretty_print=True)
 
 
+def get_bpmn_structure_graph(bpmn_model_path: Path) -> nx.DiGraph:
+    """
+    Builds a graph with the structure of the control-flow of a BPMN model, ignoring the IDs of its elements, their
+    order in the file, and the diagram information.
+
+    Each flow node (activity, gateway, or event) of the model is a node of the graph, labeled with its type (plus
+    the name for activities, and the type of event definition for events), and each sequence flow is an edge.
+
+    :param bpmn_model_path: path to the BPMN model.
+    :return: a directed graph where the attribute 'label' of each node identifies its element in the model.
+    """
+    root = etree.parse(bpmn_model_path).getroot()
+    bpmn_namespace = root.nsmap.get(None, "http://www.omg.org/spec/BPMN/20100524/MODEL")
+    ns = {"bpmn": bpmn_namespace}
+
+    graph = nx.DiGraph()
+    for element in root.findall(".//bpmn:process/*", namespaces=ns):
+        element_type = etree.QName(element).localname
+        if element_type.lower().endswith(("task", "gateway", "event")) or element_type in [
+            "subProcess",
+            "callActivity",
+        ]:
+            label = element_type
+            if element_type.lower().endswith("event"):
+                definitions = sorted(
+                    etree.QName(child).localname
+                    for child in element
+                    if etree.QName(child).localname.endswith("EventDefinition")
+                )
+                label += "|" + ",".join(definitions)
+            elif not element_type.lower().endswith("gateway"):
+                label += "|" + (element.get("name") or "")
+            graph.add_node(element.get("id"), label=label)
+    for sequence_flow in root.findall(".//bpmn:process/bpmn:sequenceFlow", namespaces=ns):
+        graph.add_edge(sequence_flow.get("sourceRef"), sequence_flow.get("targetRef"))
+    return graph
+
+
+def get_bpmn_structural_hash(structure_graph: nx.DiGraph) -> str:
+    """
+    Computes a hash of the structure of a BPMN model (see :func:`get_bpmn_structure_graph`) that is the same for
+    structurally identical models. Different structures may (rarely) share the same hash, so use
+    :func:`are_structurally_identical` to confirm a match.
+
+    :param structure_graph: graph with the structure of the BPMN model.
+    :return: the hash of the structure.
+    """
+    labels = nx.get_node_attributes(structure_graph, "label")
+    # Sorted signature of each node: its label plus the labels of its predecessors and successors
+    signature = sorted(
+        (
+            labels[node],
+            sorted(labels[predecessor] for predecessor in structure_graph.predecessors(node)),
+            sorted(labels[successor] for successor in structure_graph.successors(node)),
+        )
+        for node in structure_graph.nodes
+    )
+    return hashlib.sha256(repr(signature).encode("utf-8")).hexdigest()
+
+
+def are_structurally_identical(structure_graph_1: nx.DiGraph, structure_graph_2: nx.DiGraph) -> bool:
+    """
+    Checks if two BPMN models have the same structure (see :func:`get_bpmn_structure_graph`).
+    """
+    return nx.is_isomorphic(
+        structure_graph_1,
+        structure_graph_2,
+        node_match=lambda node_1, node_2: node_1["label"] == node_2["label"],
+    )
+
+
 def add_bpmn_diagram_to_model(bpmn_model_path: Path):
     """
     Add BPMN diagram to the control flow of the existing BPMN model using the hierarchical layout algorithm.
@@ -146,7 +244,7 @@ def add_bpmn_diagram_to_model(bpmn_model_path: Path):
         args = ["java", "-jar", str(bpmn_layout_jar_path), str(bpmn_model_path)]
 
     print_step(f"Adding BPMN diagram to the model: {args}")
-    execute_external_command(args)
+    run_java_command(args)
 
 
 @dataclass
@@ -202,7 +300,7 @@ def discover_process_model_with_split_miner_v1(settings: SplitMinerV1Settings):
         args += ["--removeLoopActivityMarkers"]
 
     print_step(f"SplitMiner v1 is running with the following arguments: {args}")
-    execute_external_command(args)
+    run_java_command(args)
 
 
 def discover_process_model_with_split_miner_v2(settings: SplitMinerV2Settings):
@@ -227,7 +325,7 @@ def discover_process_model_with_split_miner_v2(settings: SplitMinerV2Settings):
     ]
 
     print_step(f"SplitMiner v2 is running with the following arguments: {args}")
-    execute_external_command(args)
+    run_java_command(args)
 
 
 def _prepare_split_miner_params(
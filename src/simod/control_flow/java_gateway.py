@@ -0,0 +1,284 @@
+import queue
+import subprocess
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from simod.cli_formatter import print_notice, print_warning
+from simod.utilities import execute_external_command
+
+job_runner_source_path: Path = Path(__file__).parent / "lib/JobRunner.java"
+
+
+class JavaGateway:
+    """
+    Long-lived Java process running the executable JARs used by Simod (Split Miner, BPMN layout).
+
+    Each execution of a JAR through ``java -jar`` pays the JVM startup, class loading and JIT warm-up, which dominates
+    the runtime of the control-flow iterations for small event logs. The gateway launches one JVM running
+    ``lib/JobRunner.java``, which receives the jobs (JAR and arguments) through its standard input and invokes the
+    main class of each JAR within the same JVM.
+
+    Attributes
+    ----------
+    java_options : List[str]
+        Options for the JVM (memory, headless mode...).
+    startup_timeout : float
+        Maximum time (in seconds) to wait for the JVM to accept jobs.
+    job_timeout : float, optional
+        Maximum time (in seconds) to wait for a job to finish. If exceeded, the JVM is killed. Unlimited if None.
+
+    Notes
+    -----
+    - Requires Java 11 or higher (the job runner is launched as a single-file source program).
+    - The jobs of a gateway are executed one at a time, so concurrent calls from different threads wait for their
+      turn. :func:`run_java_command` runs each concurrent job (e.g., of the parallel trials of an optimization) in a
+      different gateway to avoid it.
+    - If the gateway cannot be started (in [startup_timeout]), or a job fails (or hangs) inside it, the callers fall
+      back to the execution of the JAR in a new Java process (see :func:`run_java_command`).
+    """
+
+    java_options: List[str]
+    startup_timeout: float
+    job_timeout: Optional[float]
+
+    def __init__(
+        self,
+        java_options: Optional[List[str]] = None,
+        startup_timeout: float = 60.0,
+        job_timeout: Optional[float] = 1800.0,
+    ):
+        self.java_options = (
+            java_options if java_options is not None else ["-Xmx2G", "-Xms1024M", "-Djava.awt.headless=true"]
+        )
+        self.startup_timeout = startup_timeout
+        self.job_timeout = job_timeout
+        self._process: Optional[subprocess.Popen] = None
+        # Lines written by the JVM to its standard output, read in a thread to wait for them with a timeout
+        self._responses: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """
+        Launches the JVM and waits until it is ready to accept jobs.
+
+        Returns
+        -------
+        bool
+            Whether the gateway is running.
+        """
+        if self._process is None:
+            # Security managers are needed to prevent the JARs from exiting the JVM, but they must be explicitly
+            # allowed since Java 18, and the 'allow' value is not recognized before Java 12.
+            try:
+                for extra_options in [["-Djava.security.manager=allow"], []]:
+                    if self._launch(self.java_options + extra_options):
+                        break
+            except OSError as error:
+                print_warning(f"Java gateway could not be started: {error}")
+        return self.is_running
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the JVM is alive and accepting jobs."""
+        return self._process is not None and self._process.poll() is None
+
+    def run_jar(self, jar_path: Path, args: List[str]) -> bool:
+        """
+        Runs the main class of the JAR in [jar_path] with the given arguments.
+
+        Parameters
+        ----------
+        jar_path : :class:`pathlib.Path`
+            Path to the executable JAR file.
+        args : List[str]
+            Arguments for the main method of the JAR.
+
+        Returns
+        -------
+        bool
+            Whether the job finished successfully within the gateway.
+        """
+        job = "\t".join([str(jar_path)] + [str(arg) for arg in args])
+        with self._lock:
+            if not self.is_running:
+                return False
+            try:
+                self._process.stdin.write(job + "\n")
+                self._process.stdin.flush()
+                response = self._read_response(self.job_timeout)
+            except (BrokenPipeError, OSError):
+                response = ""
+            if response == "OK":
+                return True
+            elif response is None:
+                print_warning(f"Java gateway job did not finish in {self.job_timeout} seconds, stopping the gateway.")
+                self._stop(kill=True)
+            elif response == "":
+                # The JVM finished (e.g., a JAR called System.exit() and it could not be trapped)
+                print_warning("Java gateway stopped unexpectedly.")
+                self._stop()
+            else:
+                print_warning(f"Java gateway job failed: {response}")
+            return False
+
+    def shutdown(self):
+        """
+        Stops the JVM.
+        """
+        with self._lock:
+            self._stop()
+
+    def _launch(self, java_options: List[str]) -> bool:
+        self._process = subprocess.Popen(
+            ["java"] + java_options + [str(job_runner_source_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+        )
+        self._responses = queue.Queue()
+        threading.Thread(target=_read_lines, args=(self._process.stdout, self._responses), daemon=True).start()
+        response = self._read_response(self.startup_timeout)
+        if response == "READY":
+            return True
+        if response is None:
+            print_warning(f"Java gateway not ready after {self.startup_timeout} seconds.")
+        self._stop(kill=True)
+        return False
+
+    def _read_response(self, timeout: Optional[float]) -> Optional[str]:
+        """
+        Waits for the next line written by the JVM, returning it (empty if the JVM finished), or None if it is not
+        written in [timeout] seconds.
+        """
+        try:
+            return self._responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _stop(self, kill: bool = False):
+        if self._process is not None:
+            try:
+                if kill:
+                    self._process.kill()
+                self._process.stdin.close()
+                self._process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
+            self._responses = None
+
+
+def _read_lines(stream, lines: queue.Queue):
+    """
+    Puts each line of [stream] (stripped) into [lines], and an empty line once the stream is closed.
+    """
+    try:
+        for line in stream:
+            lines.put(line.strip())
+    except (OSError, ValueError):
+        pass
+    lines.put("")
+
+
+# Gateways of the Java executions of the process (if started), and the ones not running a job. Each concurrent
+# execution takes an idle gateway, or starts a new one, so the executions of different threads don't wait for each other
+_gateways: Optional[List[JavaGateway]] = None
+_idle_gateways: List[JavaGateway] = []
+_gateways_lock = threading.Lock()
+
+
+def start_java_gateway() -> bool:
+    """
+    Starts the Java gateway used by :func:`run_java_command` (if not already running). Additional gateways are started
+    on demand for the Java commands executed concurrently.
+
+    Returns
+    -------
+    bool
+        Whether the gateway is running. If not, the Java commands are executed in new processes.
+    """
+    global _gateways
+
+    with _gateways_lock:
+        if _gateways is not None:
+            return True
+    gateway = JavaGateway()
+    if gateway.start():
+        print_notice("Java gateway started, executing Java tools in a long-lived JVM")
+        with _gateways_lock:
+            _gateways = [gateway]
+            _idle_gateways[:] = [gateway]
+        return True
+    else:
+        print_warning("Java gateway could not be started, executing Java tools in separate processes")
+        return False
+
+
+def stop_java_gateway():
+    """
+    Stops the Java gateways (if running).
+    """
+    global _gateways
+
+    with _gateways_lock:
+        gateways, _gateways = _gateways, None
+        _idle_gateways.clear()
+    for gateway in gateways or []:
+        gateway.shutdown()
+
+
+def run_java_command(args: List[str]):
+    """
+    Executes a ``java [options] -jar <jar> [arguments]`` command, running the JAR in a Java gateway if they have been
+    started, or in a new Java process otherwise (or if it fails in the gateway).
+
+    :param args: the command to execute, as passed to :func:`~simod.utilities.execute_external_command`.
+    """
+    gateway = _acquire_gateway() if "-jar" in args else None
+    if gateway is not None:
+        jar_index = args.index("-jar") + 1
+        # Arguments may be quoted to be joined in a single command (Windows)
+        jar_path, *jar_args = [arg.strip('"') for arg in args[jar_index:]]
+        try:
+            succeeded = gateway.run_jar(Path(jar_path), jar_args)
+        finally:
+            _release_gateway(gateway)
+        if succeeded:
+            return
+        print_warning(f"Falling back to a new Java process to run {Path(jar_path).name}")
+    execute_external_command(args)
+
+
+def _acquire_gateway() -> Optional[JavaGateway]:
+    """
+    Takes an idle Java gateway, starting a new one if all of them are running a job. Returns None if the gateways have
+    not been started (or a new one cannot be started).
+    """
+    with _gateways_lock:
+        if _gateways is None:
+            return None
+        while len(_idle_gateways) > 0:
+            gateway = _idle_gateways.pop()
+            if gateway.is_running:
+                return gateway
+    gateway = JavaGateway()
+    if not gateway.start():
+        return None
+    with _gateways_lock:
+        if _gateways is None:
+            # Stopped while starting
+            gateway.shutdown()
+            return None
+        _gateways.append(gateway)
+    return gateway
+
+
+def _release_gateway(gateway: JavaGateway):
+    """
+    Returns a Java gateway taken with :func:`_acquire_gateway` to the idle ones (if still running).
+    """
+    with _gateways_lock:
+        if _gateways is not None and gateway.is_running:
+            _idle_gateways.append(gateway)
@@ -0,0 +1,110 @@
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.security.Permission;
+import java.util.Arrays;
+import java.util.HashMap;
+import java.util.Map;
+import java.util.jar.JarFile;
+
+/**
+ * Runs the main class of executable JAR files inside one long-lived JVM, avoiding the startup, class loading, and
+ * JIT warm-up of a new JVM for each execution.
+ * <p>
+ * Protocol: each line read from stdin is a job, composed of the path to the JAR file followed by its arguments, all
+ * separated by tabs. For each job, one line is written to stdout: "OK" if the main method finished (or called
+ * System.exit(0)), or "ERROR message" otherwise. The output of the jobs is redirected to stderr. The runner writes
+ * "READY" once it accepts jobs, and finishes when stdin is closed.
+ * <p>
+ * Launched from Simod as a single-file source program (Java 11+): java JobRunner.java
+ */
+public class JobRunner {
+
+    private static final Map<String, Method> MAIN_METHODS = new HashMap<>();
+
+    public static void main(String[] args) throws IOException {
+        // Keep stdout for the protocol, and redirect the output of the jobs to stderr
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        System.setOut(System.err);
+        trapExit();
+
+        BufferedReader jobs = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        protocol.println("READY");
+        String job;
+        while ((job = jobs.readLine()) != null) {
+            if (job.isEmpty()) {
+                continue;
+            }
+            String[] parts = job.split("\t", -1);
+            try {
+                mainMethod(parts[0]).invoke(null, (Object) Arrays.copyOfRange(parts, 1, parts.length));
+                protocol.println("OK");
+            } catch (Throwable error) {
+                Throwable cause = error instanceof InvocationTargetException ? error.getCause() : error;
+                if (cause instanceof ExitTrappedException && ((ExitTrappedException) cause).status == 0) {
+                    protocol.println("OK");
+                } else {
+                    protocol.println("ERROR " + String.valueOf(cause).replace('\n', ' '));
+                }
+            }
+            System.err.flush();
+        }
+    }
+
+    private static Method mainMethod(String jarPath) throws Exception {
+        Method mainMethod = MAIN_METHODS.get(jarPath);
+        if (mainMethod == null) {
+            String mainClass;
+            try (JarFile jar = new JarFile(jarPath)) {
+                mainClass = jar.getManifest().getMainAttributes().getValue("Main-Class");
+            }
+            URL[] classPath = new URL[]{new File(jarPath).toURI().toURL()};
+            URLClassLoader loader = new URLClassLoader(classPath, ClassLoader.getSystemClassLoader());
+            mainMethod = Class.forName(mainClass, true, loader).getMethod("main", String[].class);
+            MAIN_METHODS.put(jarPath, mainMethod);
+        }
+        return mainMethod;
+    }
+
+    @SuppressWarnings("removal")
+    private static void trapExit() {
+        // Prevent the jobs from finishing the JVM (only possible while the JVM supports security managers)
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkPermission(Permission permission) {
+                }
+
+                @Override
+                public void checkPermission(Permission permission, Object context) {
+                }
+
+                @Override
+                public void checkExit(int status) {
+                    throw new ExitTrappedException(status);
+                }
+            });
+        } catch (UnsupportedOperationException | SecurityException error) {
+            System.err.println("JobRunner: System.exit() cannot be trapped in this JVM (" + error + ")");
+        }
+    }
+
+    private static class ExitTrappedException extends SecurityException {
+
+        private final int status;
+
+        ExitTrappedException(int status) {
+            super("System.exit(" + status + ")");
+            this.status = status;
+        }
+    }
+}
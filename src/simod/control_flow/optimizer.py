@@ -1,12 +1,12 @@
 import json
 import shutil
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import hyperopt
-import numpy as np
+import networkx as nx
 import pandas as pd
-from hyperopt import STATUS_FAIL, STATUS_OK, Trials, fmin, hp, tpe
+from hyperopt import STATUS_FAIL, STATUS_OK, hp
 from pix_framework.discovery.gateway_probabilities import (
     GatewayProbabilities,
     GatewayProbabilitiesDiscoveryMethod,
@@ -17,17 +17,22 @@ from simod.branch_rules.types import BranchRules
 from pix_framework.filesystem.file_manager import create_folder, get_random_folder_id, remove_asset
 from pix_framework.io.bpm_graph import BPMNGraph
 
-from .discovery import discover_process_model
+from .discovery import (
+    are_structurally_identical,
+    discover_process_model,
+    get_bpmn_structural_hash,
+    get_bpmn_structure_graph,
+)
 from .settings import HyperoptIterationParams
 from ..cli_formatter import print_message, print_step, print_subsection
 from ..event_log.event_log import EventLog
+from ..optimization import SimulationOptimizer, count_replications
 from ..settings.control_flow_settings import ControlFlowSettings, ProcessModelDiscoveryAlgorithm
 from ..simulation.parameters.BPS_model import BPSModel
-from ..simulation.prosimos import simulate_and_evaluate
+from ..simulation.executor import SimulationExecutor
 from ..utilities import get_process_model_path, get_simulation_parameters_path, hyperopt_step
 
-
-class ControlFlowOptimizer:
+class ControlFlowOptimizer(SimulationOptimizer):
     """
     Optimizes the control-flow of a business process model using hyperparameter optimization.
 
@@ -52,11 +57,35 @@ class ControlFlowOptimizer:
         Best discovered BPS model after the optimization process.
     evaluation_measurements : :class:`pandas.DataFrame`
         Quality measures recorded for each hyperopt iteration.
+    executor : :class:`~simod.simulation.executor.SimulationExecutor`, optional
+        Pool of workers to run the simulations of all iterations. If not provided, a pool is created at the start of
+        the optimization process and shut down at the end.
+    keep_simulated_logs : bool
+        Whether to write the simulated logs of each iteration to its output directory as CSV files. If false
+        (default), the simulated logs are evaluated in memory and discarded.
+    checkpoint_path : :class:`pathlib.Path`, optional
+        File to save the progress of the optimization (hyperopt trials and measurements) after each iteration. If it
+        exists when the optimization starts, the optimization continues from the saved progress.
+    seed : int, optional
+        Seed of the run. If provided, the replication k of every iteration is simulated with the same random numbers
+        (common random numbers), so the differences between iterations are not due to the simulation noise, and the
+        TPE suggestions are reproducible.
 
     Notes
     -----
     - If no process model is provided, a discovery method will be used.
     - Optimization is performed using TPE-hyperparameter optimization.
+    - Up to `settings.max_parallel_trials` iterations are evaluated concurrently, suggesting them with a constant liar.
+    - If the search space is finite (only fixed values and choices), each of its points is evaluated once instead.
+    - If `settings.multi_fidelity` is enabled, the iterations are evaluated with a fraction of the validation cases and
+      a single replication, and the best ones are then promoted to increasing fidelities (successive halving).
+    - If `settings.racing` is enabled, the replications of an iteration are cancelled as soon as it clearly cannot
+      improve the best one so far. Its loss (of the evaluated replications) is still reported to hyperopt, flagged as
+      ``pruned``.
+    - If `settings.simulation_budget` is set, the simulations exceeding it (relative to the size and time horizon of
+      the validation log) are stopped, and their iteration fails with its ``failure_reason`` in the response.
+    - Iterations leading to a process model structurally identical to a previous one (with the same gateway
+      probabilities method and f_score) reuse the evaluation of that previous iteration.
     """
 
     # Event log with train/validation partitions
@@ -76,15 +105,23 @@ class ControlFlowOptimizer:
     _need_to_discover_model: bool
     # Path to the training log in XES format, needed for Split Miner
     _xes_train_log_path: Optional[Path] = None
-    # Set of trials for the hyperparameter optimization process
-    _bayes_trials = Trials
-
-    def __init__(self, event_log: EventLog, bps_model: BPSModel, settings: ControlFlowSettings, base_directory: Path):
+    # Evaluated candidates by (structural hash of the model, gateway probabilities method, f_score)
+    _evaluated_candidates: Dict[tuple, List[Tuple[nx.DiGraph, dict, list]]]
+
+    def __init__(
+        self,
+        event_log: EventLog,
+        bps_model: BPSModel,
+        settings: ControlFlowSettings,
+        base_directory: Path,
+        executor: Optional[SimulationExecutor] = None,
+        keep_simulated_logs: bool = False,
+        checkpoint_path: Optional[Path] = None,
+        seed: Optional[int] = None,
+    ):
         # Save event log, optimization settings, and output directory
-        self.event_log = event_log
+        super().__init__(event_log, settings, base_directory, executor, keep_simulated_logs, checkpoint_path, seed)
         self.initial_bps_model = bps_model.deep_copy()
-        self.settings = settings
-        self.base_directory = base_directory
         # Check if it is needed to discover the process model
         self.best_bps_model = None
         if self.initial_bps_model.process_model is None:
@@ -104,6 +141,7 @@ class ControlFlowOptimizer:
                 "distance",
                 "metric",
                 "status",
+                "num_replications",
                 "gateway_probabilities",
                 "epsilon",
                 "eta",
@@ -113,13 +151,14 @@ class ControlFlowOptimizer:
                 "f_score"
             ]
         )
-        # Instantiate trials for hyper-optimization process
-        self._bayes_trials = Trials()
-        self.iteration_index = 0
+        self._evaluated_candidates = {}
 
     def _hyperopt_iteration(self, hyperopt_iteration_dict: dict):
-        # Report new iteration
-        print_subsection(f"Control-flow optimization iteration {self.iteration_index}")
+        # Report new iteration (and reserve its index, as iterations may run concurrently)
+        with self._lock:
+            iteration_index = self.iteration_index
+            self.iteration_index += 1
+        print_subsection(f"Control-flow optimization iteration {iteration_index}")
         # Initialize status
         status = STATUS_OK
         # Create folder for this iteration
@@ -150,6 +189,20 @@ class ControlFlowOptimizer:
         else:
             current_bps_model.process_model = hyperopt_iteration_params.provided_model_path
 
+        # Reuse the evaluation of a previous iteration with a structurally identical model and the same parameters
+        status, structure_graph = hyperopt_step(status, get_bpmn_structure_graph, current_bps_model.process_model)
+        if status == STATUS_OK:
+            previous_evaluation = self._get_previous_evaluation(structure_graph, hyperopt_iteration_params)
+            if previous_evaluation is not None:
+                response, evaluation_measurements = previous_evaluation
+                print(f"Control-flow optimization iteration response (reused, identical model): {response}")
+                # Point to the folder of the reused evaluation, removing the one of this iteration (only its model)
+                remove_asset(output_dir)
+                hyperopt_iteration_params.output_dir = response["output_dir"]
+                with self._lock:
+                    self._process_measurements(hyperopt_iteration_params, status, evaluation_measurements)
+                return response
+
         # Discover gateway probabilities
         status, current_bps_model.gateway_probabilities = hyperopt_step(
             status,
@@ -183,9 +236,14 @@ class ControlFlowOptimizer:
         )
         print(f"Control-flow optimization iteration response: {response}")
 
-        # Save the quality of this evaluation and increase iteration index
-        self._process_measurements(hyperopt_iteration_params, status, evaluation_measurements)
-        self.iteration_index += 1
+        # Save the quality of this evaluation
+        with self._lock:
+            self._process_measurements(hyperopt_iteration_params, status, evaluation_measurements)
+            if status == STATUS_OK:
+                candidate_key = self._get_candidate_key(structure_graph, hyperopt_iteration_params)
+                self._evaluated_candidates.setdefault(candidate_key, []).append(
+                    (structure_graph, response, evaluation_measurements)
+                )
 
         return response
 
@@ -209,23 +267,10 @@ class ControlFlowOptimizer:
             If the best discovered process model path does not exist after optimization.
         """
         # Define search space
-        self.iteration_index = 0
         search_space = self._define_search_space(settings=self.settings)
-
         # Launch optimization process
-        best_hyperopt_params = fmin(
-            fn=self._hyperopt_iteration,
-            space=search_space,
-            algo=tpe.suggest,
-            max_evals=self.settings.num_iterations,
-            trials=self._bayes_trials,
-            show_progressbar=False,
-        )
+        best_hyperopt_params, best_result = self._optimize(search_space)
         best_hyperopt_params = hyperopt.space_eval(search_space, best_hyperopt_params)
-
-        # Process best results
-        results = pd.DataFrame(self._bayes_trials.results).sort_values("loss")
-        best_result = results[results.status == STATUS_OK].iloc[0]
         assert best_result[
             "process_model_path"
         ].exists(), f"Best model path {best_result['process_model_path']} does not exist"
@@ -314,34 +359,45 @@ class ControlFlowOptimizer:
 
         return space
 
+    def _get_progress(self) -> dict:
+        return super()._get_progress() | {"evaluated_candidates": self._evaluated_candidates}
+
+    def _set_progress(self, progress: dict):
+        super()._set_progress(progress)
+        self._evaluated_candidates = progress["evaluated_candidates"]
+
     def cleanup(self):
         remove_asset(self.base_directory)
 
-    @staticmethod
-    def _define_response(
-        status: str, evaluation_measurements: list, output_dir: Path, process_model_path: Path
-    ) -> Tuple[str, dict]:
-        # Compute mean distance if status is OK
-        if status is STATUS_OK:
-            distance = np.mean([x["distance"] for x in evaluation_measurements])
-            # Change status if distance value is negative
-            if distance < 0.0:
-                status = STATUS_FAIL
-        else:
-            distance = 1.0
-        # Define response dict
-        response = {
-            "loss": distance,  # Loss value for the fmin function
-            "status": status,  # Status of the optimization iteration
-            "output_dir": output_dir,
-            "process_model_path": process_model_path,
-        }
-        # Return updated status and processed response
-        return status, response
+    def _get_candidate_key(self, structure_graph: nx.DiGraph, params: HyperoptIterationParams) -> tuple:
+        return (
+            get_bpmn_structural_hash(structure_graph),
+            params.gateway_probabilities_method,
+            params.f_score if self.settings.discover_branch_rules else None,
+        )
+
+    def _get_previous_evaluation(
+        self, structure_graph: nx.DiGraph, params: HyperoptIterationParams
+    ) -> Optional[Tuple[dict, list]]:
+        """
+        Searches for a successful previous iteration evaluating a structurally identical process model with the same
+        gateway probabilities discovery method (and f_score), returning its response and measurements.
+        """
+        with self._lock:
+            candidates = list(self._evaluated_candidates.get(self._get_candidate_key(structure_graph, params), []))
+        for previous_structure_graph, response, evaluation_measurements in candidates:
+            if are_structurally_identical(structure_graph, previous_structure_graph):
+                return dict(response), evaluation_measurements
+        return None
 
     def _process_measurements(self, params: HyperoptIterationParams, status, evaluation_measurements):
         optimization_parameters = params.to_dict()
-        optimization_parameters["status"] = status
+        optimization_parameters["status"] = self._get_measurement_status(status, evaluation_measurements)
+        optimization_parameters["num_replications"] = (
+            count_replications(evaluation_measurements) if status == STATUS_OK else 0
+        )
+        if self.settings.multi_fidelity:
+            optimization_parameters["fidelity"] = self._fidelities[0]
 
         if status == STATUS_OK:
             for measurement in evaluation_measurements:
@@ -389,21 +445,3 @@ class ControlFlowOptimizer:
             bpmn_graph=bpmn_graph,
             discovery_method=gateway_probabilities_method,
         )
-
-    def _simulate_bps_model(self, bps_model: BPSModel, output_dir: Path) -> List[dict]:
-        bps_model.replace_activity_names_with_ids()
-
-        json_parameters_path = bps_model.to_json(output_dir, self.event_log.process_name)
-        evaluation_measures = simulate_and_evaluate(
-            process_model_path=bps_model.process_model,
-            parameters_path=json_parameters_path,
-            output_dir=output_dir,
-            simulation_cases=self.event_log.validation_partition[self.event_log.log_ids.case].nunique(),
-            simulation_start_time=self.event_log.validation_partition[self.event_log.log_ids.start_time].min(),
-            validation_log=self.event_log.validation_partition,
-            validation_log_ids=self.event_log.log_ids,
-            metrics=[self.settings.optimization_metric],
-            num_simulations=self.settings.num_evaluations_per_iteration,
-        )
-
-        return evaluation_measures
@@ -1,16 +1,25 @@
+import gzip
+import math
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import pendulum
-from openxes_cli.lib import csv_to_xes
 from pix_framework.io.event_log import DEFAULT_XES_IDS, EventLogIDs, read_csv_log
-from pix_framework.io.event_log import split_log_training_validation_trace_wise as split_log
 
 from .preprocessor import Preprocessor
+from ..cache import get_preprocessing_cache
+from ..cli_formatter import print_step
 from ..settings.preprocessing_settings import PreprocessingSettings
 from ..utilities import get_process_name_from_log_path
 
+CSV_LOG_EXTENSIONS = (".csv", ".csv.gz")
+COLUMNAR_LOG_EXTENSIONS = (".parquet", ".feather", ".arrow")
+
+# Number of events read at once when streaming an event log (see PreprocessingSettings.chunk_size)
+_INGESTION_BATCH_SIZE = 100_000
+
 
 class EventLog:
     """
@@ -20,8 +29,19 @@ class EventLog:
     training, validation, and test partitions. It also supports exporting logs to XES format
     and loading event logs from files.
 
+    The partitions are views of a single (preprocessed) event log: the instance stores the log once, together with the
+    positions of the events of each partition, and each partition is materialized the first time it is accessed and
+    cached afterward. Train+validation holds the training events followed by the validation ones, and the training
+    and validation partitions are slices of it, so no partition is copied if the events of each partition are
+    consecutive in the log (as arranged by :meth:`from_path`); otherwise, only train+validation and test are copied.
+    If the event log is in compact representation (see :func:`encode_event_log`), each partition is decoded when
+    accessed instead, and not cached, so only the encoded log is kept in memory.
+
     Attributes
     ----------
+    log : :class:`pandas.DataFrame`
+        DataFrame containing the events of all the partitions (except the test one, if provided as a separate log), in
+        compact representation if [vocabularies] is provided.
     train_partition : :class:`pandas.DataFrame`
         DataFrame containing the training partition of the event log.
     validation_partition : :class:`pandas.DataFrame`
@@ -33,36 +53,179 @@ class EventLog:
     log_ids : :class:`EventLogIDs`
         Identifiers for mapping column names in the event log.
     process_name : str
-        The name of the business process associated with the event log, primarily used for file naming.
+        The name of the business process associated with the event log, primarily used for file names.
+    vocabularies : dict, optional
+        If the event log is in compact representation (see :func:`encode_event_log`), original values of each encoded
+        column (case, activity, and resource) indexed by their code.
+
+    Parameters
+    ----------
+    log : :class:`pandas.DataFrame`
+        Event log with the events of all the partitions.
+    log_ids : :class:`EventLogIDs`
+        Identifiers for mapping column names in the event log.
+    train_indices : :class:`numpy.ndarray`
+        Positions (in ascending order) of the events of [log] in the training partition.
+    validation_indices : :class:`numpy.ndarray`
+        Positions (in ascending order) of the events of [log] in the validation partition.
+    test_indices : :class:`numpy.ndarray`, optional
+        Positions (in ascending order) of the events of [log] in the test partition.
+    test_log : :class:`pandas.DataFrame`, optional
+        Separate event log to use as test partition (instead of [test_indices]).
+    process_name : str, optional
+        Name of the business process. Defaults to 'business_process'.
+    vocabularies : dict, optional
+        Original values of each encoded column indexed by their code, if [log] (and [test_log]) are in compact
+        representation.
     """
 
-    train_partition: pd.DataFrame
-    validation_partition: pd.DataFrame
-    train_validation_partition: pd.DataFrame
-    test_partition: pd.DataFrame
+    log: pd.DataFrame
     log_ids: EventLogIDs
     process_name: str  # a name of the process that is used mainly for file names
+    vocabularies: Optional[Dict[str, np.ndarray]]
 
     def __init__(
         self,
-        log_train: pd.DataFrame,
-        log_validation: pd.DataFrame,
-        log_train_validation: pd.DataFrame,
-        log_test: pd.DataFrame,
+        log: pd.DataFrame,
         log_ids: EventLogIDs,
+        train_indices: np.ndarray,
+        validation_indices: np.ndarray,
+        test_indices: Optional[np.ndarray] = None,
+        test_log: Optional[pd.DataFrame] = None,
         process_name: Optional[str] = None,
+        vocabularies: Optional[Dict[str, np.ndarray]] = None,
     ):
-        self.train_partition = log_train
-        self.validation_partition = log_validation
-        self.train_validation_partition = log_train_validation
-        self.test_partition = log_test
+        self.log = log
         self.log_ids = log_ids
+        self._train_indices = train_indices
+        self._validation_indices = validation_indices
+        self._test_indices = test_indices
+        self._test_log = test_log
+        self._partitions: Dict[str, pd.DataFrame] = {}
+        self.vocabularies = vocabularies
 
         if process_name is not None:
             self.process_name = process_name
         else:
             self.process_name = "business_process"
 
+    @property
+    def train_partition(self) -> pd.DataFrame:
+        return self._get_partition("train")
+
+    @property
+    def validation_partition(self) -> pd.DataFrame:
+        return self._get_partition("validation")
+
+    @property
+    def train_validation_partition(self) -> pd.DataFrame:
+        return self._get_partition("train_validation")
+
+    @property
+    def test_partition(self) -> Optional[pd.DataFrame]:
+        if self._test_log is not None:
+            return self.decode(self._test_log)
+        elif self._test_indices is not None:
+            return self._get_partition("test")
+        else:
+            return None
+
+    def _get_partition(self, name: str) -> pd.DataFrame:
+        events = self._get_events(name)
+        # Decode the partition on each access in compact representation, keeping only the encoded log in memory
+        return events if self.vocabularies is None else self.decode(events)
+
+    def _get_events(self, name: str) -> pd.DataFrame:
+        # Materialize the events of the partition the first time they are accessed (as a view of the log if possible)
+        if name not in self._partitions:
+            num_train_events = len(self._train_indices)
+            if name == "train_validation":
+                # Training events followed by the validation ones, so both partitions are slices of train+validation
+                indices = np.concatenate([self._train_indices, self._validation_indices])
+                self._partitions[name] = _take_events(self.log, indices)
+            elif name == "train":
+                self._partitions[name] = self._get_events("train_validation").iloc[:num_train_events]
+            elif name == "validation":
+                self._partitions[name] = self._get_events("train_validation").iloc[num_train_events:]
+            else:
+                self._partitions[name] = _take_events(self.log, self._test_indices)
+        return self._partitions[name]
+
+    def sample(
+        self,
+        max_cases: Optional[int] = None,
+        fraction: Optional[float] = None,
+        seed: int = 0,
+    ) -> "EventLog":
+        """
+        Draws a representative sample of the cases of the training and validation partitions, stratified by trace
+        variant and arrival period (see :func:`sample_cases_stratified`), e.g., to rank the candidates of an
+        optimization phase at a lower cost.
+
+        Parameters
+        ----------
+        max_cases : int, optional
+            Maximum number of cases (of training and validation) in the sample.
+        fraction : float, optional
+            Fraction of the cases to keep in the sample (between 0 and 1). If both [max_cases] and [fraction] are
+            provided, the smallest sample is drawn.
+        seed : int
+            Seed of the random selection of cases within each stratum.
+
+        Returns
+        -------
+        :class:`EventLog`
+            Event log sharing the events of this one, with the training and validation partitions restricted to the
+            sampled cases (each of them sampled proportionally to its number of cases), and without test partition.
+        """
+        case_key = self.log_ids.case
+        num_train_cases = self.log[case_key].iloc[self._train_indices].nunique()
+        num_validation_cases = self.log[case_key].iloc[self._validation_indices].nunique()
+        num_cases = num_train_cases + num_validation_cases
+        sample_size = num_cases
+        if max_cases is not None:
+            sample_size = min(sample_size, max_cases)
+        if fraction is not None:
+            sample_size = min(sample_size, math.ceil(fraction * num_cases))
+        sample_size = max(sample_size, 2)
+        print_step(f"Sampling {min(sample_size, num_cases)} of {num_cases} cases (stratified by variant and arrival)")
+        num_train_samples = max(1, round(sample_size * num_train_cases / num_cases))
+        return EventLog(
+            log=self.log,
+            log_ids=self.log_ids,
+            train_indices=sample_cases_stratified(
+                self.log, self.log_ids, num_train_samples, indices=self._train_indices, seed=seed
+            ),
+            validation_indices=sample_cases_stratified(
+                self.log,
+                self.log_ids,
+                max(1, sample_size - num_train_samples),
+                indices=self._validation_indices,
+                seed=seed,
+            ),
+            process_name=self.process_name,
+            vocabularies=self.vocabularies,
+        )
+
+    def decode(self, event_log: pd.DataFrame) -> pd.DataFrame:
+        """
+        Restores the original case IDs, activity labels, and resources of a subset of the (encoded) events of the event
+        log. If the event log is not in compact representation, returns the events unchanged.
+
+        Parameters
+        ----------
+        event_log : :class:`pandas.DataFrame`
+            Subset of the events of [log] (or any event log with the same representation).
+
+        Returns
+        -------
+        :class:`pandas.DataFrame`
+            The events with their original values.
+        """
+        if self.vocabularies is None:
+            return event_log
+        return decode_event_log(event_log, self.vocabularies)
+
     @staticmethod
     def from_path(
         train_log_path: Path,
@@ -72,6 +235,7 @@ class EventLog:
         process_name: Optional[str] = None,
         test_log_path: Optional[Path] = None,
         split_ratio: float = 0.8,
+        read_data_attributes: bool = True,
     ) -> "EventLog":
         """
         Loads an event log from a file and performs partitioning into training, validation, and test subsets.
@@ -79,7 +243,7 @@ class EventLog:
         Parameters
         ----------
         train_log_path : :class:`pathlib.Path`
-            Path to the training event log file (CSV or CSV.GZ).
+            Path to the training event log file (CSV, CSV.GZ, Parquet, or Arrow IPC/Feather).
         log_ids : :class:`EventLogIDs`
             Identifiers for mapping column names in the event log.
         preprocessing_settings : :class:`PreprocessingSettings`, optional
@@ -89,9 +253,13 @@ class EventLog:
         process_name : str, optional
             Name of the business process. If not provided, it is inferred from the file name.
         test_log_path : :class:`pathlib.Path`, optional
-            Path to the test event log file (CSV or CSV.GZ). If provided, the test log is loaded separately.
+            Path to the test event log file (CSV, CSV.GZ, Parquet, or Arrow IPC/Feather). If provided, the test log is
+            loaded separately.
         split_ratio : float, default=0.8
             Ratio for splitting training and validation partitions.
+        read_data_attributes : bool, default=True
+            Whether to read the columns not referenced by [log_ids] (i.e., the data attributes). If false, these
+            columns are not read from Parquet and Arrow IPC/Feather files.
 
         Returns
         -------
@@ -102,53 +270,78 @@ class EventLog:
         ------
         ValueError
             If the specified training or test log has an unsupported file extension.
+
+        Notes
+        -----
+        - The preprocessed training log is cached (see :func:`simod.cache.get_preprocessing_cache`), and reused when
+          the same file (by content) is loaded again with the same preprocessing settings.
+        - If ``preprocessing_settings.chunk_size`` is set, the training log is read and preprocessed in chunks of
+          complete cases (see :class:`PreprocessingSettings`), holding only one chunk of raw events in memory at a time.
         """
         # Check event log prerequisites
-        if not train_log_path.name.endswith(".csv") and not train_log_path.name.endswith(".csv.gz"):
+        supported_extensions = CSV_LOG_EXTENSIONS + COLUMNAR_LOG_EXTENSIONS
+        if not train_log_path.name.endswith(supported_extensions):
             raise ValueError(
                 f"The specified training log has an unsupported extension ({train_log_path.name}). "
-                f"Only 'csv' and 'csv.gz' supported."
+                f"Only 'csv', 'csv.gz', 'parquet', 'feather', and 'arrow' supported."
             )
         if test_log_path is not None:
-            if not test_log_path.name.endswith(".csv") and not test_log_path.name.endswith(".csv.gz"):
+            if not test_log_path.name.endswith(supported_extensions):
                 raise ValueError(
                     f"The specified test log has an unsupported extension ({test_log_path.name}). "
-                    f"Only 'csv' and 'csv.gz' supported."
+                    f"Only 'csv', 'csv.gz', 'parquet', 'feather', and 'arrow' supported."
                 )
 
-        # Read training event log
-        event_log = read_csv_log(train_log_path, log_ids)
-
-        # Preprocess training event log
-        preprocessor = Preprocessor(event_log, log_ids)
-        processed_event_log = preprocessor.run(
-            multitasking=preprocessing_settings.multitasking,
-            enable_time_concurrency_threshold=preprocessing_settings.enable_time_concurrency_threshold,
-            concurrency_thresholds=preprocessing_settings.concurrency_thresholds,
+        # Read and preprocess training event log
+        processed_event_log = _read_and_preprocess_log(
+            train_log_path, log_ids, preprocessing_settings, read_data_attributes
         )
+        test_df = read_event_log(test_log_path, log_ids, read_data_attributes) if test_log_path is not None else None
+
+        # Compact representation of the event log(s), if requested
+        vocabularies = None
+        if preprocessing_settings.compact_log:
+            # Shared vocabularies for both logs
+            vocabularies = get_vocabularies(
+                [processed_event_log] if test_df is None else [processed_event_log, test_df], log_ids
+            )
+            processed_event_log = encode_event_log(processed_event_log, vocabularies)
+            if test_df is not None:
+                test_df = encode_event_log(test_df, vocabularies)
 
         # Get test if needed, and split train+validation
+        test_indices = None
         if test_log_path is not None:
             # Test log provided, the input log is train+validation
-            train_validation_df = processed_event_log
-            test_df = read_csv_log(test_log_path, log_ids)
+            train_validation_indices = np.arange(len(processed_event_log))
         elif need_test_partition:
             # Test log not provided but needed, split input into test and train+validation
-            train_validation_df, test_df = split_log(processed_event_log, log_ids, training_percentage=split_ratio)
+            train_validation_indices, test_indices = split_log_trace_wise(
+                processed_event_log, log_ids, training_percentage=split_ratio
+            )
         else:
             # Test log not provided and not needed, the input log is train+validation
-            train_validation_df = processed_event_log
-            test_df = None
-        train_df, validation_df = split_log(train_validation_df, log_ids, training_percentage=split_ratio)
+            train_validation_indices = np.arange(len(processed_event_log))
+        train_indices, validation_indices = split_log_trace_wise(
+            processed_event_log, log_ids, training_percentage=split_ratio, indices=train_validation_indices
+        )
+        # Store the events of each partition consecutively, so the partitions are views of the log
+        partitions = [train_indices, validation_indices] + ([test_indices] if test_indices is not None else [])
+        processed_event_log, partitions = _arrange_partitions(processed_event_log, partitions)
+        train_indices, validation_indices = partitions[:2]
+        if test_indices is not None:
+            test_indices = partitions[2]
 
         # Return EventLog instance with different partitions
         return EventLog(
-            log_train=train_df,
-            log_validation=validation_df,
-            log_train_validation=train_validation_df,
-            log_test=test_df,
+            log=processed_event_log,
             log_ids=log_ids,
+            train_indices=train_indices,
+            validation_indices=validation_indices,
+            test_indices=test_indices,
+            test_log=test_df,
             process_name=get_process_name_from_log_path(train_log_path) if process_name is None else process_name,
+            vocabularies=vocabularies,
         )
 
     def train_to_xes(self, path: Path, only_complete_events: bool = False):
@@ -208,6 +401,413 @@ class EventLog:
         write_xes(self.test_partition, self.log_ids, path, only_complete_events=only_complete_events)
 
 
+def _arrange_partitions(
+    event_log: pd.DataFrame, partitions: List[np.ndarray]
+) -> Tuple[pd.DataFrame, List[np.ndarray]]:
+    """
+    Reorders the events of [event_log] so the events of each partition (given by their positions, in ascending order)
+    are consecutive, in the order of [partitions], keeping the relative order of the events within each partition.
+
+    :param event_log: event log to reorder.
+    :param partitions: positions of the events of each partition in [event_log].
+    :return: a tuple with the reordered event log (with a new range index) and the positions of the events of each
+        partition in it.
+    """
+    bounds = np.cumsum([0] + [len(indices) for indices in partitions])
+    arranged = event_log.iloc[np.concatenate(partitions)].reset_index(drop=True)
+    return arranged, [np.arange(start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _take_events(event_log: pd.DataFrame, indices: np.ndarray) -> pd.DataFrame:
+    """
+    Selects the events of [event_log] at the given positions, without copying them if the positions are consecutive.
+    """
+    if len(indices) > 0 and (np.diff(indices) == 1).all():
+        if len(indices) == len(event_log):
+            # The events span the whole log
+            return event_log
+        return event_log.iloc[indices[0] : indices[-1] + 1]
+    return event_log.iloc[indices]
+
+
+def _read_and_preprocess_log(
+    log_path: Path,
+    log_ids: EventLogIDs,
+    preprocessing_settings: PreprocessingSettings,
+    read_data_attributes: bool,
+) -> pd.DataFrame:
+    # Reuse the log preprocessed in a previous execution, if cached
+    cache = get_preprocessing_cache()
+    if cache is not None:
+        key = cache.key(
+            log_path,
+            log_ids,
+            read_data_attributes,
+            preprocessing_settings.multitasking,
+            preprocessing_settings.enable_time_concurrency_threshold,
+            preprocessing_settings.concurrency_thresholds,
+            preprocessing_settings.chunk_size,
+        )
+        processed_event_log = cache.get_object("preprocessed_log", key)
+        if processed_event_log is not None:
+            print_step(f"Reusing cached pre-processed log of {log_path.name}")
+            return processed_event_log
+    # Read and preprocess the log
+    if preprocessing_settings.chunk_size is not None:
+        processed_event_log = _read_and_preprocess_log_in_chunks(
+            log_path, log_ids, preprocessing_settings, read_data_attributes
+        )
+    else:
+        event_log = read_event_log(log_path, log_ids, read_data_attributes)
+        processed_event_log = _preprocess_log(event_log, log_ids, preprocessing_settings)
+    if cache is not None:
+        cache.put_object("preprocessed_log", key, processed_event_log)
+    return processed_event_log
+
+
+def _preprocess_log(
+    event_log: pd.DataFrame, log_ids: EventLogIDs, preprocessing_settings: PreprocessingSettings
+) -> pd.DataFrame:
+    preprocessor = Preprocessor(event_log, log_ids)
+    return preprocessor.run(
+        multitasking=preprocessing_settings.multitasking,
+        enable_time_concurrency_threshold=preprocessing_settings.enable_time_concurrency_threshold,
+        concurrency_thresholds=preprocessing_settings.concurrency_thresholds,
+        num_workers=preprocessing_settings.num_workers,
+    )
+
+
+def _read_and_preprocess_log_in_chunks(
+    log_path: Path,
+    log_ids: EventLogIDs,
+    preprocessing_settings: PreprocessingSettings,
+    read_data_attributes: bool,
+) -> pd.DataFrame:
+    """
+    Reads and pre-processes an event log without loading all its raw events at once. The input file is streamed and
+    its events distributed into chunks of (approx.) [preprocessing_settings.chunk_size] events by case ID, so each case
+    is complete in one chunk. Then, each chunk is read and pre-processed on its own, and spilled to an on-disk Parquet
+    store, from which the pre-processed event log is finally loaded.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as error:
+        raise ImportError(
+            "Reading event logs in chunks requires 'pyarrow', install it with 'pip install simod[columnar]'."
+        ) from error
+
+    with tempfile.TemporaryDirectory(prefix="simod_log_chunks_") as store_dir:
+        store_dir = Path(store_dir)
+        num_chunks = max(1, math.ceil(_count_events(log_path) / preprocessing_settings.chunk_size))
+        print_step(f"Reading {log_path.name} in {num_chunks} chunks")
+        chunk_paths = _split_log_by_case(log_path, log_ids, read_data_attributes, num_chunks, store_dir)
+        # Pre-process each chunk and spill it to the store
+        processed_paths = []
+        for chunk_path in chunk_paths:
+            event_log = read_event_log(chunk_path, log_ids)
+            processed_path = store_dir / f"processed_{chunk_path.stem}.parquet"
+            _preprocess_log(event_log, log_ids, preprocessing_settings).to_parquet(processed_path, index=False)
+            chunk_path.unlink()
+            processed_paths.append(processed_path)
+        # Load the pre-processed event log
+        processed_event_log = pd.concat(
+            [pd.read_parquet(processed_path) for processed_path in processed_paths], ignore_index=True
+        )
+    processed_event_log = processed_event_log.astype({log_ids.case: object})
+    return processed_event_log.sort_values([log_ids.start_time, log_ids.end_time], kind="stable").reset_index(
+        drop=True
+    )
+
+
+def _count_events(log_path: Path) -> int:
+    # Number of events (rows) in the file, without parsing it
+    if log_path.name.endswith(COLUMNAR_LOG_EXTENSIONS):
+        return _open_columnar_log(log_path).count_rows()
+    open_file = gzip.open if log_path.name.endswith(".gz") else open
+    with open_file(log_path, "rb") as file:
+        num_lines = sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1 << 20), b""))
+    return max(0, num_lines - 1)  # Header
+
+
+def _split_log_by_case(
+    log_path: Path,
+    log_ids: EventLogIDs,
+    read_data_attributes: bool,
+    num_chunks: int,
+    output_dir: Path,
+) -> List[Path]:
+    """
+    Streams the events of an event log into [num_chunks] files of [output_dir], assigning each case to a chunk by the
+    hash of its ID. The chunks are written in the same format as the input (CSV or Parquet), without parsing their
+    values, so reading them results in the same values as reading the whole log.
+
+    :return: paths to the (non-empty) chunks.
+    """
+    chunk_paths: Dict[int, Path] = {}
+    if log_path.name.endswith(CSV_LOG_EXTENSIONS):
+        # Keep the raw values (as text) to write them back unchanged
+        reader = pd.read_csv(log_path, chunksize=_INGESTION_BATCH_SIZE, dtype=str, keep_default_na=False)
+        for batch in reader:
+            for chunk, chunk_events in batch.groupby(_get_chunk_ids(batch[log_ids.case], num_chunks), sort=True):
+                chunk_path = chunk_paths.setdefault(chunk, output_dir / f"chunk_{chunk}.csv")
+                chunk_events.to_csv(chunk_path, mode="a", header=not chunk_path.exists(), index=False)
+    else:
+        import pyarrow
+        import pyarrow.parquet
+
+        dataset = _open_columnar_log(log_path)
+        columns = _get_columns_to_read(dataset.schema.names, log_ids, read_data_attributes)
+        writers = {}
+        try:
+            for batch in dataset.to_batches(columns=columns, batch_size=_INGESTION_BATCH_SIZE):
+                table = pyarrow.Table.from_batches([batch])
+                chunk_ids = _get_chunk_ids(table.column(log_ids.case).to_pandas(), num_chunks)
+                for chunk in np.unique(chunk_ids):
+                    if chunk not in writers:
+                        chunk_paths[chunk] = output_dir / f"chunk_{chunk}.parquet"
+                        writers[chunk] = pyarrow.parquet.ParquetWriter(chunk_paths[chunk], table.schema)
+                    writers[chunk].write_table(table.take(np.flatnonzero(chunk_ids == chunk)))
+        finally:
+            for writer in writers.values():
+                writer.close()
+    return [chunk_paths[chunk] for chunk in sorted(chunk_paths)]
+
+
+def _get_chunk_ids(case_ids: pd.Series, num_chunks: int) -> np.ndarray:
+    # Stable assignment of each case to a chunk (the same in any batch and execution)
+    return (pd.util.hash_pandas_object(case_ids.astype(str), index=False).to_numpy() % num_chunks).astype(np.int64)
+
+
+def read_event_log(log_path: Path, log_ids: EventLogIDs, read_data_attributes: bool = True) -> pd.DataFrame:
+    """
+    Reads an event log from a CSV (or CSV.GZ) file, or from a columnar Parquet or Arrow IPC (Feather) file, with the
+    same format as :func:`pix_framework.io.event_log.read_csv_log` (case IDs as objects, resources as strings, UTC
+    timestamps, and sorted by start and end time).
+
+    The timestamps stored as such in the columnar files are only converted to UTC, without parsing them from strings.
+
+    :param log_path: path to the event log file.
+    :param log_ids: identifiers of the columns of the event log.
+    :param read_data_attributes: whether to read the columns not referenced by [log_ids]. If false, these columns are
+        not read from columnar files.
+    :return: the read event log.
+    """
+    if log_path.name.endswith(CSV_LOG_EXTENSIONS):
+        return read_csv_log(log_path, log_ids)
+
+    # Read (only the required columns of) the log
+    dataset = _open_columnar_log(log_path)
+    columns = _get_columns_to_read(dataset.schema.names, log_ids, read_data_attributes)
+    event_log = dataset.to_table(columns=columns).to_pandas()
+    # Same types as when reading from CSV
+    event_log = event_log.astype({log_ids.case: object})
+    if log_ids.resource not in event_log.columns:
+        event_log[log_ids.resource] = "NOT_SET"
+    else:
+        event_log[log_ids.resource] = event_log[log_ids.resource].fillna("NOT_SET").apply(str)
+    for column in [log_ids.end_time, log_ids.start_time, log_ids.enabled_time]:
+        if column in event_log.columns:
+            event_log[column] = _to_utc_timestamps(event_log[column])
+    # Sort by start and end time
+    if log_ids.start_time in event_log.columns:
+        time_columns = [log_ids.start_time, log_ids.end_time, log_ids.enabled_time]
+        return event_log.sort_values([column for column in time_columns if column in event_log.columns])
+    else:
+        return event_log.sort_values(log_ids.end_time)
+
+
+def _open_columnar_log(log_path: Path):
+    # Dataset to read a Parquet or Arrow IPC (Feather) file
+    try:
+        import pyarrow.dataset
+    except ImportError as error:
+        raise ImportError(
+            "Reading Parquet or Arrow IPC (Feather) event logs requires 'pyarrow', install it with "
+            "'pip install simod[columnar]'."
+        ) from error
+    return pyarrow.dataset.dataset(log_path, format="parquet" if log_path.name.endswith(".parquet") else "ipc")
+
+
+def _get_columns_to_read(columns: List[str], log_ids: EventLogIDs, read_data_attributes: bool) -> Optional[List[str]]:
+    # Columns to read from a columnar file (None for all of them)
+    if read_data_attributes:
+        return None
+    log_ids_columns = set(log_ids.to_dict().values())
+    return [column for column in columns if column in log_ids_columns]
+
+
+def _to_utc_timestamps(timestamps: pd.Series) -> pd.Series:
+    # UTC timestamps (with nanosecond precision), parsing them only if stored as strings
+    if isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+        timestamps = timestamps.dt.tz_convert("UTC")
+    elif pd.api.types.is_datetime64_dtype(timestamps):
+        timestamps = timestamps.dt.tz_localize("UTC")
+    else:
+        timestamps = pd.to_datetime(timestamps, utc=True, format="ISO8601")
+    return timestamps.astype("datetime64[ns, UTC]")
+
+
+def split_log_trace_wise(
+    event_log: pd.DataFrame,
+    log_ids: EventLogIDs,
+    training_percentage: float,
+    indices: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits the traces of an event log into training and validation, taking the first traces (sorted by the start and
+    end time of their events) until [training_percentage] of the events are in the training set. Same split as
+    :func:`pix_framework.io.event_log.split_log_training_validation_trace_wise`, but returning the positions of the
+    events of each split instead of copies of the event log.
+
+    :param event_log: event log to split.
+    :param log_ids: identifiers of the columns of the event log.
+    :param training_percentage: percentage of events (approx.) to retain in the training set.
+    :param indices: positions (in ascending order) of the events of [event_log] to split. Defaults to all of them.
+    :return: a tuple with the positions of the events in the training set and in the validation set.
+    """
+    if indices is None:
+        indices = np.arange(len(event_log))
+    events = event_log[[log_ids.case, log_ids.start_time, log_ids.end_time]].iloc[indices]
+    # Number of events of each case, with the cases sorted by the start and end time of their events
+    sorted_cases = events.sort_values([log_ids.start_time, log_ids.end_time])[log_ids.case].unique()
+    events_per_case = events[log_ids.case].value_counts(dropna=False).reindex(sorted_cases).to_numpy()
+    # The first traces until the size limit is met go to the training set
+    training_full = np.cumsum(events_per_case) >= training_percentage * len(events)
+    num_training_cases = np.argmax(training_full) + 1 if training_full.any() else len(sorted_cases)
+    in_training = events[log_ids.case].isin(sorted_cases[:num_training_cases]).to_numpy()
+    return indices[in_training], indices[~in_training]
+
+
+def get_first_cases(event_log: pd.DataFrame, log_ids: EventLogIDs, fraction: float) -> pd.DataFrame:
+    """
+    Retains the first cases (by the start time of their first event) of an event log, i.e., a shorter horizon of it
+    with the same arrival pattern.
+
+    :param event_log: event log to filter.
+    :param log_ids: identifiers of the columns of the event log.
+    :param fraction: fraction of the cases to retain (at least one).
+    :return: the events of the first cases, or [event_log] itself if all of them are retained.
+    """
+    case_starts = event_log.groupby(log_ids.case)[log_ids.start_time].min().sort_values(kind="stable")
+    num_cases = max(1, math.ceil(fraction * len(case_starts)))
+    if num_cases >= len(case_starts):
+        return event_log
+    return event_log[event_log[log_ids.case].isin(case_starts.index[:num_cases])]
+
+
+def sample_cases_stratified(
+    event_log: pd.DataFrame,
+    log_ids: EventLogIDs,
+    num_cases: int,
+    indices: Optional[np.ndarray] = None,
+    num_periods: int = 4,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Samples [num_cases] cases of an event log stratified by trace variant (sequence of activities, sorted by start and
+    end time) and arrival period (the cases are divided into [num_periods] periods with the same number of cases by
+    their start time). Each stratum contributes to the sample proportionally to its number of cases (the largest
+    remainders get the cases left by the rounding), and its cases are drawn at random.
+
+    :param event_log: event log to sample.
+    :param log_ids: identifiers of the columns of the event log.
+    :param num_cases: number of cases to sample.
+    :param indices: positions (in ascending order) of the events of [event_log] to sample from. Defaults to all of them.
+    :param num_periods: number of arrival periods to stratify by.
+    :param seed: seed of the random selection of cases within each stratum.
+    :return: the positions (in ascending order) of the events of the sampled cases.
+    """
+    if indices is None:
+        indices = np.arange(len(event_log))
+    events = event_log[[log_ids.case, log_ids.activity, log_ids.start_time, log_ids.end_time]].iloc[indices]
+    cases = events.sort_values([log_ids.start_time, log_ids.end_time], kind="stable").groupby(log_ids.case, sort=True)
+    if num_cases >= cases.ngroups:
+        return indices
+    # Stratum of each case: its variant and arrival period
+    variants = pd.factorize(cases[log_ids.activity].agg(tuple), sort=True)[0]
+    arrival_ranks = cases[log_ids.start_time].min().rank(method="first").to_numpy() - 1
+    periods = (arrival_ranks * min(num_periods, cases.ngroups) // cases.ngroups).astype(np.int64)
+    strata = pd.DataFrame({"variant": variants, "period": periods}, index=cases.size().index)
+    stratum_sizes = strata.groupby(["variant", "period"], sort=True).size()
+    # Proportional allocation, assigning the remaining cases to the largest remainders
+    quotas = stratum_sizes.to_numpy() * num_cases / cases.ngroups
+    allocation = np.floor(quotas).astype(np.int64)
+    remainders = np.argsort(-(quotas - allocation), kind="stable")
+    allocation[remainders[: num_cases - allocation.sum()]] += 1
+    # Random cases of each stratum
+    rng = np.random.default_rng(seed)
+    sampled_cases = []
+    for (_, stratum_cases), size in zip(strata.groupby(["variant", "period"], sort=True), allocation):
+        if size > 0:
+            sampled_cases.append(rng.choice(stratum_cases.index.to_numpy(), size=size, replace=False))
+    in_sample = events[log_ids.case].isin(np.concatenate(sampled_cases)).to_numpy()
+    return indices[in_sample]
+
+
+def get_vocabularies(event_logs: List[pd.DataFrame], log_ids: EventLogIDs) -> Dict[str, np.ndarray]:
+    """
+    Computes the vocabularies to encode event logs with :func:`encode_event_log`: the sorted distinct values of the case
+    ID, activity, and resource columns, shared by all the given event logs.
+
+    :param event_logs: event logs to encode with the same codes.
+    :param log_ids: identifiers of the columns of the event logs.
+    :return: a dictionary with the values of each encoded column (by column name) indexed by their code.
+    """
+    vocabularies = {}
+    for column in [log_ids.case, log_ids.activity, log_ids.resource]:
+        values = pd.Index([], dtype=object)
+        for event_log in event_logs:
+            values = values.union(pd.Index(event_log[column].unique(), dtype=object))
+        vocabularies[column] = values.sort_values().to_numpy()
+    return vocabularies
+
+
+def encode_event_log(event_log: pd.DataFrame, vocabularies: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Transforms an event log into a compact (dictionary-encoded) representation: the case IDs, activity labels, and
+    resources are replaced by int32 codes over the vocabularies of their original values (see :func:`get_vocabularies`).
+    The timestamps are kept as datetime64 values (stored as int64 nanoseconds).
+
+    The codes follow the order of the original values, so sorting or grouping the encoded event log by case keeps the
+    same order as with the original representation. The process model and the simulation parameters refer to the
+    original activity labels and resources, so the events are decoded (see :func:`decode_event_log`) before
+    discovering them, as well as to export the event log.
+
+    :param event_log: event log to encode.
+    :param vocabularies: values of each encoded column indexed by their code, containing all the values of
+        [event_log] in these columns.
+    :return: the encoded event log.
+    """
+    return event_log.assign(
+        **{
+            column: pd.Index(values, dtype=object).get_indexer(event_log[column]).astype(np.int32)
+            for column, values in vocabularies.items()
+        }
+    )
+
+
+def decode_event_log(event_log: pd.DataFrame, vocabularies: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Restores the original values of an event log encoded with :func:`encode_event_log`.
+
+    :param event_log: encoded event log.
+    :param vocabularies: values of each encoded column indexed by their code.
+    :return: a copy of the event log with the original values.
+    """
+    return event_log.assign(
+        **{column: values[event_log[column].to_numpy()] for column, values in vocabularies.items()}
+    )
+
+
+_XES_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" ?>\n'
+    "<!-- XES standard version: 1.0 -->\n"
+    '<log xes.version="1.0" xes.features="nested-attributes">\n'
+)
+_XES_FOOTER = "</log>\n"
+_XES_WRITE_CHUNK_SIZE = 10_000  # Number of traces formatted and written at once
+
+
 def write_xes(
     event_log: pd.DataFrame,
     log_ids: EventLogIDs,
@@ -216,34 +816,96 @@ def write_xes(
 ):
     """
     Writes the log to a file in XES format.
+
+    Each activity instance is written as a start event (unless [only_complete_events]) followed by a complete event,
+    grouping the events in traces by case (in order of appearance). The values are formatted column-wise and the XML is
+    streamed to the file in chunks of traces, compressing it with gzip if [output_path] ends with '.gz'.
+
+    :param event_log: event log to write.
+    :param log_ids: identifiers of the columns of the event log.
+    :param output_path: path to the XES (or XES.GZ) file to write.
+    :param only_complete_events: if true, write only the events corresponding to the end of each activity instance.
     """
-    # Copy event log to modify
-    df = event_log.copy()
-    # Transform timestamps to expected format
-    xes_datetime_format = "YYYY-MM-DDTHH:mm:ss.SSSZ"
-    # Start time
-    if only_complete_events:
-        df[log_ids.start_time] = ""
+    # Format the attribute values column-wise
+    cases = _format_xes_values(event_log[log_ids.case])
+    resources = _format_xes_values(event_log[log_ids.resource])
+    activities = _format_xes_values(event_log[log_ids.activity])
+    events = _format_xes_events(resources, activities, "complete", _format_xes_timestamps(event_log[log_ids.end_time]))
+    if not only_complete_events:
+        # Start event of each activity instance right before its complete event
+        start_events = _format_xes_events(
+            resources, activities, "start", _format_xes_timestamps(event_log[log_ids.start_time])
+        )
+        events = start_events + events
+    # Group the events by case, keeping the order of appearance of both cases and events
+    case_codes, case_names = pd.factorize(cases)
+    order = np.argsort(case_codes, kind="stable")
+    events = events.to_numpy()[order]
+    trace_bounds = np.flatnonzero(np.diff(case_codes[order])) + 1
+    trace_starts = np.concatenate(([0], trace_bounds))
+    trace_ends = np.concatenate((trace_bounds, [len(order)]))
+    # Stream the traces to the file
+    open_file = gzip.open if output_path.name.endswith(".gz") else open
+    with open_file(output_path, "wt", encoding="utf-8", newline="\n") as file:
+        file.write(_XES_HEADER)
+        for chunk_start in range(0, len(trace_starts), _XES_WRITE_CHUNK_SIZE):
+            chunk = []
+            for trace_index in range(chunk_start, min(chunk_start + _XES_WRITE_CHUNK_SIZE, len(trace_starts))):
+                chunk.append(f'\t<trace>\n\t\t<string key="concept:name" value="{case_names[trace_index]}"/>\n')
+                chunk.extend(events[trace_starts[trace_index] : trace_ends[trace_index]])
+                chunk.append("\t</trace>\n")
+            file.write("".join(chunk))
+        file.write(_XES_FOOTER)
+
+
+def _format_xes_values(values: pd.Series) -> pd.Series:
+    # String representation of the values, escaped for XML attributes (null values as 'UNDEFINED')
+    formatted = values.astype(str).where(values.notna(), "UNDEFINED")
+    if formatted.str.contains(r"[&<>\"]", regex=True).any():
+        formatted = (
+            formatted.str.replace("&", "&amp;", regex=False)
+            .str.replace("<", "&lt;", regex=False)
+            .str.replace(">", "&gt;", regex=False)
+            .str.replace('"', "&quot;", regex=False)
+        )
+    return formatted.reset_index(drop=True)
+
+
+def _format_xes_timestamps(timestamps: pd.Series) -> pd.Series:
+    # Timestamps in the format 'YYYY-MM-DDTHH:mm:ss.SSS+HH:MM' (null values as 'UNDEFINED')
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, utc=True, format="ISO8601")
+    if timestamps.dt.tz is None:
+        local_times = timestamps
+        offsets = pd.Series("+00:00", index=timestamps.index)
     else:
-        df[log_ids.start_time] = df[log_ids.start_time].apply(
-            lambda x: pendulum.parse(x.isoformat()).format(xes_datetime_format)
+        local_times = timestamps.dt.tz_localize(None)
+        offset_minutes = (local_times - timestamps.dt.tz_convert("UTC").dt.tz_localize(None)) // pd.Timedelta(minutes=1)
+        offsets = offset_minutes.map(
+            {minutes: _format_utc_offset(minutes) for minutes in offset_minutes.dropna().unique()}
         )
-    # End time
-    df[log_ids.end_time] = df[log_ids.end_time].apply(
-        lambda x: pendulum.parse(x.isoformat()).format(xes_datetime_format)
+    local_times = np.datetime_as_string(local_times.to_numpy(dtype="datetime64[ms]"), unit="ms")
+    formatted = pd.Series(local_times, index=timestamps.index) + offsets
+    return formatted.where(timestamps.notna(), "UNDEFINED").reset_index(drop=True)
+
+
+def _format_utc_offset(minutes: int) -> str:
+    sign = "-" if minutes < 0 else "+"
+    hours, minutes = divmod(abs(int(minutes)), 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def _format_xes_events(
+    resources: pd.Series, activities: pd.Series, transition: str, timestamps: pd.Series
+) -> pd.Series:
+    # XML of the events with the given lifecycle transition, built column-wise
+    return (
+        '\t\t<event>\n\t\t\t<string key="org:resource" value="'
+        + resources
+        + '"/>\n\t\t\t<string key="concept:name" value="'
+        + activities
+        + f'"/>\n\t\t\t<string key="lifecycle:transition" value="{transition}"/>\n'
+        + '\t\t\t<string key="time:timestamp" value="'
+        + timestamps
+        + '"/>\n\t\t</event>\n'
     )
-    # Rename columns to XES expected
-    df = df.rename(
-        columns={
-            log_ids.activity: "concept:name",
-            log_ids.case: "case:concept:name",
-            log_ids.resource: "org:resource",
-            log_ids.start_time: "start_timestamp",
-            log_ids.end_time: "time:timestamp",
-        }
-    )[["case:concept:name", "concept:name", "org:resource", "start_timestamp", "time:timestamp", ]]
-    # Fill null values
-    df.fillna("UNDEFINED", inplace=True)
-    # Write and convert
-    df.to_csv(output_path, index=False)
-    csv_to_xes(output_path, output_path)
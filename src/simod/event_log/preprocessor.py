@@ -1,10 +1,15 @@
+import heapq
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from importlib import metadata
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import pandas as pd
-from pix_framework.enhancement.concurrency_oracle import OverlappingConcurrencyOracle
+from pix_framework.enhancement.concurrency_oracle import ConcurrencyOracle, OverlappingConcurrencyOracle
 from pix_framework.enhancement.multitasking import adjust_durations
+from pix_framework.enhancement.resource_availability import ResourceAvailability
 from pix_framework.enhancement.start_time_estimator.config import ConcurrencyThresholds
 from pix_framework.enhancement.start_time_estimator.config import Configuration as StartTimeEstimatorConfiguration
 from pix_framework.enhancement.start_time_estimator.estimator import StartTimeEstimator
@@ -12,6 +17,10 @@ from pix_framework.io.event_log import EventLogIDs
 
 from simod.cli_formatter import print_section, print_step
 
+# Versions of pix-framework (major, minor) whose private per-trace computation of the enabled times has been checked
+# to match the one of ConcurrencyOracle.add_enabled_times
+_ENABLING_INFO_PIX_VERSIONS = [(0, 13)]
+
 
 @dataclass
 class MultitaskingSettings:
@@ -55,6 +64,7 @@ class Preprocessor:
         multitasking: bool = False,
         concurrency_thresholds: ConcurrencyThresholds = ConcurrencyThresholds(),
         enable_time_concurrency_threshold: float = 0.75,
+        num_workers: int = 1,
     ) -> pd.DataFrame:
         """
         Executes event log pre-processing steps based on the specified parameters.
@@ -70,6 +80,10 @@ class Preprocessor:
             Thresholds for the Heuristics Miner to estimate start times.
         enable_time_concurrency_threshold : float
             Threshold for estimating enabled times.
+        num_workers : int
+            Number of worker processes to estimate the start and enabled times. With more than one, the event log is
+            sharded by resource (to compute when each resource became available) and by case (to compute when each
+            activity instance was enabled), producing the same result as with one process.
 
         Returns
         -------
@@ -79,7 +93,7 @@ class Preprocessor:
         print_section("Pre-processing")
 
         if self._log_ids.start_time not in self._log.columns or self._log[self._log_ids.start_time].isnull().any():
-            self._add_start_times(concurrency_thresholds)
+            self._add_start_times(concurrency_thresholds, num_workers)
 
         if multitasking:
             self._adjust_for_multitasking()
@@ -87,7 +101,7 @@ class Preprocessor:
         if self._log_ids.enabled_time not in self._log.columns:
             # The start times were not estimated (otherwise enabled times would
             # be present), and the enabled times are not in the original log
-            self._add_enabled_times(enable_time_concurrency_threshold)
+            self._add_enabled_times(enable_time_concurrency_threshold, num_workers)
 
         return self._log
 
@@ -100,7 +114,7 @@ class Preprocessor:
             verbose=verbose,
         )
 
-    def _add_start_times(self, concurrency_thresholds: ConcurrencyThresholds):
+    def _add_start_times(self, concurrency_thresholds: ConcurrencyThresholds, num_workers: int = 1):
         print_step("Adding start times")
 
         configuration = StartTimeEstimatorConfiguration(
@@ -108,9 +122,25 @@ class Preprocessor:
             concurrency_thresholds=concurrency_thresholds,
         )
 
-        self._log = StartTimeEstimator(self._log, configuration).estimate(replace_recorded_start_times=True)
+        estimator = StartTimeEstimator(self._log, configuration)
+        if num_workers > 1:
+            # Compute the resource availability and enabled times in parallel, so the estimator only combines them
+            log = self._log.copy()
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                _set_timestamps(
+                    log,
+                    self._log_ids.available_time,
+                    _compute_availability_times(log, estimator.resource_availability, executor, num_workers),
+                )
+                _set_timestamps(
+                    log,
+                    self._log_ids.enabled_time,
+                    _compute_enabled_times(log, estimator.concurrency_oracle, executor, num_workers),
+                )
+            estimator.event_log = log
+        self._log = estimator.estimate(replace_recorded_start_times=True)
 
-    def _add_enabled_times(self, enable_time_concurrency_threshold: float):
+    def _add_enabled_times(self, enable_time_concurrency_threshold: float, num_workers: int = 1):
         print_step("Adding enabled times")
 
         configuration = StartTimeEstimatorConfiguration(
@@ -119,4 +149,152 @@ class Preprocessor:
             consider_start_times=True,
         )
         # The start times are the original ones, so use overlapping concurrency oracle
-        OverlappingConcurrencyOracle(self._log, configuration).add_enabled_times(self._log)
+        concurrency_oracle = OverlappingConcurrencyOracle(self._log, configuration)
+        if num_workers > 1:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                _set_timestamps(
+                    self._log,
+                    self._log_ids.enabled_time,
+                    _compute_enabled_times(self._log, concurrency_oracle, executor, num_workers),
+                )
+        else:
+            concurrency_oracle.add_enabled_times(self._log)
+
+
+def _shard_log(log: pd.DataFrame, key: str, num_shards: int) -> List[pd.DataFrame]:
+    """
+    Splits the event log in (up to) [num_shards] shards, keeping all the events with the same value of [key] in the
+    same shard and balancing their number of events. The events with no value are assigned to the first shard.
+
+    :param log: event log to split.
+    :param key: column to group the events by (e.g., case or resource).
+    :param num_shards: maximum number of shards.
+    :return: the non-empty shards, each of them preserving the order and index of its events in [log].
+    """
+    sizes = log.groupby(key, sort=True).size().sort_values(ascending=False, kind="stable")
+    # Assign each group to the shard with the lowest number of events so far
+    loads = [(0, shard) for shard in range(num_shards)]
+    assignment = {}
+    for value, size in sizes.items():
+        load, shard = heapq.heappop(loads)
+        assignment[value] = shard
+        heapq.heappush(loads, (load + size, shard))
+    shard_ids = log[key].map(assignment).fillna(0).to_numpy()
+    return [log[shard_ids == shard] for shard in range(num_shards) if (shard_ids == shard).any()]
+
+
+def _compute_availability_times(
+    log: pd.DataFrame,
+    resource_availability: ResourceAvailability,
+    executor: ProcessPoolExecutor,
+    num_workers: int,
+) -> Tuple[list, list]:
+    """
+    Computes the time each resource became available to perform each event of [log], sharding the log by resource.
+
+    :return: the indexes of the events and their resource availability times.
+    """
+    resource_key = resource_availability.log_ids.resource
+    futures = []
+    for shard in _shard_log(log, resource_key, num_workers):
+        # Send only the events performed by the resources of the shard
+        resources = {str(resource) for resource in shard[resource_key].unique()}
+        shard_availability = ResourceAvailability(
+            {
+                resource: events
+                for resource, events in resource_availability.performed_events.items()
+                if resource in resources
+            },
+            resource_availability.working_schedules,
+            resource_availability.config,
+        )
+        futures.append(executor.submit(_availability_times_of_shard, shard, shard_availability))
+    return _merge_results(futures)
+
+
+def _availability_times_of_shard(shard: pd.DataFrame, resource_availability: ResourceAvailability) -> Tuple[list, list]:
+    resource_key = resource_availability.log_ids.resource
+    indexes, availability_times = [], []
+    for index, event in shard.iterrows():
+        indexes.append(index)
+        availability_times.append(resource_availability.available_since(event[resource_key], event))
+    return indexes, availability_times
+
+
+def _compute_enabled_times(
+    log: pd.DataFrame,
+    concurrency_oracle: ConcurrencyOracle,
+    executor: ProcessPoolExecutor,
+    num_workers: int,
+) -> Tuple[list, list]:
+    """
+    Computes the enabled time of each event of [log] with the (already discovered) concurrency relations of
+    [concurrency_oracle], sharding the log by case.
+
+    :return: the indexes of the events and their enabled times.
+    """
+    futures = [
+        executor.submit(_enabled_times_of_shard, shard, concurrency_oracle)
+        for shard in _shard_log(log, concurrency_oracle.log_ids.case, num_workers)
+    ]
+    return _merge_results(futures)
+
+
+def _enabled_times_of_shard(shard: pd.DataFrame, concurrency_oracle: ConcurrencyOracle) -> Tuple[list, list]:
+    indexes, enabled_times = [], []
+    for _, trace in shard.groupby(concurrency_oracle.log_ids.case):
+        trace_indexes, trace_enabled_times = _enabled_times_of_trace(trace, concurrency_oracle)
+        indexes += trace_indexes
+        enabled_times += trace_enabled_times
+    return indexes, enabled_times
+
+
+def _enabled_times_of_trace(trace: pd.DataFrame, concurrency_oracle: ConcurrencyOracle) -> Tuple[list, list]:
+    """
+    Computes the enabled time of each event of [trace] as ConcurrencyOracle.add_enabled_times does (the first events
+    are enabled at the start of the trace), which processes the traces with a private method of the oracle. If the
+    installed version of pix-framework is not one of the checked versions, the same computation is done with the
+    public API of the oracle.
+
+    :return: the indexes of the events and their enabled times.
+    """
+    log_ids = concurrency_oracle.log_ids
+    if _has_checked_enabling_info() and hasattr(concurrency_oracle, "_get_enabling_info_of_trace"):
+        indexes, enabled_times, _ = concurrency_oracle._get_enabling_info_of_trace(trace, log_ids)
+        return indexes, enabled_times
+    if log_ids.start_time in trace:
+        trace_start_time = min(trace[log_ids.start_time].min(), trace[log_ids.end_time].min())
+    else:
+        trace_start_time = trace[log_ids.end_time].min()
+    indexes, enabled_times = [], []
+    for index, event in trace.iterrows():
+        indexes.append(index)
+        enabled_times.append(concurrency_oracle.enabled_since(trace, event))
+    return indexes, [trace_start_time if pd.isna(time) else time for time in enabled_times]
+
+
+@functools.lru_cache(maxsize=None)
+def _has_checked_enabling_info() -> bool:
+    try:
+        version = tuple(int(part) for part in metadata.version("pix-framework").split(".")[:2])
+    except (metadata.PackageNotFoundError, ValueError):
+        return False
+    return version in _ENABLING_INFO_PIX_VERSIONS
+
+
+def _merge_results(futures: list) -> Tuple[list, list]:
+    # Concatenate the results in the order of the shards, so the merge does not depend on which worker finishes first
+    indexes, values = [], []
+    for future in futures:
+        shard_indexes, shard_values = future.result()
+        indexes += shard_indexes
+        values += shard_values
+    return indexes, values
+
+
+def _set_timestamps(log: pd.DataFrame, column: str, results: Tuple[list, list]):
+    # Same as the estimators of pix-framework: the events with no result are left as NaT
+    indexes, timestamps = results
+    log[column] = None
+    log.loc[indexes, column] = timestamps
+    log[column] = pd.to_datetime(log[column], utc=True)
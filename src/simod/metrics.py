@@ -1,5 +1,9 @@
 import datetime
+from collections import Counter
+from statistics import mean
+from typing import List
 
+import numpy as np
 import pandas as pd
 from log_distance_measures.absolute_event_distribution import (
     absolute_event_distribution_distance,
@@ -18,7 +22,9 @@ from log_distance_measures.cycle_time_distribution import (
 from log_distance_measures.n_gram_distribution import n_gram_distribution_distance
 from log_distance_measures.relative_event_distribution import relative_event_distribution_distance
 from pix_framework.io.event_log import EventLogIDs
+from scipy.stats import wasserstein_distance
 
+from simod.cache import hash_parts
 from simod.settings.common_settings import Metric
 
 
@@ -206,3 +212,248 @@ def get_dl(
 ) -> float:
     cfld = control_flow_log_distance(original_log, original_log_ids, simulated_log, simulated_log_ids, True)
     return cfld
+
+
+class ReferenceProfile:
+    """
+    Summary of an original (validation or test) event log precomputed for a set of metrics.
+
+    Each distance measure compares a summary of the original log (e.g., its n-gram frequencies, or the histogram of
+    its timestamps per weekday) with the same summary of the simulated log. As the original log does not change
+    during an optimization process, its side of each measure is computed once when instantiating this class, and
+    each call to :meth:`compute_metric` only computes the simulated side and the distance. The computed distances
+    are the same as the ones returned by :func:`compute_metric`.
+
+    Attributes
+    ----------
+    metrics : List[:class:`~simod.settings.common_settings.Metric`]
+        Metrics for which the original log has been summarized.
+    fingerprint : str
+        Hash of the original log and the metrics, identifying the distances computed with this profile (e.g., to
+        cache them).
+
+    Notes
+    -----
+    - The summaries are computed as in the ``log_distance_measures`` package, without relying on its private helpers.
+    - The profile is independent of the original log, so it can be shipped to the simulation workers instead of it.
+    - For the control-flow log distance (DL), the profile keeps the columns of the original log needed to compute the
+      distance, as the cost of the measure is dominated by the pairwise comparison of the traces.
+    """
+
+    metrics: List[Metric]
+    fingerprint: str
+
+    def __init__(self, original_log: pd.DataFrame, original_log_ids: EventLogIDs, metrics: List[Metric]):
+        self.metrics = list(metrics)
+        self.fingerprint = hash_parts(original_log, original_log_ids, self.metrics)
+        self._log_ids = original_log_ids
+        self._profiles = {metric: self._build_profile(metric, original_log, original_log_ids) for metric in metrics}
+
+    def compute_metric(self, metric: Metric, simulated_log: pd.DataFrame, simulated_log_ids: EventLogIDs) -> float:
+        """
+        Computes the distance between the original event log and a simulated one.
+
+        Parameters
+        ----------
+        metric : :class:`~simod.settings.common_settings.Metric`
+            The metric to compute. It must be one of the metrics the profile was built for.
+        simulated_log : :class:`pandas.DataFrame`
+            Simulated event log.
+        simulated_log_ids : :class:`EventLogIDs`
+            Column names of the simulated event log.
+
+        Returns
+        -------
+        float
+            The computed distance.
+        """
+        if metric not in self._profiles:
+            raise ValueError(f"Reference profile not computed for metric: {metric}")
+        profile = self._profiles[metric]
+
+        if metric is Metric.DL:
+            result = get_dl(profile, self._log_ids, simulated_log, simulated_log_ids)
+        elif metric in [Metric.TWO_GRAM_DISTANCE, Metric.THREE_GRAM_DISTANCE]:
+            n = 2 if metric is Metric.TWO_GRAM_DISTANCE else 3
+            result = _n_gram_histograms_distance(profile, _n_gram_histogram(simulated_log, simulated_log_ids, n))
+        elif metric is Metric.CIRCADIAN_EMD:
+            result = _circadian_windows_distance(profile, _circadian_event_windows(simulated_log, simulated_log_ids))
+        elif metric is Metric.CIRCADIAN_WORKFORCE_EMD:
+            result = _circadian_windows_distance(
+                profile, _circadian_workforce_windows(simulated_log, simulated_log_ids)
+            )
+        elif metric is Metric.ARRIVAL_EMD:
+            simulated_arrivals = _case_starts(simulated_log, simulated_log_ids)
+            result = _hourly_histograms_distance(profile, _hour_floor(simulated_arrivals), [simulated_arrivals])
+        elif metric is Metric.RELATIVE_EMD:
+            result = wasserstein_distance(profile, _relative_hours(simulated_log, simulated_log_ids))
+        elif metric is Metric.ABSOLUTE_EMD:
+            starts, ends = simulated_log[simulated_log_ids.start_time], simulated_log[simulated_log_ids.end_time]
+            result = _hourly_histograms_distance(profile, _hour_floor(starts), [starts, ends])
+        elif metric is Metric.CYCLE_TIME_EMD:
+            result = _cycle_times_distance(profile, _cycle_times(simulated_log, simulated_log_ids))
+        else:
+            raise ValueError(f"Unsupported metric: {metric}")
+
+        return result
+
+    @staticmethod
+    def _build_profile(metric: Metric, original_log: pd.DataFrame, original_log_ids: EventLogIDs):
+        if metric is Metric.DL:
+            columns = [
+                original_log_ids.case,
+                original_log_ids.activity,
+                original_log_ids.start_time,
+                original_log_ids.end_time,
+            ]
+            profile = original_log[columns].copy()
+        elif metric is Metric.TWO_GRAM_DISTANCE:
+            profile = _n_gram_histogram(original_log, original_log_ids, 2)
+        elif metric is Metric.THREE_GRAM_DISTANCE:
+            profile = _n_gram_histogram(original_log, original_log_ids, 3)
+        elif metric is Metric.CIRCADIAN_EMD:
+            profile = _circadian_event_windows(original_log, original_log_ids)
+        elif metric is Metric.CIRCADIAN_WORKFORCE_EMD:
+            profile = _circadian_workforce_windows(original_log, original_log_ids)
+        elif metric is Metric.ARRIVAL_EMD:
+            arrivals = _case_starts(original_log, original_log_ids)
+            profile = _HourlyBins.from_timestamps(_hour_floor(arrivals), [arrivals])
+        elif metric is Metric.RELATIVE_EMD:
+            profile = _relative_hours(original_log, original_log_ids)
+        elif metric is Metric.ABSOLUTE_EMD:
+            starts, ends = original_log[original_log_ids.start_time], original_log[original_log_ids.end_time]
+            profile = _HourlyBins.from_timestamps(_hour_floor(starts), [starts, ends])
+        elif metric is Metric.CYCLE_TIME_EMD:
+            profile = _cycle_times(original_log, original_log_ids)
+        else:
+            raise ValueError(f"Unsupported metric: {metric}")
+
+        return profile
+
+
+class _HourlyBins:
+    """
+    Timestamps discretized to the number of hours since a reference instant (floored to the hour).
+    """
+
+    def __init__(self, origin: pd.Timestamp, bins: np.ndarray):
+        self.origin = origin
+        self.bins = bins
+
+    @staticmethod
+    def from_timestamps(origin: pd.Timestamp, timestamps: List[pd.Series]) -> "_HourlyBins":
+        bins = np.concatenate([(series - origin) // pd.Timedelta(hours=1) for series in timestamps])
+        return _HourlyBins(origin, bins.astype(np.int64))
+
+    def shifted_to(self, origin: pd.Timestamp) -> np.ndarray:
+        return self.bins + (self.origin - origin) // pd.Timedelta(hours=1)
+
+
+def _hour_floor(timestamps: pd.Series) -> pd.Timestamp:
+    return timestamps.min().floor(freq="h")
+
+
+def _hourly_histograms_distance(
+    original: _HourlyBins, simulated_origin: pd.Timestamp, simulated_timestamps: List[pd.Series]
+) -> float:
+    # Both logs are discretized w.r.t. the earliest of their first instants
+    origin = min(original.origin, simulated_origin)
+    simulated = _HourlyBins.from_timestamps(origin, simulated_timestamps)
+    return wasserstein_distance(original.shifted_to(origin), simulated.bins)
+
+
+def _case_starts(event_log: pd.DataFrame, log_ids: EventLogIDs) -> pd.Series:
+    return event_log.groupby(log_ids.case)[log_ids.start_time].min()
+
+
+def _cycle_times(event_log: pd.DataFrame, log_ids: EventLogIDs) -> pd.Series:
+    cases = event_log.groupby(log_ids.case)
+    return cases[log_ids.end_time].max() - cases[log_ids.start_time].min()
+
+
+def _cycle_times_distance(original_cycle_times: pd.Series, simulated_cycle_times: pd.Series) -> float:
+    min_duration = min(original_cycle_times.min(), simulated_cycle_times.min())
+    bin_size = datetime.timedelta(hours=1)
+    return wasserstein_distance(
+        (original_cycle_times - min_duration) // bin_size,
+        (simulated_cycle_times - min_duration) // bin_size,
+    )
+
+
+def _relative_hours(event_log: pd.DataFrame, log_ids: EventLogIDs) -> np.ndarray:
+    # Start and end times relative to the start of their case, discretized to hours
+    case_starts = event_log.groupby(log_ids.case)[log_ids.start_time].transform("min")
+    relative = pd.concat([event_log[log_ids.start_time] - case_starts, event_log[log_ids.end_time] - case_starts])
+    return np.floor(relative.dt.total_seconds().to_numpy() / 3600)
+
+
+def _n_gram_histogram(event_log: pd.DataFrame, log_ids: EventLogIDs, n: int) -> Counter:
+    # N-grams are identified by their activity labels (None marking the start/end of the trace)
+    n_grams = Counter()
+    for _, events in event_log.groupby(log_ids.case):
+        activities = events.sort_values([log_ids.start_time, log_ids.end_time])[log_ids.activity].tolist()
+        trace = [None] * (n - 1) + activities + [None] * (n - 1)
+        n_grams.update(tuple(trace[i : i + n]) for i in range(len(trace) - n + 1))
+    return n_grams
+
+
+def _n_gram_histograms_distance(original_n_grams: Counter, simulated_n_grams: Counter) -> float:
+    keys = set(original_n_grams) | set(simulated_n_grams)
+    distance = sum(abs(original_n_grams[key] - simulated_n_grams[key]) for key in keys)
+    return distance / (sum(original_n_grams.values()) + sum(simulated_n_grams.values()))
+
+
+def _circadian_event_windows(event_log: pd.DataFrame, log_ids: EventLogIDs) -> dict:
+    # Hour of the start and end times of the events, per weekday
+    instants = pd.concat([event_log[log_ids.start_time], event_log[log_ids.end_time]])
+    week_days, hours = instants.dt.day_of_week.to_numpy(), instants.dt.hour.to_numpy()
+    return {week_day: hours[week_days == week_day] for week_day in range(7)}
+
+
+def _circadian_workforce(event_log: pd.DataFrame, log_ids: EventLogIDs) -> pd.DataFrame:
+    # Average number of different resources active (with a start or end time) in each hour of each weekday
+    instants = pd.concat(
+        [
+            event_log[[log_ids.start_time, log_ids.resource]].rename(columns={log_ids.start_time: "instant"}),
+            event_log[[log_ids.end_time, log_ids.resource]].rename(columns={log_ids.end_time: "instant"}),
+        ]
+    ).reset_index(drop=True)
+    instants["weekday"] = instants["instant"].dt.day_of_week
+    instants["hour"] = instants["instant"].dt.hour
+    instants["day-hour"] = instants["instant"].dt.strftime("%Y-%m-%d %H")
+    instants["day"] = instants["instant"].dt.strftime("%Y-%m-%d")
+    # Observed number of Mondays, Tuesdays...
+    num_days = instants[["day", "weekday"]].drop_duplicates().groupby("weekday").size()
+    workforce = (
+        instants.drop_duplicates(subset=["day-hour", log_ids.resource])
+        .groupby(["weekday", "hour"])
+        .size()
+        .reset_index(name="workforce")
+    )
+    workforce["workforce"] = workforce["workforce"] / workforce["weekday"].map(num_days)
+    return workforce
+
+
+def _circadian_workforce_windows(event_log: pd.DataFrame, log_ids: EventLogIDs) -> dict:
+    discretized = _circadian_workforce(event_log, log_ids)
+    windows = {}
+    for week_day in range(7):
+        window = discretized[discretized["weekday"] == week_day]
+        workforce = window.drop("weekday", axis=1).set_index("hour")["workforce"].to_dict()
+        # Observations of each hour, weighted by their average workforce
+        windows[week_day] = [hour for hour in workforce for _ in range(int(workforce[hour] * 100))]
+    return windows
+
+
+def _circadian_windows_distance(original_windows: dict, simulated_windows: dict) -> float:
+    distances = []
+    for week_day in range(7):
+        original_window, simulated_window = original_windows[week_day], simulated_windows[week_day]
+        if len(original_window) > 0 and len(simulated_window) > 0:
+            distances += [wasserstein_distance(original_window, simulated_window)]
+        elif len(original_window) == 0 and len(simulated_window) == 0:
+            distances += [0.0]
+        else:
+            # Only one has observations in this weekday, penalize with max distance value
+            distances += [23.0]
+    return mean(distances)
@@ -0,0 +1,381 @@
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from hyperopt import STATUS_FAIL, STATUS_OK, Domain, Trials
+
+from simod.checkpoint import load_state, save_state
+from simod.cli_formatter import print_message, print_notice, print_subsection, print_warning
+from simod.event_log.event_log import EventLog, get_first_cases
+from simod.metrics import ReferenceProfile
+from simod.simulation.executor import SimulationExecutor
+from simod.simulation.parameters.BPS_model import BPSModel
+from simod.simulation.prosimos import (
+    RacingRule,
+    ReplicationStoppingRule,
+    SimulationBudget,
+    SimulationBudgetExceeded,
+    simulate_and_evaluate,
+)
+from simod.utilities import (
+    get_finite_search_space_points,
+    get_multi_fidelity_levels,
+    get_simulation_parameters_path,
+    hyperopt_minimize,
+    successive_halving,
+)
+
+# Minimum number of validation cases simulated in the lowest fidelity of a multi-fidelity optimization
+_MIN_FIDELITY_CASES = 10
+
+
+class SimulationOptimizer:
+    """
+    Base class of the hyperparameter optimizers evaluating each candidate BPS model by simulating it and comparing the
+    simulated logs with the validation partition (see :class:`~simod.control_flow.optimizer.ControlFlowOptimizer` and
+    :class:`~simod.resource_model.optimizer.ResourceModelOptimizer`).
+
+    It implements the optimization loop (TPE or finite search space, and successive halving if multi-fidelity), the
+    evaluation of the candidates (replications, stopping and racing rules, simulation budget), and the saving and
+    restoring of the progress. The subclasses implement the evaluation of one hyperopt iteration, and record its
+    measurements.
+
+    Attributes
+    ----------
+    event_log : :class:`~simod.event_log.event_log.EventLog`
+        Event log containing train and validation partitions.
+    settings : :class:`~simod.settings.control_flow_settings.ControlFlowSettings` or
+        :class:`~simod.settings.resource_model_settings.ResourceModelSettings`
+        Configuration settings of the optimization process.
+    base_directory : :class:`pathlib.Path`
+        Root directory where output files will be stored.
+    evaluation_measurements : :class:`pandas.DataFrame`
+        Quality measures recorded for each hyperopt iteration.
+    iteration_index : int
+        Index of the next hyperopt iteration.
+    """
+
+    # Event log with train/validation partitions
+    event_log: EventLog
+    # Root directory for the output files
+    base_directory: Path
+    # Quality measure of each hyperopt iteration
+    evaluation_measurements: pd.DataFrame
+    # Index of the next hyperopt iteration
+    iteration_index: int
+
+    # Set of trials for the hyperparameter optimization process
+    _bayes_trials: Trials
+    # Pool of workers to run the simulations
+    _executor: Optional[SimulationExecutor]
+    # Flag indicating if the simulated logs have to be written to disk
+    _keep_simulated_logs: bool
+    # File to save the progress of the optimization (if any)
+    _checkpoint_path: Optional[Path]
+    # Seed of the run (if any)
+    _seed: Optional[int]
+    # Validation log summary to compute the optimization metric
+    _reference_profile: ReferenceProfile
+    # Lock to update the iteration state when running iterations concurrently
+    _lock: threading.Lock
+    # Fidelity (fraction of the validation cases to simulate) of each rung of the multi-fidelity optimization
+    _fidelities: List[float]
+    # Validation logs with the first cases of the validation partition (and their summary) by fidelity
+    _partial_validation_logs: Dict[float, Tuple[pd.DataFrame, ReferenceProfile]]
+
+    def __init__(
+        self,
+        event_log: EventLog,
+        settings,
+        base_directory: Path,
+        executor: Optional[SimulationExecutor] = None,
+        keep_simulated_logs: bool = False,
+        checkpoint_path: Optional[Path] = None,
+        seed: Optional[int] = None,
+    ):
+        self.event_log = event_log
+        self.settings = settings
+        self.base_directory = base_directory
+        self._executor = executor
+        self._keep_simulated_logs = keep_simulated_logs
+        self._checkpoint_path = checkpoint_path
+        self._seed = seed
+        # Summarize the validation log once, as it does not change during the optimization
+        self._reference_profile = ReferenceProfile(
+            self.event_log.validation_partition, self.event_log.log_ids, [self.settings.optimization_metric]
+        )
+        self._fidelities = [1.0]
+        self._partial_validation_logs = {}
+        # Instantiate trials for hyper-optimization process
+        self._bayes_trials = Trials()
+        self.iteration_index = 0
+        self._lock = threading.Lock()
+
+    def _hyperopt_iteration(self, hyperopt_iteration_dict: dict) -> dict:
+        raise NotImplementedError
+
+    def _optimize(self, search_space: dict) -> Tuple[dict, dict]:
+        """
+        Runs the hyperparameter optimization over [search_space] (continuing from the saved progress, if any),
+        returning the best point (in hyperopt format) and the response of its iteration.
+        """
+        self.iteration_index = 0
+        # Fidelity of each rung (only the full evaluation, unless multi-fidelity is enabled)
+        self._fidelities = self._get_fidelities(search_space) if self.settings.multi_fidelity else [1.0]
+        # Continue from the saved progress of an interrupted optimization (if any)
+        self._restore_progress()
+
+        # Launch optimization process (with its own pool of workers if none was provided)
+        checkpoint = self._save_progress if self._checkpoint_path is not None else None
+        own_executor = self._executor is None
+        if own_executor:
+            num_workers = self.settings.num_evaluations_per_iteration * self.settings.max_parallel_trials
+            self._executor = SimulationExecutor(num_workers).start()
+        try:
+            best_hyperopt_params = hyperopt_minimize(
+                fn=self._hyperopt_iteration,
+                space=search_space,
+                max_evals=self.settings.num_iterations,
+                trials=self._bayes_trials,
+                max_parallel_trials=self.settings.max_parallel_trials,
+                checkpoint=checkpoint,
+                seed=self._seed,
+            )
+            # Promote the best iterations to increasing fidelities (if multi-fidelity)
+            halving = None
+            if len(self._fidelities) > 1:
+                halving = successive_halving(
+                    trials=self._bayes_trials,
+                    evaluate=self._promote_candidate,
+                    num_rungs=len(self._fidelities),
+                    max_parallel_trials=self.settings.max_parallel_trials,
+                    checkpoint=checkpoint,
+                )
+        finally:
+            if own_executor:
+                self._executor.shutdown()
+                self._executor = None
+        if halving is not None:
+            return halving
+        # Process best results
+        results = pd.DataFrame(self._bayes_trials.results).sort_values("loss")
+        return best_hyperopt_params, results[results.status == STATUS_OK].iloc[0]
+
+    def _get_fidelities(self, search_space: dict) -> List[float]:
+        """
+        Fidelity of each rung of the multi-fidelity optimization over [search_space]. The rungs depend on the number of
+        candidates actually evaluated (all the points of a finite search space, if fewer than the iterations), and
+        the lowest fidelity simulates at least ``_MIN_FIDELITY_CASES`` validation cases.
+        """
+        num_candidates = self.settings.num_iterations
+        finite_points = get_finite_search_space_points(Domain(self._hyperopt_iteration, search_space))
+        if finite_points is not None and len(finite_points) > 0:
+            num_candidates = min(num_candidates, len(finite_points))
+        num_validation_cases = self.event_log.validation_partition[self.event_log.log_ids.case].nunique()
+        return get_multi_fidelity_levels(num_candidates, min_fidelity=_MIN_FIDELITY_CASES / num_validation_cases)
+
+    def _get_progress(self) -> dict:
+        """
+        State of the optimization to save after each evaluated iteration (besides the trials).
+        """
+        return {
+            "evaluation_measurements": self.evaluation_measurements,
+            "iteration_index": self.iteration_index,
+        }
+
+    def _set_progress(self, progress: dict):
+        """
+        Restores the state of the optimization saved with :meth:`_get_progress`.
+        """
+        self.evaluation_measurements = progress["evaluation_measurements"]
+        self.iteration_index = progress["iteration_index"]
+
+    def _save_progress(self, trials: Trials):
+        with self._lock:
+            save_state(self._checkpoint_path, {"trials": trials} | self._get_progress())
+
+    def _restore_progress(self):
+        progress = load_state(self._checkpoint_path) if self._checkpoint_path is not None else None
+        if progress is not None:
+            print_notice(f"Resuming optimization after {len(progress['trials'].trials)} evaluated iterations")
+            self._bayes_trials = progress["trials"]
+            self._set_progress(progress)
+
+    @staticmethod
+    def _define_response(
+        status: str, evaluation_measurements: list, output_dir: Path, process_model_path: Path
+    ) -> Tuple[str, dict]:
+        # Fail the candidates whose simulation exceeded its budget
+        failure_reason = _get_failure_reason(evaluation_measurements) if status == STATUS_OK else None
+        if failure_reason is not None:
+            status = STATUS_FAIL
+        # Compute mean distance if status is OK
+        if status is STATUS_OK:
+            distance = np.mean([x["distance"] for x in evaluation_measurements])
+            # Change status if distance value is negative
+            if distance < 0.0:
+                status = STATUS_FAIL
+        else:
+            distance = 1.0
+        # Define response dict
+        response = {
+            "loss": distance,  # Loss value for the fmin function
+            "status": status,  # Status of the optimization iteration
+            "output_dir": output_dir,
+            "process_model_path": process_model_path,
+        }
+        # Report the candidates discarded by racing (with the loss of the evaluated replications, for TPE to learn)
+        if status == STATUS_OK and _is_pruned(evaluation_measurements):
+            response["pruned"] = True
+        # Report why the candidate failed (so it can be told apart from the failed discoveries)
+        if failure_reason is not None:
+            response["failure_reason"] = failure_reason
+        # Return updated status and processed response
+        return status, response
+
+    def _simulate_bps_model(self, bps_model: BPSModel, output_dir: Path) -> List[dict]:
+        bps_model.replace_activity_names_with_ids()
+
+        json_parameters_path = bps_model.to_json(output_dir, self.event_log.process_name)
+
+        try:
+            return self._evaluate_bps_model(bps_model.process_model, json_parameters_path, output_dir, rung=0)
+        except SimulationBudgetExceeded as error:
+            # Discard the candidate, reporting the reason in its response (see _define_response)
+            print_warning(f"Discarding the iteration: {error}")
+            return [{"metric": self.settings.optimization_metric, "failure_reason": str(error)}]
+
+    def _evaluate_bps_model(
+        self, process_model_path: Path, parameters_path: Path, output_dir: Path, rung: int
+    ) -> List[dict]:
+        # Simulate the first cases of the validation partition with a single replication in the lower fidelities
+        validation_log, reference_profile = self._get_validation_log(self._fidelities[rung])
+        is_full_fidelity = rung == len(self._fidelities) - 1
+        num_simulations = self.settings.num_evaluations_per_iteration if is_full_fidelity else 1
+        incumbent_loss = self._get_incumbent_loss() if is_full_fidelity else None
+        # Stop replicating once the distance is precise enough, or the candidate cannot improve the best one
+        stopping_rule = None
+        if self.settings.adaptive_replications and is_full_fidelity:
+            stopping_rule = ReplicationStoppingRule(incumbent_loss=incumbent_loss)
+        # Cancel the replications of the candidates that clearly cannot improve the best one (if racing)
+        racing_rule = None
+        if self.settings.racing and incumbent_loss is not None:
+            racing_rule = RacingRule(incumbent_loss=incumbent_loss)
+        # Stop the simulations much larger (or slower) than expected for the validation log (if budgeted)
+        budget = None
+        if self.settings.simulation_budget is not None:
+            budget = SimulationBudget.relative_to(
+                validation_log, self.event_log.log_ids, self.settings.simulation_budget
+            )
+        evaluation_measures = simulate_and_evaluate(
+            process_model_path=process_model_path,
+            parameters_path=parameters_path,
+            output_dir=output_dir,
+            simulation_cases=validation_log[self.event_log.log_ids.case].nunique(),
+            simulation_start_time=validation_log[self.event_log.log_ids.start_time].min(),
+            validation_log=validation_log,
+            validation_log_ids=self.event_log.log_ids,
+            metrics=[self.settings.optimization_metric],
+            num_simulations=num_simulations,
+            executor=self._executor,
+            keep_simulated_logs=self._keep_simulated_logs,
+            reference_profile=reference_profile,
+            stopping_rule=stopping_rule,
+            racing_rule=racing_rule,
+            seed=self._seed,
+            budget=budget,
+        )
+        # Flag the measurements of the candidates discarded before running all their replications
+        if racing_rule is not None and count_replications(evaluation_measures) < num_simulations:
+            distances = [
+                measurement["distance"]
+                for measurement in evaluation_measures
+                if measurement["metric"] == self.settings.optimization_metric
+            ]
+            if racing_rule.is_losing(distances):
+                for measurement in evaluation_measures:
+                    measurement["pruned"] = True
+
+        return evaluation_measures
+
+    def _get_incumbent_loss(self) -> Optional[float]:
+        # Only comparable to the losses of the other candidates if all of them are evaluated with full fidelity
+        if len(self._fidelities) > 1:
+            return None
+        with self._lock:
+            losses = [result["loss"] for result in self._bayes_trials.results if result.get("status") == STATUS_OK]
+        return min(losses) if len(losses) > 0 else None
+
+    def _get_validation_log(self, fidelity: float) -> Tuple[pd.DataFrame, ReferenceProfile]:
+        if fidelity >= 1.0:
+            return self.event_log.validation_partition, self._reference_profile
+        with self._lock:
+            if fidelity not in self._partial_validation_logs:
+                validation_log = get_first_cases(self.event_log.validation_partition, self.event_log.log_ids, fidelity)
+                self._partial_validation_logs[fidelity] = (
+                    validation_log,
+                    ReferenceProfile(validation_log, self.event_log.log_ids, [self.settings.optimization_metric]),
+                )
+            return self._partial_validation_logs[fidelity]
+
+    def _promote_candidate(self, result: dict, rung: int) -> Optional[float]:
+        print_subsection(f"Evaluating {result['output_dir']} with fidelity {self._fidelities[rung]:.2f}")
+        try:
+            evaluation_measures = self._evaluate_bps_model(
+                result["process_model_path"],
+                get_simulation_parameters_path(result["output_dir"], self.event_log.process_name),
+                result["output_dir"],
+                rung=rung,
+            )
+        except Exception as error:
+            print_message(f"Evaluation failed: {error}")
+            return None
+        # Record the measurements of the new fidelity next to the ones of the candidate
+        with self._lock:
+            candidate_measurements = self.evaluation_measurements[
+                self.evaluation_measurements["output_dir"].astype(str) == str(result["output_dir"])
+            ].iloc[[0]]
+            for measurement in evaluation_measures:
+                self.evaluation_measurements = pd.concat(
+                    [
+                        self.evaluation_measurements,
+                        candidate_measurements.assign(
+                            distance=measurement["distance"],
+                            metric=measurement["metric"],
+                            fidelity=self._fidelities[rung],
+                            num_replications=count_replications(evaluation_measures),
+                        ),
+                    ]
+                )
+        return float(np.mean([measurement["distance"] for measurement in evaluation_measures]))
+
+    @staticmethod
+    def _get_measurement_status(status: str, evaluation_measurements: Optional[list]) -> str:
+        """
+        Status of an iteration to record in its measurements, telling apart the candidates discarded by racing
+        (``pruned``) and the ones whose simulation exceeded its budget (``over_budget``).
+        """
+        if status == STATUS_OK and _is_pruned(evaluation_measurements):
+            return "pruned"
+        if _get_failure_reason(evaluation_measurements) is not None:
+            return "over_budget"
+        return status
+
+
+def count_replications(evaluation_measurements: list) -> int:
+    """
+    Number of different replications (simulation runs) with measurements in [evaluation_measurements].
+    """
+    return len({measurement["run_num"] for measurement in evaluation_measurements})
+
+
+def _is_pruned(evaluation_measurements: list) -> bool:
+    return any(measurement.get("pruned", False) for measurement in evaluation_measurements)
+
+
+def _get_failure_reason(evaluation_measurements: Optional[list]) -> Optional[str]:
+    if evaluation_measurements is None:
+        return None
+    return next((m["failure_reason"] for m in evaluation_measurements if "failure_reason" in m), None)
@@ -15,10 +15,15 @@ def discover_prioritization_rules(
     """
     case_attribute_names = list(map(lambda x: x.name, case_attributes))
 
+    # Only the columns used by the discovery (the whole log is loaded into a SQL database)
+    columns = [log_ids.enabled_time, log_ids.start_time, log_ids.resource]
+    columns += [name for name in case_attribute_names if name not in columns]
+
     rules = discover_priority_rules(
-        event_log=log.rename(  # Rename columns for hardcoded discovery package
+        event_log=log[columns].rename(  # Rename columns for hardcoded discovery package
             {log_ids.enabled_time: "enabled_time", log_ids.start_time: "start_time", log_ids.resource: "Resource"},
             axis=1,
+            copy=False,
         ),
         attributes=case_attribute_names,
     )
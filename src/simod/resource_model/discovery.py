@@ -0,0 +1,56 @@
+from typing import List, Optional
+
+import pandas as pd
+from pix_framework.discovery.resource_calendar_and_performance.calendar_discovery_parameters import (
+    CalendarDiscoveryParameters,
+)
+from pix_framework.discovery.resource_model import ResourceModel
+from pix_framework.discovery.resource_model import discover_resource_model as pix_discover_resource_model
+from pix_framework.discovery.resource_profiles import ResourceProfile
+from pix_framework.io.event_log import EventLogIDs
+
+from simod.cache import get_artifact_cache
+from simod.cli_formatter import print_step
+
+
+def discover_resource_model(
+    event_log: pd.DataFrame,
+    log_ids: EventLogIDs,
+    params: CalendarDiscoveryParameters,
+    provided_profiles: Optional[List[ResourceProfile]] = None,
+) -> ResourceModel:
+    """
+    Discovers the resource model (resource profiles, calendars, and activity performance) of an event log.
+
+    Same as :func:`pix_framework.discovery.resource_model.discover_resource_model`, but reusing the resource model
+    stored in the artifact cache (if enabled, see :mod:`simod.cache`) when it was already discovered from the same
+    event log with the same parameters.
+
+    Parameters
+    ----------
+    event_log : :class:`pandas.DataFrame`
+        Event log to discover the resource model from.
+    log_ids : :class:`EventLogIDs`
+        Identifiers for mapping column names in the event log.
+    params : :class:`CalendarDiscoveryParameters`
+        Parameters for the discovery of the resource calendars.
+    provided_profiles : List[:class:`ResourceProfile`], optional
+        Resource profiles to use instead of discovering them (only their calendars and performance are discovered).
+
+    Returns
+    -------
+    :class:`ResourceModel`
+        The discovered resource model.
+    """
+    cache = get_artifact_cache()
+    if cache is None:
+        return pix_discover_resource_model(event_log, log_ids, params, provided_profiles)
+
+    key = cache.key(event_log, log_ids, params, provided_profiles)
+    resource_model = cache.get_object("resource_model", key)
+    if resource_model is not None:
+        print_step("Reusing cached resource model")
+    else:
+        resource_model = pix_discover_resource_model(event_log, log_ids, params, provided_profiles)
+        cache.put_object("resource_model", key, resource_model)
+    return resource_model
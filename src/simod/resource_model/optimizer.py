@@ -2,32 +2,33 @@ import copy
 import json
 import shutil
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Optional
 
 import hyperopt
-import numpy as np
 import pandas as pd
-from hyperopt import STATUS_FAIL, STATUS_OK, Trials, fmin, hp, tpe
+from hyperopt import STATUS_OK, hp
 from pix_framework.discovery.resource_calendar_and_performance.calendar_discovery_parameters import (
     CalendarDiscoveryParameters,
 )
-from pix_framework.discovery.resource_model import ResourceModel, discover_resource_model
+from pix_framework.discovery.resource_model import ResourceModel
 from pix_framework.discovery.resource_profiles import discover_pool_resource_profiles
 from pix_framework.filesystem.file_manager import create_folder, get_random_folder_id, remove_asset
 
+from .discovery import discover_resource_model
 from .repair import repair_with_missing_activities
 from .settings import HyperoptIterationParams
 from ..batching.discovery import discover_batching_rules
 from ..cli_formatter import print_message, print_step, print_subsection
 from ..event_log.event_log import EventLog
+from ..optimization import SimulationOptimizer, count_replications
 from ..prioritization.discovery import discover_prioritization_rules
 from ..settings.resource_model_settings import CalendarType, ResourceModelSettings
 from ..simulation.parameters.BPS_model import BPSModel
-from ..simulation.prosimos import simulate_and_evaluate
+from ..simulation.executor import SimulationExecutor
 from ..utilities import get_process_model_path, get_simulation_parameters_path, hyperopt_step
 
 
-class ResourceModelOptimizer:
+class ResourceModelOptimizer(SimulationOptimizer):
     """
     Optimizes the resource model of a business process model using hyperparameter optimization.
 
@@ -53,10 +54,32 @@ class ResourceModelOptimizer:
         Best discovered BPS model after the optimization process.
     evaluation_measurements : :class:`pandas.DataFrame`
         Quality measures recorded for each hyperopt iteration.
+    executor : :class:`~simod.simulation.executor.SimulationExecutor`, optional
+        Pool of workers to run the simulations of all iterations. If not provided, a pool is created at the start of
+        the optimization process and shut down at the end.
+    keep_simulated_logs : bool
+        Whether to write the simulated logs of each iteration to its output directory as CSV files. If false
+        (default), the simulated logs are evaluated in memory and discarded.
+    checkpoint_path : :class:`pathlib.Path`, optional
+        File to save the progress of the optimization (hyperopt trials and measurements) after each iteration. If it
+        exists when the optimization starts, the optimization continues from the saved progress.
+    seed : int, optional
+        Seed of the run. If provided, the replication k of every iteration is simulated with the same random numbers
+        (common random numbers), so the differences between iterations are not due to the simulation noise, and the
+        TPE suggestions are reproducible.
 
     Notes
     -----
     - Optimization is performed using TPE-hyperparameter optimization.
+    - Up to `settings.max_parallel_trials` iterations are evaluated concurrently, suggesting them with a constant liar.
+    - If the search space is finite (only fixed values and choices), each of its points is evaluated once instead.
+    - If `settings.multi_fidelity` is enabled, the iterations are evaluated with a fraction of the validation cases and
+      a single replication, and the best ones are then promoted to increasing fidelities (successive halving).
+    - If `settings.racing` is enabled, the replications of an iteration are cancelled as soon as it clearly cannot
+      improve the best one so far. Its loss (of the evaluated replications) is still reported to hyperopt, flagged as
+      ``pruned``.
+    - If `settings.simulation_budget` is set, the simulations exceeding it (relative to the size and time horizon of
+      the validation log) are stopped, and their iteration fails with its ``failure_reason`` in the response.
     """
 
     # Event log with train/validation partitions
@@ -72,9 +95,6 @@ class ResourceModelOptimizer:
     # Quality measure of each hyperopt iteration
     evaluation_measurements: pd.DataFrame
 
-    # Set of trials for the hyperparameter optimization process
-    _bayes_trials = Trials
-
     def __init__(
         self,
         event_log: EventLog,
@@ -82,12 +102,14 @@ class ResourceModelOptimizer:
         settings: ResourceModelSettings,
         base_directory: Path,
         model_activities: Optional[list[str]] = None,
+        executor: Optional[SimulationExecutor] = None,
+        keep_simulated_logs: bool = False,
+        checkpoint_path: Optional[Path] = None,
+        seed: Optional[int] = None,
     ):
         # Save event log, optimization settings, and output directory
-        self.event_log = event_log
+        super().__init__(event_log, settings, base_directory, executor, keep_simulated_logs, checkpoint_path, seed)
         self.initial_bps_model = bps_model.deep_copy()
-        self.settings = settings
-        self.base_directory = base_directory
         self.model_activities = model_activities
         # Initialize table to store quality measures of each iteration
         self.evaluation_measurements = pd.DataFrame(
@@ -95,6 +117,7 @@ class ResourceModelOptimizer:
                 "distance",
                 "metric",
                 "status",
+                "num_replications",
                 "discovery_type",
                 "granularity",
                 "confidence",
@@ -103,9 +126,6 @@ class ResourceModelOptimizer:
                 "output_dir",
             ]
         )
-        # Instantiate trials for hyper-optimization process
-        self._bayes_trials = Trials()
-        self.iteration_index = 0
         # Discover resource pools (performance purposes) if needed
         if self.settings.discovery_type is CalendarType.DIFFERENTIATED_BY_POOL:
             self._resource_pools = discover_pool_resource_profiles(
@@ -134,8 +154,11 @@ class ResourceModelOptimizer:
             self._batching_rules = None
 
     def _hyperopt_iteration(self, hyperopt_iteration_dict: dict):
-        # Report new iteration
-        print_subsection(f"Resource Model optimization iteration {self.iteration_index}")
+        # Report new iteration (and reserve its index, as iterations may run concurrently)
+        with self._lock:
+            iteration_index = self.iteration_index
+            self.iteration_index += 1
+        print_subsection(f"Resource Model optimization iteration {iteration_index}")
 
         # Initialize status
         status = STATUS_OK
@@ -191,9 +214,9 @@ class ResourceModelOptimizer:
         )
         print(f"Resource Model optimization iteration response: {response}")
 
-        # Save the quality of this evaluation and increase iteration index
-        self._process_measurements(hyperopt_iteration_params, status, evaluation_measurements)
-        self.iteration_index += 1
+        # Save the quality of this evaluation
+        with self._lock:
+            self._process_measurements(hyperopt_iteration_params, status, evaluation_measurements)
 
         return response
 
@@ -212,24 +235,11 @@ class ResourceModelOptimizer:
             The parameters of the best iteration of the optimization process.
         """
         # Define search space
-        self.iteration_index = 0
         search_space = self._define_search_space(settings=self.settings)
-
         # Launch optimization process
-        params_best_iteration = fmin(
-            fn=self._hyperopt_iteration,
-            space=search_space,
-            algo=tpe.suggest,
-            max_evals=self.settings.num_iterations,
-            trials=self._bayes_trials,
-            show_progressbar=False,
-        )
+        params_best_iteration, best_result = self._optimize(search_space)
         params_best_iteration = hyperopt.space_eval(search_space, params_best_iteration)
 
-        # Process best results
-        results = pd.DataFrame(self._bayes_trials.results).sort_values("loss")
-        best_result = results[results.status == STATUS_OK].iloc[0]
-
         # Re-build parameters of the best hyperopt iteration
         best_hyperopt_parameters = HyperoptIterationParams.from_hyperopt_dict(
             hyperopt_dict=params_best_iteration,
@@ -338,8 +348,11 @@ class ResourceModelOptimizer:
             "participation": params.calendar_discovery_params.participation,
             "discover_prioritization_rules": params.discover_prioritization_rules,
             "discover_batching_rules": params.discover_batching_rules,
-            "status": status,
+            "status": self._get_measurement_status(status, evaluation_measurements),
+            "num_replications": count_replications(evaluation_measurements) if status == STATUS_OK else 0,
         }
+        if self.settings.multi_fidelity:
+            data["fidelity"] = self._fidelities[0]
         if status == STATUS_OK:
             for measurement in evaluation_measurements:
                 values = {
@@ -355,44 +368,3 @@ class ResourceModelOptimizer:
             }
             values = values | data
             self.evaluation_measurements = pd.concat([self.evaluation_measurements, pd.DataFrame([values])])
-
-    @staticmethod
-    def _define_response(
-        status: str, evaluation_measurements: list, output_dir: Path, process_model_path: Path
-    ) -> Tuple[str, dict]:
-        # Compute mean distance if status is OK
-        if status is STATUS_OK:
-            distance = np.mean([x["distance"] for x in evaluation_measurements])
-            # Change status if distance value is negative
-            if distance < 0.0:
-                status = STATUS_FAIL
-        else:
-            distance = 1.0
-        # Define response dict
-        response = {
-            "loss": distance,  # Loss value for the fmin function
-            "status": status,  # Status of the optimization iteration
-            "output_dir": output_dir,
-            "process_model_path": process_model_path,
-        }
-        # Return updated status and processed response
-        return status, response
-
-    def _simulate_bps_model(self, bps_model: BPSModel, output_dir: Path) -> List[dict]:
-        bps_model.replace_activity_names_with_ids()
-
-        json_parameters_path = bps_model.to_json(output_dir, self.event_log.process_name)
-
-        evaluation_measures = simulate_and_evaluate(
-            process_model_path=bps_model.process_model,
-            parameters_path=json_parameters_path,
-            output_dir=output_dir,
-            simulation_cases=self.event_log.validation_partition[self.event_log.log_ids.case].nunique(),
-            simulation_start_time=self.event_log.validation_partition[self.event_log.log_ids.start_time].min(),
-            validation_log=self.event_log.validation_partition,
-            validation_log_ids=self.event_log.log_ids,
-            metrics=[self.settings.optimization_metric],
-            num_simulations=self.settings.num_evaluations_per_iteration,
-        )
-
-        return evaluation_measures
@@ -156,6 +156,23 @@ class CommonSettings(BaseModel):
             Boolean indicating whether to delete all intermediate created files.
         discover_data_attributes : bool
             Boolean indicating whether to discover data attributes and their creation/update rules.
+        num_workers : int, optional
+            Number of worker processes in the pool shared by all the simulations of the pipeline. If not provided, the
+            number of CPUs in the machine.
+        use_java_gateway : bool
+            Whether to run the Java tools (Split Miner, BPMN layout) in long-lived JVMs instead of launching a new
+            Java process for each execution (falling back to new processes if the JVM cannot be used). One JVM is
+            kept for each concurrent execution (e.g., of the parallel trials of the optimizers).
+        cache_dir : :class:`~pathlib.Path`, optional
+            Directory of the artifact cache shared across runs (preprocessed logs, discovered process and resource
+            models, simulated logs). If not provided, the cache is disabled.
+        cache_max_size_gb : float
+            Maximum size (in GB) of the artifact cache. The least recently used artifacts are removed when exceeded.
+        seed : int, optional
+            Seed of the run. The replication k of every simulated model uses the random numbers derived from it
+            (common random numbers), and the hyperparameter optimizations are seeded with it, making the runs
+            reproducible. If not provided, a random seed is drawn at the start of the run (and reused if the run is
+            resumed), and written to the configuration exported with the results.
 
     """
     # Log & Model parameters
@@ -171,6 +188,11 @@ class CommonSettings(BaseModel):
     use_observed_arrival_distribution: bool = False
     clean_intermediate_files: bool = True
     discover_data_attributes: bool = False
+    num_workers: Optional[int] = None
+    use_java_gateway: bool = False
+    cache_dir: Optional[Path] = None
+    cache_max_size_gb: float = 10.0
+    seed: Optional[int] = None
 
     @staticmethod
     def from_dict(config: dict, config_dir: Optional[Path] = None) -> "CommonSettings":
@@ -257,6 +279,18 @@ class CommonSettings(BaseModel):
         use_observed_arrival_distribution = config.get("use_observed_arrival_distribution", False)
         clean_up = config.get("clean_intermediate_files", True)
         discover_data_attributes = config.get("discover_data_attributes", False)
+        num_workers = config.get("num_workers", None)
+        use_java_gateway = config.get("use_java_gateway", False)
+
+        # Artifact cache directory
+        if config.get("cache_dir") is not None:
+            cache_dir = Path(config["cache_dir"])
+            if not cache_dir.is_absolute():
+                cache_dir = base_files_dir / cache_dir
+        else:
+            cache_dir = None
+        cache_max_size_gb = config.get("cache_max_size_gb", 10.0)
+        seed = config.get("seed", None)
 
         return CommonSettings(
             train_log_path=train_log_path,
@@ -269,6 +303,11 @@ class CommonSettings(BaseModel):
             use_observed_arrival_distribution=use_observed_arrival_distribution,
             clean_intermediate_files=clean_up,
             discover_data_attributes=discover_data_attributes,
+            num_workers=num_workers,
+            use_java_gateway=use_java_gateway,
+            cache_dir=cache_dir,
+            cache_max_size_gb=cache_max_size_gb,
+            seed=seed,
         )
 
     def to_dict(self) -> dict:
@@ -290,4 +329,9 @@ class CommonSettings(BaseModel):
             "use_observed_arrival_distribution": self.use_observed_arrival_distribution,
             "clean_intermediate_files": self.clean_intermediate_files,
             "discover_data_attributes": self.discover_data_attributes,
+            "num_workers": self.num_workers,
+            "use_java_gateway": self.use_java_gateway,
+            "cache_dir": str(self.cache_dir) if self.cache_dir is not None else None,
+            "cache_max_size_gb": self.cache_max_size_gb,
+            "seed": self.seed,
         }
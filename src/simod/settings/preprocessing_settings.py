@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pix_framework.enhancement.start_time_estimator.config import ConcurrencyThresholds
 from pydantic import BaseModel
 
@@ -21,11 +23,35 @@ class PreprocessingSettings(BaseModel):
     concurrency_thresholds : :class:`ConcurrencyThresholds`
         Thresholds for the computation of the start times (if missing) based on the Heuristics miner algorithm,
         including direct-follows (df), length-2-loops (l2l), and length-1-loops (l1l).
+    compact_log : bool
+        Whether to store the event log in a compact (dictionary-encoded) representation, with the case IDs, activity
+        labels, and resources as integer codes, to reduce memory usage on large logs.
+    num_workers : int
+        Number of worker processes to estimate the missing start times and the enabled times. With more than one, the
+        event log is sharded by resource and by case, producing the same result as with a single process.
+    chunk_size : int, optional
+        If provided, read and pre-process the event log in chunks of (approx.) this number of events, each of them
+        with complete cases, spilling the pre-processed chunks to disk (requires ``pyarrow``). It reduces the memory
+        used to load event logs that do not fit in memory with their intermediate copies. The start and enabled times
+        are estimated with the information of each chunk (e.g., the concurrency relations are discovered from its
+        cases), so they may slightly differ from those estimated with the whole log.
+    sample_max_cases : int, optional
+        If provided, the optimization phases (control-flow and resource model) discover and evaluate their candidates
+        on a sample of at most this number of cases of the training and validation partitions, stratified by trace
+        variant and arrival period. The final BPS model is discovered and evaluated with the full event log.
+    sample_fraction : float, optional
+        If provided, fraction (between 0 and 1) of the cases of the training and validation partitions to sample for
+        the optimization phases (see [sample_max_cases]).
     """
 
     multitasking: bool = False
     enable_time_concurrency_threshold: float = 0.5
     concurrency_thresholds: ConcurrencyThresholds = ConcurrencyThresholds(df=0.75, l2l=0.9, l1l=0.9)
+    compact_log: bool = False
+    num_workers: int = 1
+    chunk_size: Optional[int] = None
+    sample_max_cases: Optional[int] = None
+    sample_fraction: Optional[float] = None
 
     @staticmethod
     def from_dict(config: dict) -> "PreprocessingSettings":
@@ -50,6 +76,11 @@ class PreprocessingSettings(BaseModel):
                 l2l=config.get("concurrency_l2l", 0.9),
                 l1l=config.get("concurrency_l1l", 0.9),
             ),
+            compact_log=config.get("compact_log", False),
+            num_workers=config.get("num_workers", 1),
+            chunk_size=config.get("chunk_size", None),
+            sample_max_cases=config.get("sample_max_cases", None),
+            sample_fraction=config.get("sample_fraction", None),
         )
 
     def to_dict(self) -> dict:
@@ -67,4 +98,9 @@ class PreprocessingSettings(BaseModel):
             "concurrency_df": self.concurrency_thresholds.df,
             "concurrency_l2l": self.concurrency_thresholds.l2l,
             "concurrency_l1l": self.concurrency_thresholds.l1l,
+            "compact_log": self.compact_log,
+            "num_workers": self.num_workers,
+            "chunk_size": self.chunk_size,
+            "sample_max_cases": self.sample_max_cases,
+            "sample_fraction": self.sample_fraction,
         }
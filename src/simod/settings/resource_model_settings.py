@@ -24,6 +24,27 @@ class ResourceModelSettings(BaseModel):
         The number of optimization iterations to perform.
     num_evaluations_per_iteration : int
         The number of replications for the evaluations of each iteration.
+    max_parallel_trials : int
+        The maximum number of iterations (candidate configurations) to evaluate concurrently. If greater than 1,
+        the candidates are suggested in batches using a constant-liar strategy.
+    multi_fidelity : bool
+        Whether to evaluate the candidates with increasing fidelity (successive halving). All the candidates are
+        first evaluated simulating a fraction of the (first) validation cases with a single replication, and only the
+        best third of them is promoted to each next level (three times more cases), up to the full evaluation (all the
+        validation cases and [num_evaluations_per_iteration] replications). The number of levels depends on the number
+        of candidates (at most the number of points of a finite search space), and the lowest level simulates at
+        least 10 cases.
+    adaptive_replications : bool
+        Whether to adapt the number of replications of each evaluation, running them in batches until the confidence
+        interval of the mean distance is narrow enough, or shows the candidate cannot improve the best one so far
+        (with [num_evaluations_per_iteration] as the maximum number of replications).
+    racing : bool
+        Whether to discard the candidates that clearly cannot improve the best one so far, cancelling their outstanding
+        replications as soon as their distance (optimistically) exceeds the best loss by more than 10%.
+    simulation_budget : float, optional
+        If provided, maximum size of each simulation as a multiple of the validation log. The simulations producing more
+        events, or spanning a longer period, than [simulation_budget] times the validation log, or running for longer
+        than expected to simulate so many events, are stopped, and their iteration is discarded (failed).
     discovery_type : :class:`CalendarType`
         Type of calendar discovery method used for resource modeling.
     granularity : Union[int, Tuple[int, int]], optional
@@ -51,6 +72,11 @@ class ResourceModelSettings(BaseModel):
     optimization_metric: Metric = Metric.CIRCADIAN_EMD
     num_iterations: int = 10  # number of iterations for the optimization process
     num_evaluations_per_iteration: int = 3
+    max_parallel_trials: int = 1
+    multi_fidelity: bool = False
+    adaptive_replications: bool = False
+    racing: bool = False
+    simulation_budget: Optional[float] = None
     discovery_type: CalendarType = CalendarType.UNDIFFERENTIATED
     granularity: Optional[Union[int, Tuple[int, int]]] = (15, 60)  # minutes per granule
     confidence: Optional[Union[float, Tuple[float, float]]] = (0.5, 0.85)  # from 0 to 1.0
@@ -103,6 +129,11 @@ class ResourceModelSettings(BaseModel):
         optimization_metric = Metric.from_str(config.get("optimization_metric", "circadian_emd"))
         num_iterations = config.get("num_iterations", 10)
         num_evaluations_per_iteration = config.get("num_evaluations_per_iteration", 3)
+        max_parallel_trials = config.get("max_parallel_trials", 1)
+        multi_fidelity = config.get("multi_fidelity", False)
+        adaptive_replications = config.get("adaptive_replications", False)
+        racing = config.get("racing", False)
+        simulation_budget = config.get("simulation_budget", None)
         discover_prioritization_rules = config.get("discover_prioritization_rules", False)
         discover_batching_rules = config.get("discover_batching_rules", False)
 
@@ -128,6 +159,11 @@ class ResourceModelSettings(BaseModel):
             optimization_metric=optimization_metric,
             num_iterations=num_iterations,
             num_evaluations_per_iteration=num_evaluations_per_iteration,
+            max_parallel_trials=max_parallel_trials,
+            multi_fidelity=multi_fidelity,
+            adaptive_replications=adaptive_replications,
+            racing=racing,
+            simulation_budget=simulation_budget,
             discovery_type=discovery_type,
             granularity=granularity,
             confidence=confidence,
@@ -152,6 +188,11 @@ class ResourceModelSettings(BaseModel):
             "optimization_metric": self.optimization_metric.value,
             "num_iterations": self.num_iterations,
             "num_evaluations_per_iteration": self.num_evaluations_per_iteration,
+            "max_parallel_trials": self.max_parallel_trials,
+            "multi_fidelity": self.multi_fidelity,
+            "adaptive_replications": self.adaptive_replications,
+            "racing": self.racing,
+            "simulation_budget": self.simulation_budget,
             "discovery_type": self.discovery_type.value,
             "discover_prioritization_rules": self.discover_prioritization_rules,
             "discover_batching_rules": self.discover_batching_rules,
@@ -1,4 +1,5 @@
 import json
+import random
 import shutil
 from pathlib import Path
 from typing import List, Optional
@@ -9,15 +10,17 @@ from pix_framework.discovery.gateway_probabilities import compute_gateway_probab
 from pix_framework.discovery.resource_calendar_and_performance.calendar_discovery_parameters import (
     CalendarDiscoveryParameters,
 )
-from pix_framework.discovery.resource_model import discover_resource_model
 from pix_framework.filesystem.file_manager import create_folder, get_random_folder_id, remove_asset
 from pix_framework.io.bpm_graph import BPMNGraph
 from pix_framework.io.bpmn import get_activities_names_from_bpmn
 
 from simod.batching.discovery import discover_batching_rules
+from simod.cache import enable_artifact_cache, get_artifact_cache, hash_parts
+from simod.checkpoint import PipelineCheckpoint
 from simod.branch_rules.discovery import discover_branch_rules, map_branch_rules_to_flows
-from simod.cli_formatter import print_section, print_subsection
+from simod.cli_formatter import print_notice, print_section, print_subsection
 from simod.control_flow.discovery import discover_process_model, add_bpmn_diagram_to_model
+from simod.control_flow.java_gateway import start_java_gateway, stop_java_gateway
 from simod.control_flow.optimizer import ControlFlowOptimizer
 from simod.control_flow.settings import HyperoptIterationParams as ControlFlowHyperoptIterationParams
 from simod.data_attributes.discovery import discover_data_attributes
@@ -26,12 +29,14 @@ from simod.extraneous_delays.optimizer import ExtraneousDelaysOptimizer
 from simod.extraneous_delays.types import ExtraneousDelay
 from simod.extraneous_delays.utilities import add_timers_to_bpmn_model
 from simod.prioritization.discovery import discover_prioritization_rules
+from simod.resource_model.discovery import discover_resource_model
 from simod.resource_model.optimizer import ResourceModelOptimizer
 from simod.resource_model.repair import repair_with_missing_activities
 from simod.resource_model.settings import HyperoptIterationParams as ResourceModelHyperoptIterationParams
 from simod.runtime_meter import RuntimeMeter
 from simod.settings.control_flow_settings import ProcessModelDiscoveryAlgorithm
 from simod.settings.simod_settings import SimodSettings
+from simod.simulation.executor import SimulationExecutor
 from simod.simulation.parameters.BPS_model import BPSModel
 from simod.simulation.prosimos import simulate_and_evaluate
 from simod.utilities import get_process_model_path, get_simulation_parameters_path
@@ -51,10 +56,15 @@ class Simod:
             Path to the folder where to write all the SIMOD outputs.
         final_bps_model : :class:`~simod.simulation.parameters.BPS_model.BPSModel`
             Instance of the best BPS model discovered by SIMOD.
+        resume : bool
+            Whether to resume a previous run in [output_dir] (see :meth:`run`) instead of starting from scratch. The
+            previous run must have the same configuration and event log, otherwise a ``ValueError`` is raised.
     """
 
     # Event log with the train, validation and test logs.
     _event_log: EventLog
+    # Event log used by the optimization phases (a sample of the train and validation logs, if enabled)
+    _optimization_event_log: EventLog
     # Settings for all SIMOD optimization and discovery processes
     _settings: SimodSettings
     # Best BPS model obtained from the discovery processes
@@ -70,15 +80,26 @@ class Simod:
     _resource_model_optimizer: Optional[ResourceModelOptimizer]
     # Optimizer for the Extraneous Delay Timers
     _extraneous_delays_optimizer: Optional[ExtraneousDelaysOptimizer]
+    # Pool of workers shared by all the simulations of the pipeline
+    _executor: Optional[SimulationExecutor]
+    # Results of the completed stages, to resume the run if interrupted
+    _checkpoint: PipelineCheckpoint
+    # Seed of the run (the configured one, or drawn once and kept when resuming)
+    _seed: int
 
     def __init__(
         self,
         settings: SimodSettings,
         event_log: EventLog,
         output_dir: Optional[Path] = None,
+        resume: bool = False,
     ):
         self._settings = settings
         self._event_log = event_log
+        self._executor = None
+        self._control_flow_optimizer = None
+        self._resource_model_optimizer = None
+        self._extraneous_delays_optimizer = None
         self._best_bps_model = BPSModel(process_model=self._settings.common.process_model_path)
         if output_dir is None:
             self._output_dir = Path(__file__).parent.parent.parent / "outputs" / get_random_folder_id()
@@ -94,6 +115,31 @@ class Simod:
             create_folder(self._extraneous_delays_dir)
         self._best_result_dir = self._output_dir / "best_result"
         create_folder(self._best_result_dir)
+        self._checkpoint = PipelineCheckpoint(self._output_dir / "checkpoint")
+        # Identifies the configuration and event log of the run, so only a run with the same ones is resumed
+        fingerprint = hash_parts(self._settings, event_log.train_validation_partition, event_log.test_partition)
+        if not resume:
+            self._checkpoint.clear()
+        elif not self._checkpoint.matches(fingerprint):
+            raise ValueError(
+                f"Cannot resume the run in {self._output_dir}: its checkpoint was created with a different "
+                "configuration or event log."
+            )
+        # Seed of the run: the configured one, or else the one drawn by the run to resume (or a new one)
+        self._seed = self._settings.common.seed
+        if self._seed is None:
+            self._seed = self._checkpoint.load_seed()
+        if self._seed is None:
+            self._seed = random.randrange(2**31)
+        self._checkpoint.save_settings(self._settings, seed=self._seed, fingerprint=fingerprint)
+        if settings.preprocessing.sample_max_cases is not None or settings.preprocessing.sample_fraction is not None:
+            self._optimization_event_log = event_log.sample(
+                max_cases=settings.preprocessing.sample_max_cases,
+                fraction=settings.preprocessing.sample_fraction,
+                seed=self._seed,
+            )
+        else:
+            self._optimization_event_log = event_log
 
     def run(self, runtimes: Optional[RuntimeMeter] = None):
         """
@@ -117,10 +163,28 @@ class Simod:
         - This method generates all output files under the folder ``[output_dir]/<latest_run>/best_result/``.
         - This method updates internal attributes of the class, such as `final_bps_model`, with the best BPS model found
           during the pipeline execution.
+        - The results of each stage are stored in ``[output_dir]/checkpoint/`` once completed, and the hyperparameter
+          optimizations save their progress after each iteration. When resuming, the completed stages are skipped, and
+          an interrupted optimization continues from its last evaluated iteration.
         """
 
         # Runtime object
         runtimes = RuntimeMeter() if runtimes is None else runtimes
+        # Pool of workers shared by all the simulations of the pipeline
+        self._executor = SimulationExecutor(self._settings.common.num_workers).start()
+        # Artifact cache shared across runs (if enabled)
+        if self._settings.common.cache_dir is not None:
+            enable_artifact_cache(self._settings.common.cache_dir, int(self._settings.common.cache_max_size_gb * 1e9))
+        # Long-lived JVM for the Java tools (if enabled)
+        if self._settings.common.use_java_gateway:
+            start_java_gateway()
+        try:
+            self._run(runtimes)
+        finally:
+            self._executor.shutdown()
+            stop_java_gateway()
+
+    def _run(self, runtimes: RuntimeMeter):
         runtimes.start(RuntimeMeter.TOTAL)
 
         # Model activities might be different from event log activities if the model has been provided,
@@ -132,6 +196,114 @@ class Simod:
 
         # --- Discover Default Case Arrival and Resource Allocation models --- #
         print_section("Discovering initial BPS Model")
+        if self._restore_stage(RuntimeMeter.INITIAL_MODEL, runtimes) is None:
+            self._discover_initial_bps_model(model_activities, runtimes)
+
+        # --- Control-Flow Optimization --- #
+        print_section("Optimizing control-flow parameters")
+        checkpoint = self._restore_stage(RuntimeMeter.CONTROL_FLOW_MODEL, runtimes)
+        if checkpoint is not None:
+            best_control_flow_params = checkpoint["best_params"]
+        else:
+            runtimes.start(RuntimeMeter.CONTROL_FLOW_MODEL)
+            best_control_flow_params = self._optimize_control_flow()
+            self._best_bps_model.process_model = self._control_flow_optimizer.best_bps_model.process_model
+            self._best_bps_model.gateway_probabilities = (
+                self._control_flow_optimizer.best_bps_model.gateway_probabilities
+            )
+            self._best_bps_model.branch_rules = self._control_flow_optimizer.best_bps_model.branch_rules
+            runtimes.stop(RuntimeMeter.CONTROL_FLOW_MODEL)
+            self._save_stage(RuntimeMeter.CONTROL_FLOW_MODEL, runtimes, best_params=best_control_flow_params)
+
+        # --- Data Attributes --- #
+        if (self._settings.common.discover_data_attributes or
+                self._settings.resource_model.discover_prioritization_rules):
+            print_section("Discovering data attributes")
+            if self._restore_stage(RuntimeMeter.DATA_ATTRIBUTES_MODEL, runtimes) is None:
+                runtimes.start(RuntimeMeter.DATA_ATTRIBUTES_MODEL)
+                global_attributes, case_attributes, event_attributes = discover_data_attributes(
+                    self._event_log.train_validation_partition,
+                    self._event_log.log_ids,
+                )
+                self._best_bps_model.global_attributes = global_attributes
+                self._best_bps_model.case_attributes = case_attributes
+                self._best_bps_model.event_attributes = event_attributes
+                runtimes.stop(RuntimeMeter.DATA_ATTRIBUTES_MODEL)
+                self._save_stage(RuntimeMeter.DATA_ATTRIBUTES_MODEL, runtimes)
+
+        # --- Resource Model Discovery --- #
+        print_section("Optimizing resource model parameters")
+        checkpoint = self._restore_stage(RuntimeMeter.RESOURCE_MODEL, runtimes)
+        if checkpoint is not None:
+            best_resource_model_params = checkpoint["best_params"]
+        else:
+            runtimes.start(RuntimeMeter.RESOURCE_MODEL)
+            best_resource_model_params = self._optimize_resource_model(model_activities)
+            resource_model_optimizer = self._resource_model_optimizer
+            self._best_bps_model.resource_model = resource_model_optimizer.best_bps_model.resource_model
+            self._best_bps_model.calendar_granularity = resource_model_optimizer.best_bps_model.calendar_granularity
+            self._best_bps_model.prioritization_rules = resource_model_optimizer.best_bps_model.prioritization_rules
+            self._best_bps_model.batching_rules = resource_model_optimizer.best_bps_model.batching_rules
+            runtimes.stop(RuntimeMeter.RESOURCE_MODEL)
+            self._save_stage(RuntimeMeter.RESOURCE_MODEL, runtimes, best_params=best_resource_model_params)
+
+        # --- Extraneous Delays Discovery --- #
+        if self._settings.extraneous_activity_delays is not None:
+            print_section("Discovering extraneous delays")
+            if self._restore_stage(RuntimeMeter.EXTRANEOUS_DELAYS, runtimes) is None:
+                runtimes.start(RuntimeMeter.EXTRANEOUS_DELAYS)
+                timers = self._optimize_extraneous_activity_delays()
+                self._best_bps_model.extraneous_delays = timers
+                add_timers_to_bpmn_model(self._best_bps_model.process_model, timers)  # Update BPMN model on disk
+                runtimes.stop(RuntimeMeter.EXTRANEOUS_DELAYS)
+                self._save_stage(RuntimeMeter.EXTRANEOUS_DELAYS, runtimes)
+
+        # --- Discover final BPS model --- #
+        print_section("Discovering final BPS model")
+        checkpoint = self._restore_stage(RuntimeMeter.FINAL_MODEL, runtimes)
+        if checkpoint is not None:
+            self.final_bps_model = checkpoint["final_bps_model"]
+        else:
+            runtimes.start(RuntimeMeter.FINAL_MODEL)
+            self._discover_final_bps_model(best_control_flow_params, best_resource_model_params, model_activities)
+            runtimes.stop(RuntimeMeter.FINAL_MODEL)
+            self._save_stage(RuntimeMeter.FINAL_MODEL, runtimes, final_bps_model=self.final_bps_model)
+        runtimes.stop(RuntimeMeter.TOTAL)
+
+        # Write JSON parameters to file
+        json_parameters_path = get_simulation_parameters_path(self._best_result_dir, self._event_log.process_name)
+        with json_parameters_path.open("w") as f:
+            json.dump(self.final_bps_model.to_prosimos_format(), f)
+
+        # --- Evaluate final BPS model --- #
+        if self._settings.common.perform_final_evaluation:
+            print_subsection("Evaluate")
+            runtimes.start(RuntimeMeter.EVALUATION)
+            simulation_dir = self._best_result_dir / "evaluation"
+            simulation_dir.mkdir(parents=True, exist_ok=True)
+            self._evaluate_model(self.final_bps_model.process_model, json_parameters_path, simulation_dir)
+            runtimes.stop(RuntimeMeter.EVALUATION)
+
+        # --- Export settings and clean temporal files --- #
+        print_section(f"Exporting canonical model, runtimes, settings and cleaning up intermediate files")
+        canonical_model_path = self._best_result_dir / "canonical_model.json"
+        _export_canonical_model(canonical_model_path, best_control_flow_params, best_resource_model_params)
+        runtimes_model_path = self._best_result_dir / "runtimes.json"
+        _export_runtimes(runtimes_model_path, runtimes)
+        if self._settings.common.clean_intermediate_files:
+            self._clean_up()
+        # Export the configuration with the seed of the run, so it can be reproduced
+        settings = self._settings.model_copy(deep=True)
+        settings.common.seed = self._seed
+        settings.to_yaml(self._best_result_dir)
+
+        # --- Add BPMN diagram to the model --- #
+        add_bpmn_diagram_to_model(self.final_bps_model.process_model)
+
+    def _discover_initial_bps_model(self, model_activities: Optional[list[str]], runtimes: RuntimeMeter):
+        """
+        Default Case Arrival and Resource Allocation models discovery.
+        """
         runtimes.start(RuntimeMeter.INITIAL_MODEL)
         self._best_bps_model.case_arrival_model = discover_case_arrival_model(
             self._event_log.train_validation_partition,  # No optimization process here, use train + validation
@@ -153,52 +325,17 @@ class Simod:
                 log_ids=self._event_log.log_ids,
             )
         runtimes.stop(RuntimeMeter.INITIAL_MODEL)
+        self._save_stage(RuntimeMeter.INITIAL_MODEL, runtimes)
 
-        # --- Control-Flow Optimization --- #
-        print_section("Optimizing control-flow parameters")
-        runtimes.start(RuntimeMeter.CONTROL_FLOW_MODEL)
-        best_control_flow_params = self._optimize_control_flow()
-        self._best_bps_model.process_model = self._control_flow_optimizer.best_bps_model.process_model
-        self._best_bps_model.gateway_probabilities = self._control_flow_optimizer.best_bps_model.gateway_probabilities
-        self._best_bps_model.branch_rules = self._control_flow_optimizer.best_bps_model.branch_rules
-        runtimes.stop(RuntimeMeter.CONTROL_FLOW_MODEL)
-
-        # --- Data Attributes --- #
-        if (self._settings.common.discover_data_attributes or
-                self._settings.resource_model.discover_prioritization_rules):
-            print_section("Discovering data attributes")
-            runtimes.start(RuntimeMeter.DATA_ATTRIBUTES_MODEL)
-            global_attributes, case_attributes, event_attributes = discover_data_attributes(
-                self._event_log.train_validation_partition,
-                self._event_log.log_ids,
-            )
-            self._best_bps_model.global_attributes = global_attributes
-            self._best_bps_model.case_attributes = case_attributes
-            self._best_bps_model.event_attributes = event_attributes
-            runtimes.stop(RuntimeMeter.DATA_ATTRIBUTES_MODEL)
-
-        # --- Resource Model Discovery --- #
-        print_section("Optimizing resource model parameters")
-        runtimes.start(RuntimeMeter.RESOURCE_MODEL)
-        best_resource_model_params = self._optimize_resource_model(model_activities)
-        self._best_bps_model.resource_model = self._resource_model_optimizer.best_bps_model.resource_model
-        self._best_bps_model.calendar_granularity = self._resource_model_optimizer.best_bps_model.calendar_granularity
-        self._best_bps_model.prioritization_rules = self._resource_model_optimizer.best_bps_model.prioritization_rules
-        self._best_bps_model.batching_rules = self._resource_model_optimizer.best_bps_model.batching_rules
-        runtimes.stop(RuntimeMeter.RESOURCE_MODEL)
-
-        # --- Extraneous Delays Discovery --- #
-        if self._settings.extraneous_activity_delays is not None:
-            print_section("Discovering extraneous delays")
-            runtimes.start(RuntimeMeter.EXTRANEOUS_DELAYS)
-            timers = self._optimize_extraneous_activity_delays()
-            self._best_bps_model.extraneous_delays = timers
-            add_timers_to_bpmn_model(self._best_bps_model.process_model, timers)  # Update BPMN model on disk
-            runtimes.stop(RuntimeMeter.EXTRANEOUS_DELAYS)
-
-        # --- Discover final BPS model --- #
-        print_section("Discovering final BPS model")
-        runtimes.start(RuntimeMeter.FINAL_MODEL)
+    def _discover_final_bps_model(
+        self,
+        best_control_flow_params: ControlFlowHyperoptIterationParams,
+        best_resource_model_params: ResourceModelHyperoptIterationParams,
+        model_activities: Optional[list[str]],
+    ):
+        """
+        Final BPS model discovery, with the best hyperparameters of each stage over the training+validation log.
+        """
         self.final_bps_model = BPSModel(  # Bypass all models already discovered with train+validation
             process_model=get_process_model_path(self._best_result_dir, self._event_log.process_name),
             case_arrival_model=self._best_bps_model.case_arrival_model,
@@ -283,45 +420,58 @@ class Simod:
             self.final_bps_model.extraneous_delays = self._best_bps_model.extraneous_delays
             add_timers_to_bpmn_model(self.final_bps_model.process_model, self._best_bps_model.extraneous_delays)
         self.final_bps_model.replace_activity_names_with_ids()
-        runtimes.stop(RuntimeMeter.FINAL_MODEL)
-        runtimes.stop(RuntimeMeter.TOTAL)
 
-        # Write JSON parameters to file
-        json_parameters_path = get_simulation_parameters_path(self._best_result_dir, self._event_log.process_name)
-        with json_parameters_path.open("w") as f:
-            json.dump(self.final_bps_model.to_prosimos_format(), f)
-
-        # --- Evaluate final BPS model --- #
-        if self._settings.common.perform_final_evaluation:
-            print_subsection("Evaluate")
-            runtimes.start(RuntimeMeter.EVALUATION)
-            simulation_dir = self._best_result_dir / "evaluation"
-            simulation_dir.mkdir(parents=True, exist_ok=True)
-            self._evaluate_model(self.final_bps_model.process_model, json_parameters_path, simulation_dir)
-            runtimes.stop(RuntimeMeter.EVALUATION)
-
-        # --- Export settings and clean temporal files --- #
-        print_section(f"Exporting canonical model, runtimes, settings and cleaning up intermediate files")
-        canonical_model_path = self._best_result_dir / "canonical_model.json"
-        _export_canonical_model(canonical_model_path, best_control_flow_params, best_resource_model_params)
-        runtimes_model_path = self._best_result_dir / "runtimes.json"
-        _export_runtimes(runtimes_model_path, runtimes)
-        if self._settings.common.clean_intermediate_files:
-            self._clean_up()
-        self._settings.to_yaml(self._best_result_dir)
+    def _restore_stage(self, stage: str, runtimes: RuntimeMeter) -> Optional[dict]:
+        """
+        Restores the BPS model (and runtime) of [stage] from the checkpoint if the stage was already completed,
+        returning the rest of its stored results, or None if the stage has to be executed.
+        """
+        checkpoint = self._checkpoint.load_stage(stage)
+        if checkpoint is not None:
+            print_notice(f"Stage '{stage}' already completed, restoring its results from the checkpoint")
+            self._best_bps_model = checkpoint["bps_model"]
+            if stage in checkpoint["runtimes"]:
+                runtimes.runtimes[stage] = checkpoint["runtimes"][stage]
+        return checkpoint
+
+    def _save_stage(self, stage: str, runtimes: RuntimeMeter, **results):
+        """
+        Stores the current BPS model (and runtimes) together with the other results of [stage] in the checkpoint.
+        """
+        self._checkpoint.save_stage(
+            stage, bps_model=self._best_bps_model.deep_copy(), runtimes=dict(runtimes.runtimes), **results
+        )
 
-        # --- Add BPMN diagram to the model --- #
-        add_bpmn_diagram_to_model(self.final_bps_model.process_model)
+    def _optimization_bps_model(self) -> BPSModel:
+        """
+        Current BPS model to start an optimization phase from. If the optimization phases run on a sample of the event
+        log, its case arrival model is discovered from the sampled cases, so the simulated cases arrive at the rate of
+        the sample (otherwise, the simulated horizon would be compressed by the sampling factor, while the sampled
+        validation log still spans the whole period).
+        """
+        if self._optimization_event_log is self._event_log:
+            return self._best_bps_model
+        bps_model = self._best_bps_model.deep_copy()
+        bps_model.case_arrival_model = discover_case_arrival_model(
+            self._optimization_event_log.train_validation_partition,
+            self._optimization_event_log.log_ids,
+            use_observed_arrival_distribution=self._settings.common.use_observed_arrival_distribution,
+        )
+        return bps_model
 
     def _optimize_control_flow(self) -> ControlFlowHyperoptIterationParams:
         """
         Control-flow and Gateway Probabilities discovery.
         """
         self._control_flow_optimizer = ControlFlowOptimizer(
-            event_log=self._event_log,
-            bps_model=self._best_bps_model,
+            event_log=self._optimization_event_log,
+            bps_model=self._optimization_bps_model(),
             settings=self._settings.control_flow,
             base_directory=self._control_flow_dir,
+            executor=self._executor,
+            keep_simulated_logs=not self._settings.common.clean_intermediate_files,
+            checkpoint_path=self._checkpoint.optimizer_progress_path(RuntimeMeter.CONTROL_FLOW_MODEL),
+            seed=self._seed,
         )
         best_control_flow_params = self._control_flow_optimizer.run()
         return best_control_flow_params
@@ -333,11 +483,15 @@ class Simod:
         Resource Model (resource profiles, calendars an activity performances) discovery.
         """
         self._resource_model_optimizer = ResourceModelOptimizer(
-            event_log=self._event_log,
-            bps_model=self._best_bps_model,
+            event_log=self._optimization_event_log,
+            bps_model=self._optimization_bps_model(),
             settings=self._settings.resource_model,
             base_directory=self._resource_model_dir,
             model_activities=model_activities,
+            executor=self._executor,
+            keep_simulated_logs=not self._settings.common.clean_intermediate_files,
+            checkpoint_path=self._checkpoint.optimizer_progress_path(RuntimeMeter.RESOURCE_MODEL),
+            seed=self._seed,
         )
         best_resource_model_params = self._resource_model_optimizer.run()
         return best_resource_model_params
@@ -375,6 +529,9 @@ class Simod:
             validation_log_ids=self._event_log.log_ids,
             num_simulations=self._settings.common.num_final_evaluations,
             metrics=metrics,
+            executor=self._executor,
+            keep_simulated_logs=True,
+            seed=self._seed,
         )
 
         measurements_path = output_dir / "evaluation_metrics.csv"
@@ -383,10 +540,12 @@ class Simod:
 
     def _clean_up(self):
         print_section("Removing intermediate files")
-        self._control_flow_optimizer.cleanup()
-        self._resource_model_optimizer.cleanup()
+        # The optimizers of the stages restored from a checkpoint were not instantiated in this run
+        remove_asset(self._control_flow_dir)
+        remove_asset(self._resource_model_dir)
         if self._settings.extraneous_activity_delays is not None:
-            self._extraneous_delays_optimizer.cleanup()
+            remove_asset(self._extraneous_delays_dir)
+        remove_asset(self._checkpoint.directory)
         if self._settings.common.process_model_path is None:
             final_xes_log_path = self._best_result_dir / f"{self._event_log.process_name}_train_val.xes"
             remove_asset(final_xes_log_path)
@@ -409,12 +568,14 @@ def _export_runtimes(
         file_path: Path,
         runtimes: RuntimeMeter
 ):
+    # Hit/miss statistics of the artifact cache (if enabled)
+    cache = get_artifact_cache()
+    cache_stats = {"artifact_cache": cache.stats()} if cache is not None else {}
+    explanation = (
+        f"Add '{RuntimeMeter.PREPROCESSING}' with '{RuntimeMeter.TOTAL}' for the runtime of the entire SIMOD pipeline "
+        f"and preprocessing stage. '{RuntimeMeter.EVALUATION}', if reported, should be left out as it measures the "
+        f"quality assessment of the final BPS model (i.e., it is not part of the discovery process."
+    )
+    report = runtimes.runtimes | cache_stats | {"explanation": explanation}
     with open(file_path, "w") as file:
-        json.dump(
-            runtimes.runtimes | {'explanation': f"Add '{RuntimeMeter.PREPROCESSING}' with '{RuntimeMeter.TOTAL}' "
-                                                f"for the runtime of the entire SIMOD pipeline and preprocessing "
-                                                f"stage. '{RuntimeMeter.EVALUATION}', if reported, should be left out "
-                                                f"as it measures the quality assessment of the final BPS model (i.e., "
-                                                f"it is not part of the discovery process."},
-            file
-        )
+        json.dump(report, file)
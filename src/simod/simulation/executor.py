@@ -0,0 +1,134 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List, Optional
+
+from simod.cli_formatter import print_notice, print_warning
+
+
+def _warm_up_worker():
+    # Import the heavy dependencies once when the worker starts, so the tasks don't pay for them
+    import log_distance_measures.control_flow_log_distance  # noqa: F401
+    import pandas  # noqa: F401
+    import pix_framework.io.event_log  # noqa: F401
+    import prosimos.simulation_engine  # noqa: F401
+
+    import simod.metrics  # noqa: F401
+
+
+def _no_op():
+    return None
+
+
+class SimulationExecutor:
+    """
+    Long-lived pool of worker processes to run the simulations and their evaluations.
+
+    The workers are created once (importing Prosimos, pandas, and the distance measures at start-up) and reused by all
+    the simulations of the pipeline, avoiding the creation of a new pool of processes for each hyperopt iteration. The
+    same instance can be shared by :class:`~simod.simod.Simod`, the control-flow optimizer, and the resource model
+    optimizer.
+
+    Attributes
+    ----------
+    num_workers : int
+        Number of worker processes in the pool.
+
+    Notes
+    -----
+    - The pool is started lazily (on the first submitted task) unless :meth:`start` is called explicitly.
+    - Use it as a context manager, or call :meth:`shutdown`, to release the worker processes.
+    - The events created with :meth:`create_event` are held by a manager process owned by the executor, started on
+      the first call and stopped with the workers.
+    """
+
+    num_workers: int
+
+    def __init__(self, num_workers: Optional[int] = None):
+        self.num_workers = max(1, num_workers if num_workers is not None else multiprocessing.cpu_count())
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+
+    def start(self, warm_up: bool = True) -> "SimulationExecutor":
+        """
+        Creates the pool of worker processes (if not already running).
+
+        Parameters
+        ----------
+        warm_up : bool
+            Whether to wait for all the workers to be launched and to have their dependencies imported.
+
+        Returns
+        -------
+        :class:`SimulationExecutor`
+            The executor itself, to allow chaining (e.g., ``executor = SimulationExecutor(4).start()``).
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_warm_up_worker)
+            if warm_up:
+                print_notice(f"Starting simulation pool with {self.num_workers} workers")
+                wait([self._pool.submit(_no_op) for _ in range(self.num_workers)])
+        return self
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the pool of worker processes is currently alive."""
+        return self._pool is not None
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Schedules the execution of ``fn(*args)`` in one of the workers.
+
+        If the pool was broken (e.g., a worker was killed by the OS), it is recreated before submitting the task.
+        """
+        if self._pool is None:
+            self.start(warm_up=False)
+        try:
+            return self._pool.submit(fn, *args)
+        except BrokenProcessPool:
+            print_warning("Simulation pool is broken, restarting it.")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self.start(warm_up=False)
+            return self._pool.submit(fn, *args)
+
+    def map(self, fn: Callable, iterable: Iterable) -> List:
+        """
+        Applies ``fn`` to each element of ``iterable`` in the workers, returning the results in the same order.
+
+        If one of the tasks fails, the ones not started yet are cancelled and its exception is raised.
+        """
+        futures = [self.submit(fn, argument) for argument in iterable]
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def create_event(self) -> threading.Event:
+        """
+        Creates an event that can be passed to the tasks of the pool with their arguments, e.g., to signal the running
+        tasks to stop.
+        """
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        return self._manager.Event()
+
+    def shutdown(self):
+        """
+        Stops the worker processes, cancelling the tasks that did not start yet.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def __enter__(self) -> "SimulationExecutor":
+        return self.start(warm_up=False)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -1,20 +1,168 @@
+import csv
+import functools
 import itertools
+import math
 import multiprocessing
-from concurrent.futures import ProcessPoolExecutor as Pool
+import pickle
+import random
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass
+from importlib import metadata
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 from pix_framework.io.event_log import PROSIMOS_LOG_IDS, EventLogIDs, read_csv_log
-from prosimos.simulation_engine import run_simulation
+from prosimos.simulation_engine import SimBPMEnv, execute_full_process, run_simulation
+from prosimos.simulation_properties_parser import parse_datetime
+from prosimos.simulation_setup import SimDiffSetup
+from prosimos.warning_logger import warning_logger
+from scipy.stats import t
 
+from simod.cache import ArtifactCache, get_artifact_cache, get_simulation_cache, hash_parts
 from simod.cli_formatter import print_message, print_notice, print_warning
-from simod.metrics import compute_metric
+from simod.metrics import ReferenceProfile
+from .executor import SimulationExecutor
 from ..settings.common_settings import Metric
 
 cpu_count = multiprocessing.cpu_count()
 
+# Wall-clock seconds assumed to simulate an event when computing the budget of a simulation (Prosimos simulates a few
+# thousand events per second, so this leaves room for slower machines and busy workers)
+DEFAULT_SECONDS_PER_EVENT = 0.002
+# Minimum wall-clock budget of a simulation, covering the set-up of the simulation in small logs
+MIN_SIMULATION_DURATION = 60.0
+# Versions (major, minor) of Prosimos whose run loop is replicated by _run_simulation()
+_RUN_LOOP_PROSIMOS_VERSIONS = [(2, 0)]
+# Name of the file with the warnings of the simulations, as written by Prosimos' run_simulation()
+SIMULATION_WARNINGS_FILE_NAME = "simulation_warnings.txt"
+
+
+class SimulationBudgetExceeded(Exception):
+    """
+    Raised when a simulation exceeds its :class:`SimulationBudget`.
+    """
+
+
+@dataclass
+class SimulationBudget:
+    """
+    Limits of a simulation, to stop the ones taking much longer than expected (e.g., due to calendars with almost no
+    availability, or loops with very high probabilities) instead of blocking the optimization.
+
+    Attributes
+    ----------
+    max_events : int, optional
+        Maximum number of simulated activity instances.
+    max_horizon : :class:`pandas.Timedelta`, optional
+        Maximum simulated time since the start of the simulation.
+    max_duration : float, optional
+        Maximum wall-clock time of the simulation, in seconds.
+    """
+
+    max_events: Optional[int] = None
+    max_horizon: Optional[pd.Timedelta] = None
+    max_duration: Optional[float] = None
+
+    @staticmethod
+    def relative_to(
+        event_log: pd.DataFrame,
+        log_ids: EventLogIDs,
+        factor: float,
+        seconds_per_event: float = DEFAULT_SECONDS_PER_EVENT,
+    ) -> "SimulationBudget":
+        """
+        Creates a budget allowing [factor] times the events and time horizon of [event_log], and the wall-clock time
+        expected to simulate that many events.
+
+        Parameters
+        ----------
+        event_log : :class:`pandas.DataFrame`
+            Event log the simulations are compared with (e.g., the validation log).
+        log_ids : :class:`EventLogIDs`
+            Identifiers for mapping column names in the event log.
+        factor : float
+            Times the size of [event_log] a simulation may reach.
+        seconds_per_event : float
+            Wall-clock seconds assumed to simulate an event.
+
+        Returns
+        -------
+        :class:`SimulationBudget`
+            The budget for the simulations of the same number of cases as [event_log].
+        """
+        max_events = math.ceil(factor * len(event_log))
+        horizon = event_log[log_ids.end_time].max() - event_log[log_ids.start_time].min()
+        return SimulationBudget(
+            max_events=max_events,
+            max_horizon=factor * horizon,
+            max_duration=max(MIN_SIMULATION_DURATION, max_events * seconds_per_event),
+        )
+
+
+class SimulationSetup:
+    """
+    Simulation set-up of Prosimos (the parsed and validated BPMN model and simulation parameters) prepared once, to be
+    shipped to all the replications of a model instead of parsing the same files in each of them.
+
+    Prosimos modifies the set-up while simulating, so it is kept serialized, and each simulation works on a fresh copy
+    (unpickling it is much faster than parsing the model and the parameters, in particular with many resources and
+    calendars).
+
+    Parameters
+    ----------
+    bpmn_path : :class:`pathlib.Path`
+        Path to the BPMN process model.
+    parameters_path : :class:`pathlib.Path`
+        Path to the Prosimos simulation parameters JSON file.
+    num_simulation_cases : int
+        Number of cases to simulate.
+    simulation_start : :class:`pandas.Timestamp`
+        Start timestamp for the simulation.
+
+    Raises
+    ------
+    InvalidSimScenarioException
+        If the simulation parameters are not valid for the process model.
+    """
+
+    def __init__(
+        self, bpmn_path: Path, parameters_path: Path, num_simulation_cases: int, simulation_start: pd.Timestamp
+    ):
+        self.bpmn_path = bpmn_path
+        self.parameters_path = parameters_path
+        setup = _parse_setup(bpmn_path, parameters_path, num_simulation_cases, simulation_start)
+        self._serialized_setup = pickle.dumps(setup, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def instantiate(self) -> SimDiffSetup:
+        """
+        Returns a new copy of the set-up, to run a simulation with it.
+        """
+        return pickle.loads(self._serialized_setup)
+
+    def __repr__(self) -> str:
+        return f"SimulationSetup(bpmn_path={self.bpmn_path!r}, parameters_path={self.parameters_path!r})"
+
+
+def _parse_setup(
+    bpmn_path: Path, parameters_path: Path, num_simulation_cases: int, simulation_start: pd.Timestamp
+) -> SimDiffSetup:
+    # Same set-up as in run_simulation()
+    setup = SimDiffSetup(
+        bpmn_path.__str__(),
+        parameters_path.__str__(),
+        False,  # Don't add Events (start/end/timers) to output log
+        num_simulation_cases,
+    )
+    setup.set_starting_datetime(parse_datetime(simulation_start.isoformat(), True))
+    return setup
+
 
 @dataclass
 class ProsimosSettings:
@@ -27,22 +175,145 @@ class ProsimosSettings:
         Path to the BPMN process model.
     parameters_path : :class:`pathlib.Path`
         Path to the Prosimos simulation parameters JSON file.
-    output_log_path : :class:`pathlib.Path`
-        Path to store the generated simulation log.
+    output_log_path : :class:`pathlib.Path`, optional
+        Path to store the generated simulation log. If ``None``, the log is kept in memory and returned by
+        :func:`simulate` instead of being written to disk.
     num_simulation_cases : int
         Number of cases to simulate.
     simulation_start : :class:`pandas.Timestamp`
         Start timestamp for the simulation.
+    seed : int, optional
+        Seed of the random number generators used by the simulation. If ``None``, the simulation is not reproducible.
+    budget : :class:`SimulationBudget`, optional
+        Limits of the simulation. If exceeded, the simulation is stopped raising :class:`SimulationBudgetExceeded`.
+    setup : :class:`SimulationSetup`, optional
+        Set-up prepared from the same model, parameters, number of cases, and start, to use instead of parsing them.
+    warnings_path : :class:`pathlib.Path`, optional
+        Path to write the warnings of the simulation to. If ``None``, they are written next to [output_log_path] (as
+        Prosimos does), or not written if the log is kept in memory.
     """
 
     bpmn_path: Path
     parameters_path: Path
-    output_log_path: Path
+    output_log_path: Optional[Path]
     num_simulation_cases: int
     simulation_start: pd.Timestamp
+    seed: Optional[int] = None
+    budget: Optional[SimulationBudget] = None
+    setup: Optional[SimulationSetup] = None
+    warnings_path: Optional[Path] = None
 
 
-def simulate(settings: ProsimosSettings):
+def get_replication_seed(seed: Optional[int], replication: int) -> Optional[int]:
+    """
+    Derives the seed of a simulation replication from the seed of the run, so replication [replication] of every
+    simulated model uses the same random numbers (common random numbers).
+
+    :param seed: seed of the run, or None if the simulations are not seeded.
+    :param replication: index of the replication.
+    :return: the seed of the replication, or None if [seed] is None.
+    """
+    if seed is None:
+        return None
+    return int(np.random.SeedSequence([seed, replication]).generate_state(1)[0])
+
+
+@contextmanager
+def _seeded_random_state(seed: Optional[int]) -> Iterator[None]:
+    """
+    Seeds the global random number generators used by Prosimos (Python's and NumPy's, also used by SciPy) for the
+    duration of the context, restoring their previous state on exit.
+    """
+    if seed is None:
+        yield
+        return
+    python_state, numpy_state = random.getstate(), np.random.get_state()
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(python_state)
+        np.random.set_state(numpy_state)
+
+
+@dataclass
+class ReplicationStoppingRule:
+    """
+    Sequential stopping rule for the replications of an evaluation: the replications are run in batches, and no more
+    batches are run once the confidence interval of the mean distance is narrow enough, or it lies entirely above the
+    loss of the best candidate evaluated so far (i.e., the candidate cannot improve it).
+
+    Attributes
+    ----------
+    incumbent_loss : float, optional
+        Loss (mean distance) of the best candidate evaluated so far, if any.
+    relative_precision : float
+        Maximum half-width of the confidence interval, relative to the mean distance, to stop replicating.
+    confidence : float
+        Confidence level of the interval (Student's t-distribution).
+    batch_size : int
+        Number of replications run (in parallel) in each batch, and minimum number of replications.
+    """
+
+    incumbent_loss: Optional[float] = None
+    relative_precision: float = 0.05
+    confidence: float = 0.95
+    batch_size: int = 2
+
+    def is_satisfied(self, distances: List[float]) -> bool:
+        """
+        Whether the replications that obtained [distances] are enough to estimate the mean distance.
+        """
+        if len(distances) < max(2, self.batch_size):
+            return False
+        mean = float(np.mean(distances))
+        half_width = _confidence_half_width(distances, self.confidence)
+        if half_width <= self.relative_precision * abs(mean):
+            return True
+        return self.incumbent_loss is not None and mean - half_width > self.incumbent_loss
+
+
+@dataclass
+class RacingRule:
+    """
+    Racing rule to discard a candidate before all its replications are evaluated: as soon as the optimistic estimate
+    of its mean distance (the lower bound of the confidence interval, or the distance itself after one replication)
+    exceeds the loss of the best candidate so far by more than [margin], the candidate cannot plausibly improve it, and
+    its outstanding replications are cancelled.
+
+    Attributes
+    ----------
+    incumbent_loss : float
+        Loss (mean distance) of the best candidate evaluated so far.
+    margin : float
+        Relative margin over the incumbent loss to consider the candidate as losing.
+    confidence : float
+        Confidence level of the interval (Student's t-distribution).
+    """
+
+    incumbent_loss: float
+    margin: float = 0.1
+    confidence: float = 0.95
+
+    def is_losing(self, distances: List[float]) -> bool:
+        """
+        Whether the candidate that obtained [distances] cannot plausibly improve the incumbent.
+        """
+        if len(distances) == 0:
+            return False
+        optimistic_distance = float(np.mean(distances)) - _confidence_half_width(distances, self.confidence)
+        return optimistic_distance > self.incumbent_loss * (1 + self.margin)
+
+
+def _confidence_half_width(distances: List[float], confidence: float) -> float:
+    if len(distances) < 2:
+        return 0.0
+    standard_error = np.std(distances, ddof=1) / math.sqrt(len(distances))
+    return float(t.ppf((1 + confidence) / 2, len(distances) - 1) * standard_error)
+
+
+def simulate(settings: ProsimosSettings) -> Optional[pd.DataFrame]:
     """
     Runs a Prosimos simulation with the provided settings.
 
@@ -51,23 +322,200 @@ def simulate(settings: ProsimosSettings):
     settings : :class:`ProsimosSettings`
         Configuration settings containing paths and parameters for the simulation.
 
+    Returns
+    -------
+    :class:`pandas.DataFrame`, optional
+        If ``settings.output_log_path`` is ``None``, the simulated event log (with the columns of
+        :data:`PROSIMOS_LOG_IDS` and the timestamps already parsed), otherwise ``None``.
+
     Notes
     -----
     - The function prints the simulation settings and invokes `run_simulation()`.
     - The labels of the start event, end event, and event timers are**not** recorded to the output log.
-    - The simulation generates a process log stored in `settings.output_log_path`.
+    - The simulation generates a process log stored in `settings.output_log_path` (if specified).
+    - If `settings.seed` is provided, the same settings always produce the same simulated log.
+    - If `settings.budget` is provided, the simulation is checked against it after each simulated event.
+    - If `settings.setup` is provided, the simulation runs on a copy of it instead of parsing the model and parameters.
+    - The in-memory log, the budget, and the prepared set-up rely on the internals of Prosimos, so they are only used
+      with the versions of Prosimos checked against them. With other versions, the simulation runs with the public
+      `run_simulation()` (only enforcing the wall-clock limit of the budget).
     """
     print_message(f"Simulation settings: {settings}")
 
-    run_simulation(
-        bpmn_path=settings.bpmn_path.__str__(),
-        json_path=settings.parameters_path.__str__(),
-        total_cases=settings.num_simulation_cases,
-        stat_out_path=None,  # No statistics
-        log_out_path=settings.output_log_path.__str__(),
-        starting_at=settings.simulation_start.isoformat(),
-        is_event_added_to_log=False,  # Don't add Events (start/end/timers) to output log
-    )
+    with _seeded_random_state(settings.seed):
+        if not _has_checked_run_loop():
+            return _run_public_simulation(settings)
+        elif settings.output_log_path is None:
+            log_writer = _InMemoryLogWriter()
+            _run_simulation(settings, log_writer)
+            return log_writer.to_dataframe()
+        elif settings.budget is not None or settings.setup is not None:
+            with settings.output_log_path.open(mode="w", newline="", encoding="utf-8") as log_file:
+                # Same format as the logs written by run_simulation()
+                _run_simulation(settings, csv.writer(log_file, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL))
+            return None
+
+        run_simulation(
+            bpmn_path=settings.bpmn_path.__str__(),
+            json_path=settings.parameters_path.__str__(),
+            total_cases=settings.num_simulation_cases,
+            stat_out_path=None,  # No statistics
+            log_out_path=settings.output_log_path.__str__(),
+            starting_at=settings.simulation_start.isoformat(),
+            is_event_added_to_log=False,  # Don't add Events (start/end/timers) to output log
+        )
+        _write_simulation_warnings(settings, written_by_prosimos=True)
+    return None
+
+
+def _run_public_simulation(settings: ProsimosSettings) -> Optional[pd.DataFrame]:
+    # Simulation with the public run_simulation(), writing the log to a temporary file if it has to be kept in memory
+    with tempfile.TemporaryDirectory(prefix="simod_simulation_") as tmp_dir:
+        log_path = settings.output_log_path if settings.output_log_path is not None else Path(tmp_dir) / "log.csv"
+        with _wall_clock_limit(settings.budget.max_duration if settings.budget is not None else None):
+            run_simulation(
+                bpmn_path=settings.bpmn_path.__str__(),
+                json_path=settings.parameters_path.__str__(),
+                total_cases=settings.num_simulation_cases,
+                stat_out_path=None,  # No statistics
+                log_out_path=log_path.__str__(),
+                starting_at=settings.simulation_start.isoformat(),
+                is_event_added_to_log=False,  # Don't add Events (start/end/timers) to output log
+            )
+        _write_simulation_warnings(settings, written_by_prosimos=settings.output_log_path is not None)
+        if settings.output_log_path is None:
+            return read_csv_log(log_path, log_ids=PROSIMOS_LOG_IDS)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _has_checked_run_loop() -> bool:
+    try:
+        version = tuple(int(part) for part in metadata.version("prosimos").split(".")[:2])
+    except (metadata.PackageNotFoundError, ValueError):
+        return False
+    return version in _RUN_LOOP_PROSIMOS_VERSIONS
+
+
+def _write_simulation_warnings(settings: ProsimosSettings, written_by_prosimos: bool = False):
+    """
+    Writes the warnings of the simulations (accumulated by Prosimos in the process) to the warnings file of
+    [settings], unless it is the file already written by Prosimos (next to the simulated log).
+    """
+    default_path = None
+    if settings.output_log_path is not None:
+        default_path = settings.output_log_path.parent / SIMULATION_WARNINGS_FILE_NAME
+    warnings_path = settings.warnings_path if settings.warnings_path is not None else default_path
+    if warnings_path is None or (written_by_prosimos and warnings_path == default_path):
+        return
+    with warnings_path.open("w") as warnings_file:
+        for warning in warning_logger.get_all_warnings():
+            warnings_file.write(f"{warning}\n")
+
+
+class _InMemoryLogWriter:
+    """
+    Collects the rows Prosimos writes to the simulated log, mimicking the interface of the :func:`csv.writer`.
+    """
+
+    def __init__(self):
+        self.header = []
+        self.rows = []
+
+    def writerow(self, row: list):
+        # Prosimos only uses writerow() for the header, the events are written with writerows()
+        self.header = list(row)
+
+    def writerows(self, rows: List[list]):
+        self.rows.extend(rows)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Builds the simulated log typed as if it was read with :func:`read_csv_log`."""
+        log_ids = PROSIMOS_LOG_IDS
+        event_log = pd.DataFrame(self.rows, columns=self.header)
+        event_log = event_log.astype({log_ids.case: object})
+        event_log[log_ids.resource] = event_log[log_ids.resource].apply(str)
+        for column in ["enable_time", log_ids.start_time, log_ids.end_time]:
+            event_log[column] = pd.to_datetime(event_log[column], utc=True, format="ISO8601")
+        return event_log.sort_values([log_ids.start_time, log_ids.end_time])
+
+
+def _run_simulation(settings: ProsimosSettings, log_writer):
+    # Same as run_simulation(), but reusing the prepared set-up (if any), and writing the log rows to [log_writer]
+    if settings.setup is not None:
+        setup = settings.setup.instantiate()
+    else:
+        setup = _parse_setup(
+            settings.bpmn_path, settings.parameters_path, settings.num_simulation_cases, settings.simulation_start
+        )
+    bpm_env = SimBPMEnv(setup, None, log_writer)
+    if settings.budget is None:
+        execute_full_process(bpm_env)
+    else:
+        _watch_simulation(bpm_env, settings.budget, settings.simulation_start)
+        with _wall_clock_limit(settings.budget.max_duration):
+            execute_full_process(bpm_env)
+    bpm_env.log_writer.force_write()
+    # Same warnings (and file) as run_simulation()
+    warning_logger.add_warnings(bpm_env.sim_setup.bpmn_graph.simulation_execution_stats.find_issues())
+    _write_simulation_warnings(settings)
+
+
+@contextmanager
+def _wall_clock_limit(max_duration: Optional[float]) -> Iterator[None]:
+    """
+    Raises :class:`SimulationBudgetExceeded` in the running code once [max_duration] seconds elapse, also when stuck
+    within a single simulated event. Only enforced where ``SIGALRM`` is available and in the main thread (as in the
+    workers of the pool), the budget being checked between events otherwise.
+    """
+    if (
+        max_duration is None
+        or max_duration <= 0
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def _on_timeout(_signum, _frame):
+        raise SimulationBudgetExceeded(f"Simulation exceeded the budget of {max_duration:.0f} seconds")
+
+    previous_handler = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, max_duration)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _watch_simulation(bpm_env: SimBPMEnv, budget: SimulationBudget, simulation_start: pd.Timestamp):
+    """
+    Checks the simulation of [bpm_env] against [budget] before executing each of its events, raising
+    :class:`SimulationBudgetExceeded` (which stops the simulation) once exceeded.
+    """
+    execute_enabled_event = bpm_env.execute_enabled_event
+    add_csv_row = bpm_env.log_writer.add_csv_row
+    deadline = time.monotonic() + budget.max_duration if budget.max_duration is not None else None
+    max_datetime = simulation_start + budget.max_horizon if budget.max_horizon is not None else None
+    num_events = [0]
+
+    def _add_csv_row(csv_row: list):
+        # Count the activity instances written to the log
+        num_events[0] += 1
+        add_csv_row(csv_row)
+
+    def _execute_within_budget(enabled_event):
+        if budget.max_events is not None and num_events[0] > budget.max_events:
+            raise SimulationBudgetExceeded(f"Simulation exceeded the budget of {budget.max_events} events")
+        if max_datetime is not None and enabled_event.enabled_datetime > max_datetime:
+            raise SimulationBudgetExceeded(f"Simulation exceeded the budget of {budget.max_horizon} of simulated time")
+        if deadline is not None and time.monotonic() > deadline:
+            raise SimulationBudgetExceeded(f"Simulation exceeded the budget of {budget.max_duration:.0f} seconds")
+        return execute_enabled_event(enabled_event)
+
+    bpm_env.log_writer.add_csv_row = _add_csv_row
+    bpm_env.execute_enabled_event = _execute_within_budget
 
 
 def simulate_and_evaluate(
@@ -80,6 +528,13 @@ def simulate_and_evaluate(
     validation_log_ids: EventLogIDs,
     metrics: List[Metric],
     num_simulations: int = 1,
+    executor: Optional[SimulationExecutor] = None,
+    keep_simulated_logs: bool = False,
+    reference_profile: Optional[ReferenceProfile] = None,
+    stopping_rule: Optional[ReplicationStoppingRule] = None,
+    racing_rule: Optional[RacingRule] = None,
+    seed: Optional[int] = None,
+    budget: Optional[SimulationBudget] = None,
 ) -> List[dict]:
     """
     Simulates a process model using Prosimos multiple times and evaluates the results.
@@ -94,7 +549,7 @@ def simulate_and_evaluate(
     parameters_path : :class:`pathlib.Path`
         Path to the Prosimos simulation parameters JSON file.
     output_dir : :class:`pathlib.Path`
-        Directory where simulated logs will be stored.
+        Directory where simulated logs will be stored (if ``keep_simulated_logs`` is true).
     simulation_cases : int
         Number of cases to simulate per run.
     simulation_start_time : :class:`pandas.Timestamp`
@@ -107,27 +562,236 @@ def simulate_and_evaluate(
         A list of metrics used to evaluate the simulated logs.
     num_simulations : int, optional
         Number of parallel simulation runs (default is 1).
+    executor : :class:`~simod.simulation.executor.SimulationExecutor`, optional
+        Pool of workers to run the simulations and evaluations in. If not provided, a temporary one is created.
+    keep_simulated_logs : bool, optional
+        Whether to write the simulated logs to ``output_dir`` as CSV files (default is False). If false, the simulated
+        logs are kept in memory and discarded after their evaluation.
+    reference_profile : :class:`~simod.metrics.ReferenceProfile`, optional
+        Precomputed summary of the validation log for the given metrics. If not provided, it is computed from
+        ``validation_log`` (provide it when evaluating several models against the same validation log).
+    stopping_rule : :class:`ReplicationStoppingRule`, optional
+        If provided, the replications are run in batches until the distances of the first metric satisfy the rule,
+        being `num_simulations` the maximum number of replications.
+    racing_rule : :class:`RacingRule`, optional
+        If provided, the outstanding replications are cancelled as soon as the distances of the first metric show the
+        model is losing according to the rule (see :meth:`RacingRule.is_losing`).
+    seed : int, optional
+        Seed of the run. If provided, each replication is simulated with the seed derived from it (see
+        :func:`get_replication_seed`), so the same replication of different models uses the same random numbers.
+    budget : :class:`SimulationBudget`, optional
+        Limits of each simulation. If provided, the simulations exceeding them are stopped in their workers.
 
     Returns
     -------
     List[dict]
         A list of evaluation results, one for each simulated log.
 
+    Raises
+    ------
+    SimulationBudgetExceeded
+        If the simulation of a replication exceeded [budget].
+
     Notes
     -----
     - Uses multiprocessing to speed up simulation when `num_simulations > 1`.
-    - Simulated logs are automatically compared with `validation_log`.
+    - Each replication is simulated, read, and evaluated in the same worker, which returns only the computed
+      distances (the simulated logs are never transferred between processes).
+    - The model and the simulation parameters are parsed once (see :class:`SimulationSetup`), and the prepared set-up
+      is shipped to the replications, which only pay for their stochastic run.
+    - If the artifact cache is enabled (see :mod:`simod.cache`), the simulated log of each replication is reused when
+      the same model (BPMN and parameters) was already simulated with the same number of cases, start time, and seed.
+    - The results of each seeded replication are also cached, keyed by the hash of the model, the number of cases, the
+      start time, the reference log, the metrics, and the seed of the replication, in a bounded in-memory cache (see
+      :func:`simod.cache.get_simulation_cache`) and in the artifact cache (if enabled). Re-evaluating a model skips
+      its simulation, unless the simulated logs have to be kept.
+    - With a stopping rule, the replications of each batch are only simulated once the previous batch is evaluated,
+      so the number of returned results may be lower than `num_simulations`.
+    - With a racing rule, the results are evaluated as the replications finish, and only the results obtained until
+      the model is found to be losing are returned. The replications not started are cancelled, and the ones already
+      running skip their evaluation.
     """
-
-    simulation_log_paths = simulate_in_parallel(
-        process_model_path, num_simulations, output_dir, parameters_path, simulation_cases, simulation_start_time
+    reference_profile = _reference_profile_for(reference_profile, validation_log, validation_log_ids, metrics)
+    cache = get_artifact_cache()
+    # Inputs determining the results of a replication (besides its index and seed), to reuse them if already computed
+    model_key = hash_parts(
+        process_model_path,
+        parameters_path,
+        simulation_cases,
+        simulation_start_time,
+        reference_profile.fingerprint,
+        metrics,
     )
+    # Replications to run at once (all of them, or batches of them if stopping when the results are precise enough)
+    batch_size = max(1, num_simulations if stopping_rule is None else min(stopping_rule.batch_size, num_simulations))
+    batches = [
+        range(index, min(index + batch_size, num_simulations)) for index in range(0, num_simulations, batch_size)
+    ]
 
-    evaluation_measurements = evaluate_logs(metrics, simulation_log_paths, validation_log, validation_log_ids)
+    # Simulation set-up parsed once and shipped to all the replications (if any of them has to be simulated)
+    setup = None
+
+    evaluation_measurements = []
+    with _executor_for(executor, batch_size) as pool:
+        # Event signaling the running replications to skip their evaluation (set only if the model is discarded)
+        cancelled = pool.create_event() if racing_rule is not None else None
+        for batch in batches:
+            replication_arguments, results_keys = [], []
+            for rep in batch:
+                replication_seed = get_replication_seed(seed, rep)
+                results_key = hash_parts(model_key, rep, replication_seed)
+                # Reuse only reproducible results, and simulate again if the simulated logs have to be written
+                cached_results = None
+                if replication_seed is not None and not keep_simulated_logs:
+                    cached_results = _get_cached_replication_results(cache, results_key)
+                if cached_results is not None:
+                    evaluation_measurements += cached_results
+                    continue
+                if setup is None:
+                    setup = SimulationSetup(
+                        process_model_path, parameters_path, simulation_cases, simulation_start_time
+                    )
+                replication_arguments.append(
+                    (
+                        ProsimosSettings(
+                            bpmn_path=process_model_path,
+                            parameters_path=parameters_path,
+                            output_log_path=output_dir / f"simulated_log_{rep}.csv" if keep_simulated_logs else None,
+                            num_simulation_cases=simulation_cases,
+                            simulation_start=simulation_start_time,
+                            seed=replication_seed,
+                            budget=budget,
+                            setup=setup,
+                            warnings_path=output_dir / SIMULATION_WARNINGS_FILE_NAME,
+                        ),
+                        rep,
+                        reference_profile,
+                        metrics,
+                        _simulated_log_cache_entry(
+                            cache,
+                            process_model_path,
+                            parameters_path,
+                            simulation_cases,
+                            simulation_start_time,
+                            rep,
+                            replication_seed,
+                        ),
+                        cancelled,
+                    )
+                )
+                results_keys.append((results_key, replication_seed))
+            if len(replication_arguments) < len(batch):
+                print_notice(f"Reusing the results of {len(batch) - len(replication_arguments)} cached replications")
+            if replication_arguments:
+                if racing_rule is None:
+                    num_workers = min(len(replication_arguments), pool.num_workers)
+                    print_notice(
+                        f"Simulating and evaluating {len(replication_arguments)} times with {num_workers} workers"
+                    )
+                    batch_measurements = pool.map(_simulate_and_evaluate_replication, replication_arguments)
+                    for (results_key, replication_seed), results in zip(results_keys, batch_measurements):
+                        _store_replication_results(cache, results_key, replication_seed, results)
+                        evaluation_measurements += results
+                elif _race_replications(
+                    pool,
+                    replication_arguments,
+                    results_keys,
+                    racing_rule,
+                    metrics[0],
+                    evaluation_measurements,
+                    cancelled,
+                    cache,
+                ):
+                    print_notice(f"Discarding the model after {_count_runs(evaluation_measurements)} replications")
+                    break
+            if stopping_rule is not None and batch[-1] < num_simulations - 1:
+                distances = [
+                    measurement["distance"]
+                    for measurement in evaluation_measurements
+                    if measurement["metric"] == metrics[0]
+                ]
+                if stopping_rule.is_satisfied(distances):
+                    print_notice(f"Stopping after {batch[-1] + 1} of {num_simulations} replications")
+                    break
 
     return evaluation_measurements
 
 
+def _get_cached_replication_results(cache: Optional[ArtifactCache], results_key: str) -> Optional[List[dict]]:
+    """
+    Looks up the results of a (seeded) replication in the in-memory cache and in the artifact cache (if enabled),
+    returning a copy of them (or None if not cached).
+    """
+    results = get_simulation_cache().get(results_key)
+    if results is None and cache is not None:
+        results = cache.get_object("simulation_results", cache.key(results_key))
+    return [dict(measurement) for measurement in results] if results is not None else None
+
+
+def _store_replication_results(
+    cache: Optional[ArtifactCache], results_key: str, replication_seed: Optional[int], results: List[dict]
+):
+    """
+    Stores the results of a replication in the in-memory cache and in the artifact cache (if enabled). Only the results
+    of seeded replications are stored, as the unseeded ones are not reproducible.
+    """
+    if replication_seed is None or len(results) == 0:
+        return  # Not reproducible, or evaluation skipped
+    get_simulation_cache().put(results_key, [dict(measurement) for measurement in results])
+    if cache is not None:
+        cache.put_object("simulation_results", cache.key(results_key), results)
+
+
+def _race_replications(
+    pool: SimulationExecutor,
+    replication_arguments: List[Tuple],
+    results_keys: List[Tuple[str, Optional[int]]],
+    racing_rule: RacingRule,
+    metric: Metric,
+    evaluation_measurements: List[dict],
+    cancelled: threading.Event,
+    cache: Optional[ArtifactCache],
+) -> bool:
+    """
+    Runs the replications, adding their results to [evaluation_measurements] (and storing them in the caches) as they
+    finish, until all of them are evaluated or the model is losing according to [racing_rule]. In that case, the
+    outstanding replications are cancelled, and True is returned.
+    """
+    futures = {
+        pool.submit(_simulate_and_evaluate_replication, arguments): results_key
+        for arguments, results_key in zip(replication_arguments, results_keys)
+    }
+    pending = set(futures)
+    while len(pending) > 0:
+        distances = [
+            measurement["distance"] for measurement in evaluation_measurements if measurement["metric"] == metric
+        ]
+        if racing_rule.is_losing(distances):
+            _cancel_replications(pending, cancelled)
+            return True
+        try:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                _store_replication_results(cache, *futures[future], results)
+                evaluation_measurements += results
+        except Exception:
+            _cancel_replications(pending, cancelled)
+            raise
+    return False
+
+
+def _cancel_replications(futures: Set[Future], cancelled: threading.Event):
+    running = [future for future in futures if not future.cancel()]
+    if len(running) > 0:
+        # Signal the running replications to skip their evaluation
+        cancelled.set()
+
+
+def _count_runs(evaluation_measurements: List[dict]) -> int:
+    return len({measurement["run_num"] for measurement in evaluation_measurements})
+
+
 def simulate_in_parallel(
     process_model_path: Path,
     num_simulations: int,
@@ -135,6 +799,8 @@ def simulate_in_parallel(
     parameters_path: Path,
     simulation_cases: int,
     simulation_start_time: pd.Timestamp,
+    executor: Optional[SimulationExecutor] = None,
+    seed: Optional[int] = None,
 ) -> List[Path]:
     """
     Simulates a process model using Prosimos num_simulations times in parallel.
@@ -145,12 +811,12 @@ def simulate_in_parallel(
     :param parameters_path: Path to the Prosimos parameters.
     :param simulation_cases: Number of cases to simulate.
     :param simulation_start_time: Start time of the simulation.
+    :param executor: Pool of workers to run the simulations in. If not provided, a temporary one is created.
+    :param seed: Seed of the run, from which the seed of each replication is derived (see :func:`get_replication_seed`).
     :return: Paths to the simulated logs.
     """
-    global cpu_count
-
-    w_count = min(num_simulations, cpu_count)
-
+    # Parse the model and parameters once for all the replications
+    setup = SimulationSetup(process_model_path, parameters_path, simulation_cases, simulation_start_time)
     simulation_arguments = [
         ProsimosSettings(
             bpmn_path=process_model_path,
@@ -158,13 +824,15 @@ def simulate_in_parallel(
             output_log_path=output_dir / f"simulated_log_{rep}.csv",
             num_simulation_cases=simulation_cases,
             simulation_start=simulation_start_time,
+            seed=get_replication_seed(seed, rep),
+            setup=setup,
         )
         for rep in range(num_simulations)
     ]
 
-    print_notice(f"Simulating {len(simulation_arguments)} times with {w_count} workers")
-
-    with Pool(w_count) as pool:
+    with _executor_for(executor, num_simulations) as pool:
+        w_count = min(num_simulations, pool.num_workers)
+        print_notice(f"Simulating {len(simulation_arguments)} times with {w_count} workers")
         pool.map(simulate, simulation_arguments)
 
     simulation_log_paths = [simulation_argument.output_log_path for simulation_argument in simulation_arguments]
@@ -177,58 +845,124 @@ def evaluate_logs(
     simulation_log_paths: List[Path],
     validation_log: pd.DataFrame,
     validation_log_ids: EventLogIDs,
+    executor: Optional[SimulationExecutor] = None,
 ) -> List[dict]:
     """
     Calculates the evaluation metrics for the simulated logs comparing it with the validation log.
     """
-    global cpu_count
-
-    w_count = min(len(simulation_log_paths), cpu_count)
-
-    # Read simulated logs
-
-    read_arguments = [
-        (simulation_log_paths[index], PROSIMOS_LOG_IDS, index) for index in range(len(simulation_log_paths))
-    ]
+    with _executor_for(executor, len(simulation_log_paths)) as pool:
+        w_count = min(len(simulation_log_paths), pool.num_workers)
+        # Read simulated logs
+        read_arguments = [
+            (simulation_log_paths[index], PROSIMOS_LOG_IDS, index) for index in range(len(simulation_log_paths))
+        ]
+        print_notice(f"Reading {len(read_arguments)} simulated logs with {w_count} workers")
+        simulated_logs = pool.map(_read_simulated_log, read_arguments)
+        # Evaluate
+        reference_profile = ReferenceProfile(validation_log, validation_log_ids, metrics)
+        evaluation_arguments = [(reference_profile, log, PROSIMOS_LOG_IDS, metrics) for log in simulated_logs]
+        print_notice(f"Evaluating {len(evaluation_arguments)} simulated logs with {w_count} workers")
+        evaluation_measurements = pool.map(_evaluate_logs_using_metrics, evaluation_arguments)
+    evaluation_measurements = list(itertools.chain.from_iterable(evaluation_measurements))
 
-    print_notice(f"Reading {len(read_arguments)} simulated logs with {w_count} workers")
+    return evaluation_measurements
 
-    with Pool(w_count) as pool:
-        simulated_logs = pool.map(_read_simulated_log, read_arguments)
 
-    # Evaluate
+def _executor_for(executor: Optional[SimulationExecutor], num_tasks: int):
+    """
+    Returns a context manager wrapping the provided executor (left running on exit), or a temporary one with enough
+    workers for [num_tasks] (shut down on exit) if not provided.
+    """
+    if executor is not None:
+        return nullcontext(executor)
+    return SimulationExecutor(min(max(num_tasks, 1), cpu_count))
 
-    evaluation_arguments = [
-        (validation_log, validation_log_ids, log, PROSIMOS_LOG_IDS, metrics) for log in simulated_logs
-    ]
 
-    print_notice(f"Evaluating {len(evaluation_arguments)} simulated logs with {w_count} workers")
+def _reference_profile_for(
+    reference_profile: Optional[ReferenceProfile],
+    validation_log: pd.DataFrame,
+    validation_log_ids: EventLogIDs,
+    metrics: List[Metric],
+) -> ReferenceProfile:
+    """
+    Returns the provided reference profile if it covers all [metrics], or computes a new one from the validation log.
+    """
+    if reference_profile is not None and set(metrics).issubset(reference_profile.metrics):
+        return reference_profile
+    return ReferenceProfile(validation_log, validation_log_ids, metrics)
 
-    with Pool(w_count) as pool:
-        evaluation_measurements = pool.map(_evaluate_logs_using_metrics, evaluation_arguments)
-    evaluation_measurements = list(itertools.chain.from_iterable(evaluation_measurements))
 
-    return evaluation_measurements
+def _simulated_log_cache_entry(
+    cache: Optional[ArtifactCache],
+    process_model_path: Path,
+    parameters_path: Path,
+    simulation_cases: int,
+    simulation_start_time: pd.Timestamp,
+    simulation_repetition_index: int,
+    seed: Optional[int],
+) -> Optional[Tuple[ArtifactCache, str, Optional[Path]]]:
+    """
+    Looks up the simulated log of a replication in the artifact cache (in the main process, so the lookup is recorded
+    in its statistics), returning the cache, the key, and the path to the cached log (if any) for the worker.
+    """
+    if cache is None:
+        return None
+    key = cache.key(
+        process_model_path, parameters_path, simulation_cases, simulation_start_time, simulation_repetition_index, seed
+    )
+    return cache, key, cache.get_path("simulated_log", key, ".pkl")
+
+
+def _simulate_and_evaluate_replication(arguments: Tuple) -> List[dict]:
+    settings: ProsimosSettings = arguments[0]
+    simulation_repetition_index: int = arguments[1]
+    reference_profile: ReferenceProfile = arguments[2]
+    metrics: List[Metric] = arguments[3]
+    cache_entry: Optional[Tuple[ArtifactCache, str, Optional[Path]]] = arguments[4]
+    cancelled: Optional[threading.Event] = arguments[5]
+
+    if cancelled is not None and cancelled.is_set():
+        return []
+
+    simulated_log = None
+    if cache_entry is not None and cache_entry[2] is not None:
+        simulated_log = ArtifactCache.read_object(cache_entry[2])
+        if simulated_log is not None and settings.output_log_path is not None:
+            simulated_log.to_csv(settings.output_log_path, index=False)
+    if simulated_log is None:
+        simulated_log = simulate(settings)
+        if simulated_log is None:
+            simulated_log = read_csv_log(settings.output_log_path, log_ids=PROSIMOS_LOG_IDS)
+        if cache_entry is not None:
+            cache, key, _ = cache_entry
+            cache.put_object("simulated_log", key, simulated_log)
+    _add_simulation_columns(simulated_log, simulation_repetition_index)
+    if cancelled is not None and cancelled.is_set():
+        return []
+
+    return _evaluate_logs_using_metrics((reference_profile, simulated_log, PROSIMOS_LOG_IDS, metrics))
 
 
 def _read_simulated_log(arguments: Tuple):
     log_path, log_ids, simulation_repetition_index = arguments
 
     df = read_csv_log(log_path, log_ids=log_ids)
-
-    df["role"] = df["resource"]
-    df["source"] = "simulation"
-    df["run_num"] = simulation_repetition_index
+    _add_simulation_columns(df, simulation_repetition_index)
 
     return df
 
 
+def _add_simulation_columns(simulated_log: pd.DataFrame, simulation_repetition_index: int):
+    simulated_log["role"] = simulated_log["resource"]
+    simulated_log["source"] = "simulation"
+    simulated_log["run_num"] = simulation_repetition_index
+
+
 def _evaluate_logs_using_metrics(arguments: Tuple) -> List[dict]:
-    validation_log: pd.DataFrame = arguments[0]
-    validation_log_ids: EventLogIDs = arguments[1]
-    simulated_log: pd.DataFrame = arguments[2]
-    simulated_log_ids: EventLogIDs = arguments[3]
-    metrics: List[Metric] = arguments[4]
+    reference_profile: ReferenceProfile = arguments[0]
+    simulated_log: pd.DataFrame = arguments[1]
+    simulated_log_ids: EventLogIDs = arguments[2]
+    metrics: List[Metric] = arguments[3]
 
     if len(simulated_log) > 0:
         rep = simulated_log.iloc[0].run_num
@@ -238,7 +972,7 @@ def _evaluate_logs_using_metrics(arguments: Tuple) -> List[dict]:
 
     measurements = []
     for metric in metrics:
-        value = compute_metric(metric, validation_log, validation_log_ids, simulated_log, simulated_log_ids)
+        value = reference_profile.compute_metric(metric, simulated_log, simulated_log_ids)
         measurements.append({"run_num": rep, "metric": metric, "distance": value})
 
     return measurements
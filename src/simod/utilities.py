@@ -1,3 +1,4 @@
+import itertools
 import math
 import os
 import platform
@@ -5,10 +6,18 @@ import subprocess
 import time
 import traceback
 from builtins import float
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import Callable, List, Optional, Tuple, Union
 
-from hyperopt import STATUS_FAIL, STATUS_OK
+import numpy as np
+from hyperopt import JOB_STATE_DONE, STATUS_FAIL, STATUS_OK, Domain, Trials, fmin, tpe
+from hyperopt.base import Ctrl, spec_from_misc
+from hyperopt.fmin import generate_trial
+from hyperopt.pyll_utils import expr_to_config
+from hyperopt.utils import coarse_utcnow
+
+from simod.cli_formatter import print_notice
 
 
 def get_project_dir() -> Path:
@@ -39,6 +48,245 @@ def hyperopt_step(status: str, fn, *args) -> Tuple[str, object]:
         return status, None
 
 
+def hyperopt_minimize(
+    fn: Callable,
+    space: dict,
+    max_evals: int,
+    trials: Trials,
+    max_parallel_trials: int = 1,
+    checkpoint: Optional[Callable[[Trials], None]] = None,
+    seed: Optional[int] = None,
+) -> dict:
+    """
+    Minimizes [fn] over [space] with TPE, evaluating up to [max_parallel_trials] candidates concurrently.
+
+    With one trial at a time, this is the same as calling hyperopt's fmin. Otherwise, the candidates are suggested in
+    batches following a constant-liar strategy: each new candidate of a batch is suggested assuming that the pending
+    ones obtained the worst loss observed so far (so TPE does not propose the same region again), and the batch is
+    evaluated concurrently in threads. The real results replace the lies once the batch finishes, so [trials] ends
+    up as if the candidates had been evaluated sequentially.
+
+    If [space] is finite (only constants and choices) and has no more points than [max_evals], TPE is skipped: each
+    point is evaluated exactly once (in batches of [max_parallel_trials] concurrent points), and the optimization stops
+    without spending the rest of the budget.
+
+    If [trials] already contains evaluated candidates (e.g., restored from a checkpoint), the optimization continues
+    from them, evaluating only the remaining ones up to [max_evals].
+
+    :param fn: function to minimize, receiving the sampled parameters and returning a hyperopt response.
+    :param space: hyperopt search space.
+    :param max_evals: total number of candidates to evaluate.
+    :param trials: hyperopt trials to store the evaluated candidates.
+    :param max_parallel_trials: maximum number of candidates to evaluate concurrently. [fn] must be thread-safe if
+        greater than 1.
+    :param checkpoint: function called with [trials] each time new candidates finish their evaluation (e.g., to save
+        the progress of the optimization).
+    :param seed: seed of the random number generator used by TPE, or None to use a random one.
+    :return: the best parameters found (in the same format as fmin).
+    """
+    domain = Domain(fn, space)
+    finite_points = get_finite_search_space_points(domain)
+    if finite_points is not None and 0 < len(finite_points) <= max_evals:
+        print_notice(f"Finite search space, evaluating its {len(finite_points)} point(s) instead of {max_evals} trials")
+        evaluated_points = [
+            {label: values[0] for label, values in doc["misc"]["vals"].items()} for doc in trials.trials
+        ]
+        pending_points = [point for point in finite_points if point not in evaluated_points]
+        batch_size = max(1, max_parallel_trials)
+        with ThreadPoolExecutor(max_workers=batch_size) as threads:
+            for index in range(0, len(pending_points), batch_size):
+                batch_points = pending_points[index : index + batch_size]
+                trials.insert_trial_docs(
+                    [
+                        generate_trial(tid, point)
+                        for tid, point in zip(trials.new_trial_ids(len(batch_points)), batch_points)
+                    ]
+                )
+                trials.refresh()
+                _evaluate_trial_docs(domain, trials, trials.trials[-len(batch_points) :], threads)
+                if checkpoint is not None:
+                    checkpoint(trials)
+        return trials.argmin
+
+    # Random number generator of TPE (if not seeded, fmin uses a random one)
+    rstate = np.random.default_rng(seed) if seed is not None else None
+    if max_parallel_trials <= 1:
+        if checkpoint is None:
+            return fmin(
+                fn=fn,
+                space=space,
+                algo=tpe.suggest,
+                max_evals=max_evals,
+                trials=trials,
+                rstate=rstate,
+                show_progressbar=False,
+            )
+        # One candidate at a time, to save the progress after each of them
+        while len(trials.trials) < max_evals:
+            fmin(
+                fn=fn,
+                space=space,
+                algo=tpe.suggest,
+                max_evals=len(trials.trials) + 1,
+                trials=trials,
+                rstate=rstate,
+                show_progressbar=False,
+                return_argmin=False,
+            )
+            checkpoint(trials)
+        return trials.argmin
+
+    if rstate is None:
+        rstate = np.random.default_rng()
+    with ThreadPoolExecutor(max_workers=max_parallel_trials) as threads:
+        while len(trials.trials) < max_evals:
+            batch = []
+            for _ in range(min(max_parallel_trials, max_evals - len(trials.trials))):
+                # Lie about the result of the pending candidates of this batch
+                observed_losses = [loss for loss in trials.losses() if loss is not None]
+                if len(observed_losses) > 0:
+                    for doc in batch:
+                        doc["result"] = {"status": STATUS_OK, "loss": max(observed_losses)}
+                new_ids = trials.new_trial_ids(1)
+                trials.refresh()
+                new_trials = tpe.suggest(new_ids, domain, trials, rstate.integers(2**31 - 1))
+                trials.insert_trial_docs(new_trials)
+                trials.refresh()
+                # Keep the reference to the inserted documents (so their results can be filled)
+                batch += trials.trials[-len(new_trials) :]
+            # Evaluate the batch concurrently
+            _evaluate_trial_docs(domain, trials, batch, threads)
+            if checkpoint is not None:
+                checkpoint(trials)
+
+    return trials.argmin
+
+
+def _evaluate_trial_docs(domain: Domain, trials: Trials, docs: List[dict], threads: ThreadPoolExecutor):
+    # Evaluate the trials concurrently, and store their real results once all of them finish
+    evaluations = [
+        threads.submit(domain.evaluate, spec_from_misc(doc["misc"]), Ctrl(trials, current_trial=doc)) for doc in docs
+    ]
+    for doc, evaluation in zip(docs, evaluations):
+        doc["result"] = evaluation.result()
+        doc["state"] = JOB_STATE_DONE
+        doc["refresh_time"] = coarse_utcnow()
+    trials.refresh()
+
+
+def get_multi_fidelity_levels(
+    num_candidates: int, reduction_factor: int = 3, min_fidelity: float = 0.0
+) -> List[float]:
+    """
+    Computes the fidelity levels (fraction of the full evaluation, in increasing order) of a successive halving over
+    [num_candidates] candidates: one level per rung, from the one where all the candidates are evaluated to the one
+    where a single candidate is left, each of them [reduction_factor] times the fidelity of the previous one.
+
+    :param num_candidates: number of candidates evaluated at the lowest fidelity.
+    :param reduction_factor: factor by which the number of candidates is reduced (and the fidelity increased) in each
+        rung.
+    :param min_fidelity: minimum fidelity of the lowest rung. The lowest rungs below it are left out, so the
+        candidates are evaluated with [min_fidelity] or more, and more than one candidate may reach the last rung.
+    :return: the fidelity of each rung, the last one being 1.0 (a single rung if there are fewer candidates than
+        [reduction_factor]).
+    """
+    num_rungs = 1
+    while reduction_factor**num_rungs <= num_candidates and 1.0 / reduction_factor**num_rungs >= min_fidelity:
+        num_rungs += 1
+    return [1.0 / reduction_factor ** (num_rungs - 1 - rung) for rung in range(num_rungs)]
+
+
+def successive_halving(
+    trials: Trials,
+    evaluate: Callable[[dict, int], Optional[float]],
+    num_rungs: int,
+    reduction_factor: int = 3,
+    max_parallel_trials: int = 1,
+    checkpoint: Optional[Callable[[Trials], None]] = None,
+) -> Optional[Tuple[dict, dict]]:
+    """
+    Promotes the best candidates of [trials] (already evaluated at the lowest fidelity, i.e., rung 0) through
+    [num_rungs] rungs of increasing fidelity: in each rung, the best 1/[reduction_factor] of the candidates of the
+    previous one are re-evaluated with [evaluate], and the rest are discarded.
+
+    The loss obtained in each rung is stored in the hyperopt result of the candidate (``rung_losses``), together with
+    the last rung it reached (``rung``, and its ``loss`` updated), so a resumed optimization does not evaluate them
+    again. Trials reusing the evaluation of a previous one (same ``output_dir`` in their results) are promoted once.
+
+    :param trials: hyperopt trials with the candidates evaluated at the lowest fidelity.
+    :param evaluate: function receiving the hyperopt result of a candidate and a rung, and returning the loss of the
+        candidate at the fidelity of that rung (or None if the evaluation failed). Must be thread-safe if
+        [max_parallel_trials] is greater than 1.
+    :param num_rungs: number of rungs, including the lowest one.
+    :param reduction_factor: factor by which the number of candidates is reduced in each rung.
+    :param max_parallel_trials: maximum number of candidates to evaluate concurrently.
+    :param checkpoint: function called with [trials] after each rung (e.g., to save the progress of the optimization).
+    :return: the parameters (in the same format as fmin) and the hyperopt result of the best candidate in the highest
+        rung reached, or None if no candidate was successfully evaluated.
+    """
+    # Successful candidates, once per evaluated model
+    candidates, output_dirs = [], set()
+    for doc in trials.trials:
+        result = doc["result"]
+        if result.get("status") == STATUS_OK and result.get("output_dir") not in output_dirs:
+            output_dirs.add(result.get("output_dir"))
+            result.setdefault("rung_losses", [result["loss"]])
+            result.setdefault("rung", 0)
+            candidates.append(doc)
+    if len(candidates) == 0:
+        return None
+
+    last_rung = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel_trials)) as threads:
+        for rung in range(1, num_rungs):
+            num_promoted = max(1, len(candidates) // reduction_factor)
+            promoted = sorted(candidates, key=lambda doc: doc["result"]["rung_losses"][rung - 1])[:num_promoted]
+            print_notice(f"Promoting {len(promoted)} of {len(candidates)} candidates to rung {rung}")
+            pending = [doc for doc in promoted if len(doc["result"]["rung_losses"]) <= rung]
+            losses = list(threads.map(lambda doc: evaluate(doc["result"], rung), pending))
+            for doc, loss in zip(pending, losses):
+                loss = float("inf") if loss is None or loss < 0.0 else float(loss)
+                doc["result"]["rung_losses"].append(loss)
+                doc["result"]["loss"] = loss
+                doc["result"]["rung"] = rung
+            trials.refresh()
+            if checkpoint is not None:
+                checkpoint(trials)
+            # Discard the candidates whose evaluation failed (unless all of them did)
+            successful = [doc for doc in promoted if math.isfinite(doc["result"]["rung_losses"][rung])]
+            if len(successful) == 0:
+                break
+            candidates, last_rung = successful, rung
+
+    best_doc = min(candidates, key=lambda doc: doc["result"]["rung_losses"][last_rung])
+    best_params = {label: values[0] for label, values in best_doc["misc"]["vals"].items() if len(values) > 0}
+    return best_params, best_doc["result"]
+
+
+def get_finite_search_space_points(domain: Domain) -> Optional[List[dict]]:
+    """
+    Enumerates the points of a hyperopt search space composed only of constants and (non-nested) choices.
+
+    :param domain: hyperopt domain with the search space.
+    :return: the list of points, each one a dict with the index of the selected option of each choice (i.e., the
+        format of fmin's output), or None if the space is not finite (e.g., it has uniform distributions).
+    """
+    hyperparameters = {}
+    expr_to_config(domain.expr, None, hyperparameters)
+    options = {}
+    for label, hyperparameter in hyperparameters.items():
+        node = hyperparameter["node"]
+        # hp.choice is a randint over the indices of the options (conditional parameters are not enumerated)
+        if node.name != "randint" or len(node.pos_args) != 1 or hyperparameter["conditions"] != {()}:
+            return None
+        upper = node.pos_args[0]
+        if upper.name != "literal" or not isinstance(upper.obj, int):
+            return None
+        options[label] = range(upper.obj)
+    labels = list(options.keys())
+    return [dict(zip(labels, indices)) for indices in itertools.product(*options.values())]
+
+
 def nearest_divisor_for_granularity(granularity: int) -> int:
     closest = 1440
     closest_diff = abs(granularity - closest)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import pytest
@@ -17,3 +18,11 @@ def entry_point() -> Path:
         return Path('../assets')
     else:
         return Path('tests/assets')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def preprocessing_cache_dir(tmp_path_factory) -> Path:
+    # Keep the pre-processed logs cached by the tests out of the user cache directory
+    cache_dir = tmp_path_factory.mktemp('simod_cache')
+    os.environ['SIMOD_CACHE_DIR'] = str(cache_dir)
+    return cache_dir
@@ -0,0 +1,160 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+from pix_framework.io.event_log import APROMORE_LOG_IDS
+
+from simod.cache import (
+    ArtifactCache,
+    MemoryCache,
+    disable_artifact_cache,
+    disable_preprocessing_cache,
+    enable_artifact_cache,
+    enable_preprocessing_cache,
+    get_preprocessing_cache,
+    hash_parts,
+)
+from simod.event_log.event_log import EventLog
+from simod.settings.preprocessing_settings import PreprocessingSettings
+
+
+def test_artifact_cache_keys(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_size=10**6)
+    file_a = tmp_path / "a.txt"
+    file_b = tmp_path / "b.txt"
+    file_a.write_text("content")
+    file_b.write_text("content")
+    df = pd.DataFrame({"case": [1, 2], "activity": ["A", "B"]})
+
+    # Files are hashed by content, and DataFrames by their values
+    assert cache.key(file_a, 0.5) == cache.key(file_b, 0.5)
+    assert cache.key(file_a, 0.5) != cache.key(file_a, 0.6)
+    assert cache.key(df) == cache.key(df.copy())
+    assert cache.key(df) != cache.key(df.assign(activity=["A", "C"]))
+    assert cache.key("a", "bc") != cache.key("ab", "c")
+
+
+def test_artifact_cache_objects_and_files(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_size=10**6)
+    key = cache.key("object")
+
+    assert cache.get_object("objects", key) is None
+    cache.put_object("objects", key, {"value": 1})
+    assert cache.get_object("objects", key) == {"value": 1}
+
+    source = tmp_path / "model.bpmn"
+    source.write_text("<definitions/>")
+    assert cache.get_path("models", key, ".bpmn") is None
+    cache.put_file("models", key, source, ".bpmn")
+    assert cache.get_path("models", key, ".bpmn").read_text() == "<definitions/>"
+
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 2,
+        "evictions": 0,
+        "artifacts": {"objects": {"hits": 1, "misses": 1}, "models": {"hits": 1, "misses": 1}},
+    }
+
+
+def test_artifact_cache_lru_eviction(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_size=2500)
+    keys = [cache.key(i) for i in range(3)]
+    cache.put_object("objects", keys[0], b"0" * 1000)
+    cache.put_object("objects", keys[1], b"1" * 1000)
+    # Use the first artifact, so the second one is the least recently used
+    past = time.time() - 60
+    os.utime(cache.directory / "objects" / f"{keys[1]}.pkl", (past, past))
+    assert cache.get_object("objects", keys[0]) is not None
+    cache.put_object("objects", keys[2], b"2" * 1000)
+
+    assert cache.get_object("objects", keys[0]) is not None
+    assert cache.get_object("objects", keys[1]) is None
+    assert cache.get_object("objects", keys[2]) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_artifact_cache_scans_when_full(tmp_path, monkeypatch):
+    cache = ArtifactCache(tmp_path / "cache", max_size=2500)
+    scans = []
+    evict = cache._evict
+
+    def counting_evict():
+        scans.append(True)
+        evict()
+
+    monkeypatch.setattr(cache, "_evict", counting_evict)
+    for i in range(2):
+        cache.put_object("objects", cache.key(i), bytes(1000))
+    # Only the initial scan while the cache fits in its maximum size
+    assert len(scans) == 1
+    cache.put_object("objects", cache.key(2), bytes(1000))
+    assert len(scans) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+
+def test_memory_cache_lru_eviction():
+    cache = MemoryCache(max_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    # Use the first entry, so the second one is the least recently used
+    assert cache.get("a") == [1]
+    cache.put("c", [3])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.get("c") == [3]
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "entries": 2}
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_hash_parts(tmp_path):
+    file_a = tmp_path / "a.txt"
+    file_a.write_text("content")
+    key = hash_parts(file_a, 5, None)
+
+    assert key == hash_parts(file_a, 5, None)
+    assert key != hash_parts(file_a, 6, None)
+    file_a.write_text("other content")
+    assert key != hash_parts(file_a, 5, None)
+
+@pytest.mark.integration
+def test_preprocessing_cache(tmp_path, entry_point):
+    log_ids = APROMORE_LOG_IDS
+    log_path = tmp_path / "log.csv"
+    shutil.copyfile(entry_point / "Simple_log_no_start_times.csv", log_path)
+    cache = enable_artifact_cache(tmp_path / "cache", 10**8)
+    try:
+        first = EventLog.from_path(log_path, log_ids)
+        second = EventLog.from_path(log_path, log_ids)
+        # Different pre-processing settings
+        EventLog.from_path(log_path, log_ids, PreprocessingSettings(multitasking=True))
+        assert cache.stats()["artifacts"]["preprocessed_log"] == {"hits": 1, "misses": 2}
+        pd.testing.assert_frame_equal(first.log, second.log)
+        # Different content of the log file
+        log_path.write_text(log_path.read_text().replace("First-task", "Initial-task"))
+        EventLog.from_path(log_path, log_ids)
+        assert cache.stats()["artifacts"]["preprocessed_log"] == {"hits": 1, "misses": 3}
+    finally:
+        disable_artifact_cache()
+
+
+def test_preprocessing_cache_default(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIMOD_CACHE_DIR", str(tmp_path / "default"))
+
+    assert get_preprocessing_cache().directory == tmp_path / "default"
+    # The artifact cache is used if enabled
+    cache = enable_artifact_cache(tmp_path / "cache", 10**8)
+    try:
+        assert get_preprocessing_cache() is cache
+    finally:
+        disable_artifact_cache()
+    # Disabled
+    disable_preprocessing_cache()
+    try:
+        assert get_preprocessing_cache() is None
+    finally:
+        enable_preprocessing_cache()
@@ -0,0 +1,31 @@
+from simod.checkpoint import PipelineCheckpoint
+from simod.runtime_meter import RuntimeMeter
+from simod.settings.simod_settings import SimodSettings
+from simod.simulation.parameters.BPS_model import BPSModel
+
+
+def test_pipeline_checkpoint(tmp_path, entry_point):
+    checkpoint = PipelineCheckpoint(tmp_path / "checkpoint")
+    settings = SimodSettings.from_path(entry_point / "configuration_simod_basic.yml")
+    bps_model = BPSModel(process_model=tmp_path / "model.bpmn")
+
+    assert not checkpoint.is_completed(RuntimeMeter.CONTROL_FLOW_MODEL)
+    assert checkpoint.load_stage(RuntimeMeter.CONTROL_FLOW_MODEL) is None
+    assert checkpoint.matches("fingerprint")
+    checkpoint.save_settings(settings, fingerprint="fingerprint")
+    checkpoint.save_stage(RuntimeMeter.CONTROL_FLOW_MODEL, bps_model=bps_model, runtimes={"stage": 1.0})
+
+    # A new instance over the same directory restores the stored results
+    restored = PipelineCheckpoint(tmp_path / "checkpoint")
+    assert restored.is_completed(RuntimeMeter.CONTROL_FLOW_MODEL)
+    assert not restored.is_completed(RuntimeMeter.RESOURCE_MODEL)
+    stage = restored.load_stage(RuntimeMeter.CONTROL_FLOW_MODEL)
+    assert stage["bps_model"].process_model == bps_model.process_model
+    assert stage["runtimes"] == {"stage": 1.0}
+    assert restored.load_settings().to_dict() == settings.to_dict()
+    assert restored.matches("fingerprint")
+    assert not restored.matches("other fingerprint")
+
+    restored.clear()
+    assert not restored.is_completed(RuntimeMeter.CONTROL_FLOW_MODEL)
+    assert restored.load_settings() is None
@@ -7,7 +7,13 @@ from lxml import etree
 from pix_framework.discovery.gateway_probabilities import GatewayProbabilitiesDiscoveryMethod
 from pix_framework.io.bpmn import get_activities_names_from_bpmn
 
-from simod.control_flow.discovery import discover_process_model, post_process_bpmn_self_loops
+from simod.control_flow.discovery import (
+    are_structurally_identical,
+    discover_process_model,
+    get_bpmn_structural_hash,
+    get_bpmn_structure_graph,
+    post_process_bpmn_self_loops,
+)
 from simod.control_flow.settings import HyperoptIterationParams
 from simod.settings.common_settings import Metric
 from simod.settings.control_flow_settings import ProcessModelDiscoveryAlgorithm
@@ -149,3 +155,37 @@ def test_transform_process_model_explicit_self_loops(entry_point):
         # Verify number of gateways is original + 2 per self-loop activity
         exclusive_gateways = root.findall(".//bpmn:exclusiveGateway", namespaces=ns)
         assert len(exclusive_gateways) == 18, "There should only be 18 exclusive gateways in this model"
+
+
+def test_bpmn_structural_hash(entry_point, tmp_path):
+    model_path = entry_point / "LoanApp_simplified.bpmn"
+    # Same model with different IDs and elements in reverse order
+    tree = etree.parse(model_path)
+    process = tree.getroot().find("{http://www.omg.org/spec/BPMN/20100524/MODEL}process")
+    id_mapping = {element.get("id"): f"id_{index}" for index, element in enumerate(process) if element.get("id")}
+    for element in process.iter():
+        for attribute in ["id", "sourceRef", "targetRef"]:
+            if element.get(attribute) in id_mapping:
+                element.set(attribute, id_mapping[element.get(attribute)])
+        if element.text in id_mapping:
+            element.text = id_mapping[element.text]
+    process[:] = list(reversed(process))
+    shuffled_model_path = tmp_path / "shuffled.bpmn"
+    tree.write(shuffled_model_path)
+    # Model with an extra self-loop
+    modified_model_path = tmp_path / "modified.bpmn"
+    shutil.copyfile(model_path, modified_model_path)
+    tree = etree.parse(modified_model_path)
+    task = tree.getroot().find(".//{http://www.omg.org/spec/BPMN/20100524/MODEL}task")
+    etree.SubElement(task, "{http://www.omg.org/spec/BPMN/20100524/MODEL}standardLoopCharacteristics")
+    tree.write(modified_model_path)
+    post_process_bpmn_self_loops(modified_model_path)
+
+    structure = get_bpmn_structure_graph(model_path)
+    shuffled_structure = get_bpmn_structure_graph(shuffled_model_path)
+    modified_structure = get_bpmn_structure_graph(modified_model_path)
+
+    assert get_bpmn_structural_hash(structure) == get_bpmn_structural_hash(shuffled_structure)
+    assert are_structurally_identical(structure, shuffled_structure)
+    assert get_bpmn_structural_hash(structure) != get_bpmn_structural_hash(modified_structure)
+    assert not are_structurally_identical(structure, modified_structure)
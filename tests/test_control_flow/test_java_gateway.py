@@ -0,0 +1,125 @@
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+from simod.control_flow import java_gateway
+from simod.control_flow.discovery import add_bpmn_diagram_to_model
+from simod.control_flow.java_gateway import JavaGateway, run_java_command, start_java_gateway, stop_java_gateway
+
+
+def test_run_java_command_without_gateway(monkeypatch):
+    executed = []
+    monkeypatch.setattr(java_gateway, "execute_external_command", executed.append)
+
+    run_java_command(["java", "-Xmx2G", "-jar", "tool.jar", "--input", "log.xes"])
+
+    # Without gateway, the command is executed in a new process
+    assert executed == [["java", "-Xmx2G", "-jar", "tool.jar", "--input", "log.xes"]]
+
+
+def test_run_java_command_falls_back_when_gateway_fails(monkeypatch):
+    executed, jobs = [], []
+    monkeypatch.setattr(java_gateway, "execute_external_command", executed.append)
+
+    class FailingGateway(JavaGateway):
+        is_running = True
+
+        def run_jar(self, jar_path, args) -> bool:
+            jobs.append((jar_path.name, args))
+            return False
+
+    monkeypatch.setattr(java_gateway, "_gateways", [FailingGateway()])
+    monkeypatch.setattr(java_gateway, "_idle_gateways", list(java_gateway._gateways))
+
+    run_java_command(["java", "-jar", '"tool.jar"', '"log.xes"'])
+
+    # The job is sent to the gateway (unquoted), and executed in a new process after failing there
+    assert jobs == [("tool.jar", ["log.xes"])]
+    assert executed == [["java", "-jar", '"tool.jar"', '"log.xes"']]
+
+
+def _fake_java(monkeypatch, script: str):
+    """
+    Replaces the JVM of the gateways by a Python process running [script].
+    """
+    popen = subprocess.Popen
+    monkeypatch.setattr(
+        java_gateway.subprocess, "Popen", lambda args, **kwargs: popen([sys.executable, "-c", script], **kwargs)
+    )
+
+
+def test_gateway_startup_timeout(monkeypatch):
+    _fake_java(monkeypatch, "import time; time.sleep(60)")
+    gateway = JavaGateway(startup_timeout=0.5)
+
+    start = time.perf_counter()
+    # The JVM never gets ready, so it is stopped after the timeout
+    assert not gateway.start()
+    assert time.perf_counter() - start < 30
+    assert not gateway.is_running
+
+
+def test_gateway_job_timeout(monkeypatch):
+    _fake_java(monkeypatch, "import sys, time; print('READY', flush=True); sys.stdin.readline(); time.sleep(60)")
+    gateway = JavaGateway(job_timeout=0.5)
+    assert gateway.start()
+
+    start = time.perf_counter()
+    # The job hangs, so the JVM is killed after the timeout (and the caller falls back to a new process)
+    assert not gateway.run_jar(Path("tool.jar"), ["log.xes"])
+    assert time.perf_counter() - start < 30
+    assert not gateway.is_running
+
+
+def test_concurrent_java_commands_use_different_gateways(monkeypatch):
+    _fake_java(monkeypatch, "import sys\nprint('READY', flush=True)\nfor job in sys.stdin: print('OK', flush=True)")
+    monkeypatch.setattr(java_gateway, "execute_external_command", lambda args: pytest.fail("Not run in a gateway"))
+    assert start_java_gateway()
+    try:
+        # Both jobs wait for each other once they have taken a gateway, so none of them is idle for the other one
+        barrier = threading.Barrier(2, timeout=30)
+        run_jar = JavaGateway.run_jar
+
+        def run_jar_at_once(gateway, jar_path, args):
+            barrier.wait()
+            return run_jar(gateway, jar_path, args)
+
+        monkeypatch.setattr(JavaGateway, "run_jar", run_jar_at_once)
+        threads = [threading.Thread(target=run_java_command, args=(["java", "-jar", "tool.jar"],)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not barrier.broken
+        assert len(java_gateway._gateways) == 2
+        assert len(java_gateway._idle_gateways) == 2
+    finally:
+        stop_java_gateway()
+    assert java_gateway._gateways is None
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(shutil.which("java") is None, reason="Java is not available")
+def test_add_bpmn_diagram_with_gateway(entry_point, tmp_path):
+    model_path = tmp_path / "model.bpmn"
+    shutil.copyfile(entry_point / "LoanApp_simplified.bpmn", model_path)
+
+    assert start_java_gateway()
+    try:
+        # Run the layout twice in the same JVM
+        add_bpmn_diagram_to_model(model_path)
+        add_bpmn_diagram_to_model(model_path)
+        assert len(java_gateway._gateways) == 1
+        assert java_gateway._gateways[0].is_running
+    finally:
+        stop_java_gateway()
+
+    diagram = etree.parse(model_path).getroot().find(".//{http://www.omg.org/spec/BPMN/20100524/DI}BPMNDiagram")
+    assert diagram is not None
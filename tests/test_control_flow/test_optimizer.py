@@ -205,3 +205,14 @@ def test_control_flow_optimizer_model_provided(entry_point, test_data):
     assert len(optimizer.evaluation_measurements) > 0
     iteration_results = pd.DataFrame(optimizer._bayes_trials.results).sort_values(by="loss", ascending=True)
     assert iteration_results[iteration_results["status"] == STATUS_OK].iloc[0]["output_dir"] == result.output_dir
+    # The same model with the same gateway probabilities method is only evaluated once
+    assert len(optimizer._evaluated_candidates) <= len(settings.gateway_probabilities)
+    assert iteration_results["output_dir"].nunique() == len(optimizer._evaluated_candidates)
+    # The search space is finite (only the gateway probabilities method), so each point is evaluated once
+    assert len(optimizer._bayes_trials.trials) == len(settings.gateway_probabilities)
+    # A structurally identical candidate reuses the previous evaluation, without leaving a folder of its own
+    num_iteration_folders = len(list(base_dir.glob("iteration_*")))
+    reused_response = optimizer._hyperopt_iteration({"gateway_probabilities_method": "discovery"})
+    assert reused_response["output_dir"] == result.output_dir
+    assert len(list(base_dir.glob("iteration_*"))) == num_iteration_folders
+    assert optimizer.evaluation_measurements.iloc[-1]["output_dir"] == str(result.output_dir)
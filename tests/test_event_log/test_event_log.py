@@ -1,7 +1,20 @@
+import gzip
+
+import numpy as np
+import pandas as pd
 import pytest
-from pix_framework.io.event_log import APROMORE_LOG_IDS, DEFAULT_XES_IDS
+from lxml import etree
+from pix_framework.io.event_log import APROMORE_LOG_IDS, DEFAULT_XES_IDS, read_csv_log
+from pix_framework.io.event_log import split_log_training_validation_trace_wise
 
-from simod.event_log.event_log import EventLog
+from simod.event_log.event_log import (
+    EventLog,
+    read_event_log,
+    sample_cases_stratified,
+    split_log_trace_wise,
+    write_xes,
+)
+from simod.settings.preprocessing_settings import PreprocessingSettings
 
 test_cases = [
     {
@@ -28,11 +41,180 @@ def test_optimizer(test_data, entry_point):
     assert event_log.test_partition is not None
     assert len(event_log.train_partition) > len(event_log.validation_partition)
     assert len(event_log.validation_partition) < len(event_log.test_partition)
+    # Partitions are views of the same log, materialized once
+    assert event_log.train_partition is event_log.train_partition
+    assert len(event_log.train_validation_partition) + len(event_log.test_partition) == len(event_log.log)
+    assert set(event_log.train_validation_partition.index) == set(event_log.train_partition.index) | set(
+        event_log.validation_partition.index
+    )
+    # Without copying the events of the log
+    for partition in [event_log.train_partition, event_log.validation_partition, event_log.test_partition]:
+        assert np.shares_memory(partition[log_ids.activity].to_numpy(), event_log.log[log_ids.activity].to_numpy())
+
+
+def test_partitions_without_test(entry_point):
+    event_log = EventLog.from_path(entry_point / "LoanApp_simplified.csv.gz", DEFAULT_XES_IDS)
+
+    # Train+validation spans the whole log, so it is not copied
+    assert event_log.train_validation_partition is event_log.log
+    assert event_log.test_partition is None
+
+
+@pytest.mark.parametrize("extension", ["parquet", "feather", "arrow"])
+def test_read_columnar_log(tmp_path, entry_point, extension):
+    pytest.importorskip("pyarrow")
+    log_ids = DEFAULT_XES_IDS
+    csv_log = read_csv_log(entry_point / "LoanApp_simplified.csv.gz", log_ids)
+    # Columnar log with typed (non-UTC) timestamps and an extra data attribute
+    columnar_log = csv_log.sample(frac=1.0, random_state=42).reset_index(drop=True).assign(amount=1.5)
+    columnar_log = columnar_log.astype({log_ids.case: str})
+    for column in [log_ids.start_time, log_ids.end_time]:
+        columnar_log[column] = columnar_log[column].dt.tz_convert("Europe/Madrid")
+    path = tmp_path / f"LoanApp_simplified.{extension}"
+    if extension == "parquet":
+        columnar_log.to_parquet(path)
+    else:
+        columnar_log.to_feather(path)
+
+    event_log = read_event_log(path, log_ids)
+    projected_event_log = read_event_log(path, log_ids, read_data_attributes=False)
+
+    # Same events and types as the CSV log (sorted by the same criteria, ties aside)
+    sort_columns = [log_ids.start_time, log_ids.end_time, log_ids.case, log_ids.activity]
+    expected_log = csv_log.astype({log_ids.case: str}).sort_values(sort_columns).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        event_log.drop(columns="amount").sort_values(sort_columns).reset_index(drop=True), expected_log
+    )
+    # Only the columns of the log IDs when data attributes are not needed
+    assert set(projected_event_log.columns) == set(log_ids.to_dict().values()) & set(csv_log.columns)
+    # Usable as input of the pipeline
+    assert len(EventLog.from_path(path, log_ids, read_data_attributes=False).train_validation_partition) == len(csv_log)
+
+
+def test_sample(entry_point):
+    log_ids = DEFAULT_XES_IDS
+    event_log = EventLog.from_path(entry_point / "LoanApp_simplified.csv.gz", log_ids, need_test_partition=True)
+    sample = event_log.sample(fraction=0.3)
+
+    def cases(partition: pd.DataFrame) -> set:
+        return set(partition[log_ids.case])
+
+    num_cases = len(cases(event_log.train_validation_partition))
+    assert len(cases(sample.train_validation_partition)) == pytest.approx(0.3 * num_cases, abs=2)
+    assert cases(sample.train_partition) <= cases(event_log.train_partition)
+    assert cases(sample.validation_partition) <= cases(event_log.validation_partition)
+    assert sample.test_partition is None
+    # Complete cases, sharing the events of the original log
+    sampled_events = event_log.train_validation_partition[log_ids.case].isin(cases(sample.train_validation_partition))
+    assert sampled_events.sum() == len(sample.train_validation_partition)
+    assert sample.log is event_log.log
+    # Training and validation are slices of train+validation, materialized once
+    assert np.shares_memory(
+        sample.validation_partition[log_ids.activity].to_numpy(),
+        sample.train_validation_partition[log_ids.activity].to_numpy(),
+    )
+    # Deterministic for the same seed
+    assert cases(event_log.sample(fraction=0.3).train_partition) == cases(sample.train_partition)
+    assert len(cases(event_log.sample(max_cases=10, fraction=0.3).train_validation_partition)) == 10
+
+
+def test_sample_cases_stratified():
+    log_ids = DEFAULT_XES_IDS
+    start = pd.Timestamp("2024-01-01", tz="UTC")
+    rows = []
+    for case in range(100):
+        # 80% of the cases follow A-B, and 20% A-C; the A-C cases only arrive in the second half
+        activities = ["A", "C"] if case >= 50 and case % 5 == 0 else ["A", "B"]
+        for position, activity in enumerate(activities):
+            timestamp = start + pd.Timedelta(hours=case, minutes=position)
+            rows.append({log_ids.case: case, log_ids.activity: activity, log_ids.start_time: timestamp,
+                         log_ids.end_time: timestamp})
+    event_log = pd.DataFrame(rows)
+
+    indices = sample_cases_stratified(event_log, log_ids, num_cases=20, num_periods=2)
+    sample = event_log.iloc[indices]
+    variants = sample.groupby(log_ids.case)[log_ids.activity].agg("".join)
+    assert len(variants) == 20
+    assert (variants == "AC").sum() == 2
+    # Same number of cases per arrival period
+    assert (variants.index < 50).sum() == 10
+    # All the cases when the sample is bigger than the log
+    assert len(sample_cases_stratified(event_log, log_ids, num_cases=200)) == len(event_log)
+
+
+@pytest.mark.parametrize("extension", ["csv.gz", "parquet"])
+def test_read_log_in_chunks(tmp_path, entry_point, extension):
+    pytest.importorskip("pyarrow")
+    log_ids = DEFAULT_XES_IDS
+    path = entry_point / "LoanApp_simplified.csv.gz"
+    if extension == "parquet":
+        path = tmp_path / "LoanApp_simplified.parquet"
+        read_csv_log(entry_point / "LoanApp_simplified.csv.gz", log_ids).to_parquet(path)
+    event_log = EventLog.from_path(path, log_ids)
+    num_cases = event_log.log[log_ids.case].nunique()
+
+    # A single chunk is pre-processed as the whole log
+    sort_columns = [log_ids.start_time, log_ids.end_time, log_ids.case, log_ids.activity]
+    single_chunk = EventLog.from_path(path, log_ids, PreprocessingSettings(chunk_size=10**6))
+    pd.testing.assert_frame_equal(
+        single_chunk.log.sort_values(sort_columns).reset_index(drop=True),
+        event_log.log.sort_values(sort_columns).reset_index(drop=True),
+    )
+    # Several chunks keep the same events, with all the events of each case in the same chunk
+    chunked = EventLog.from_path(path, log_ids, PreprocessingSettings(chunk_size=len(event_log.log) // 4))
+    event_columns = [log_ids.case, log_ids.activity, log_ids.start_time, log_ids.end_time, log_ids.resource]
+    pd.testing.assert_frame_equal(
+        chunked.log[event_columns].sort_values(event_columns).reset_index(drop=True),
+        event_log.log[event_columns].sort_values(event_columns).reset_index(drop=True),
+    )
+    assert list(chunked.log.columns) == list(event_log.log.columns)
+    assert chunked.log[log_ids.enabled_time].notna().all()
+    assert (chunked.log[log_ids.enabled_time] <= chunked.log[log_ids.start_time]).all()
+    assert chunked.log[log_ids.case].nunique() == num_cases
+    assert chunked.log.index.equals(pd.RangeIndex(len(chunked.log)))
+
+
+@pytest.mark.parametrize("test_data", test_cases, ids=[test_data["log_name"] for test_data in test_cases])
+def test_compact_log(test_data, entry_point):
+    path = entry_point / test_data["log_name"]
+    log_ids = test_data["log_ids"]
+    event_log = EventLog.from_path(path, log_ids, need_test_partition=True)
+
+    compact_event_log = EventLog.from_path(
+        path, log_ids, PreprocessingSettings(compact_log=True), need_test_partition=True
+    )
+
+    encoded_columns = [log_ids.case, log_ids.activity, log_ids.resource]
+    assert (compact_event_log.log[encoded_columns].dtypes == "int32").all()
+    # Smaller encoded columns, the rest of them unchanged
+    original_memory = event_log.log.memory_usage(deep=True)
+    compact_memory = compact_event_log.log.memory_usage(deep=True)
+    assert (compact_memory[encoded_columns] < original_memory[encoded_columns]).all()
+    assert compact_memory.sum() < original_memory.sum()
+    # Same (decoded) partitions
+    for partition in ["train_partition", "validation_partition", "train_validation_partition", "test_partition"]:
+        pd.testing.assert_frame_equal(getattr(compact_event_log, partition), getattr(event_log, partition))
+
+
+@pytest.mark.parametrize("test_data", test_cases, ids=[test_data["log_name"] for test_data in test_cases])
+@pytest.mark.parametrize("training_percentage", [0.5, 0.8])
+def test_split_log_trace_wise(test_data, training_percentage, entry_point):
+    log_ids = test_data["log_ids"]
+    event_log = read_csv_log(entry_point / test_data["log_name"], log_ids)
+
+    train_indices, validation_indices = split_log_trace_wise(event_log, log_ids, training_percentage)
+
+    # Same split as the one from pix-framework
+    expected_train, expected_validation = split_log_training_validation_trace_wise(
+        event_log, log_ids, training_percentage
+    )
+    pd.testing.assert_frame_equal(event_log.iloc[train_indices], expected_train)
+    pd.testing.assert_frame_equal(event_log.iloc[validation_indices], expected_validation)
 
 
 def test_wrong_log_extension(entry_point):
-    training_message = r"The specified training log has an unsupported extension.*Only 'csv' and 'csv.gz' supported."
-    test_message = r"The specified test log has an unsupported extension.*Only 'csv' and 'csv.gz' supported."
+    training_message = r"The specified training log has an unsupported extension.*Only 'csv', 'csv.gz', .* supported."
+    test_message = r"The specified test log has an unsupported extension.*Only 'csv', 'csv.gz', .* supported."
     # Assert wrong training log
     with pytest.raises(ValueError, match=training_message) as error:
         EventLog.from_path(
@@ -60,3 +242,58 @@ def test_wrong_log_extension(entry_point):
             log_ids=DEFAULT_XES_IDS,
             test_log_path=entry_point / "PurchasingExample.xes.gz",
         )
+
+
+@pytest.mark.parametrize("file_name", ["log.xes", "log.xes.gz"])
+def test_write_xes(tmp_path, file_name):
+    log_ids = DEFAULT_XES_IDS
+    event_log = pd.DataFrame(
+        {
+            log_ids.case: ["2", "1", "2"],
+            log_ids.activity: ["A", "A & B", "C"],
+            log_ids.resource: ["R1", None, "R2"],
+            log_ids.start_time: pd.to_datetime(
+                ["2023-01-01T10:00:00.123456+00:00", "2023-01-01T11:00:00+00:00", "2023-01-01T10:05:00+00:00"],
+                format="ISO8601",
+            ),
+            log_ids.end_time: pd.to_datetime(
+                ["2023-01-01T10:01:00+00:00", "2023-01-01T11:30:00+00:00", "2023-01-01T10:06:00+00:00"],
+                format="ISO8601",
+            ),
+        }
+    )
+    path = tmp_path / file_name
+
+    write_xes(event_log, log_ids, path)
+    with gzip.open(path) if file_name.endswith(".gz") else path.open("rb") as file:
+        log = etree.parse(file).getroot()
+
+    # Traces in order of appearance, with a start and a complete event per activity instance
+    traces = [
+        (
+            trace.find("string").get("value"),
+            [{attribute.get("key"): attribute.get("value") for attribute in event} for event in trace.findall("event")],
+        )
+        for trace in log.findall("trace")
+    ]
+    assert [case for case, _ in traces] == ["2", "1"]
+    assert [(event["concept:name"], event["lifecycle:transition"]) for event in traces[0][1]] == [
+        ("A", "start"),
+        ("A", "complete"),
+        ("C", "start"),
+        ("C", "complete"),
+    ]
+    assert traces[0][1][0]["time:timestamp"] == "2023-01-01T10:00:00.123+00:00"
+    assert traces[1][1][0] == {
+        "org:resource": "UNDEFINED",
+        "concept:name": "A & B",
+        "lifecycle:transition": "start",
+        "time:timestamp": "2023-01-01T11:00:00.000+00:00",
+    }
+
+    # Only complete events
+    write_xes(event_log, log_ids, path, only_complete_events=True)
+    with gzip.open(path) if file_name.endswith(".gz") else path.open("rb") as file:
+        log = etree.parse(file).getroot()
+    transitions = [event.find("string[@key='lifecycle:transition']").get("value") for event in log.iter("event")]
+    assert transitions == ["complete"] * 3
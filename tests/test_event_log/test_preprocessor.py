@@ -1,6 +1,9 @@
+import pandas as pd
 import pytest
+from pix_framework.enhancement.concurrency_oracle import OverlappingConcurrencyOracle
+from pix_framework.enhancement.start_time_estimator.config import Configuration as StartTimeEstimatorConfiguration
 from pix_framework.io.event_log import APROMORE_LOG_IDS, read_csv_log
-from simod.event_log.preprocessor import Preprocessor
+from simod.event_log.preprocessor import Preprocessor, _enabled_times_of_trace, _has_checked_enabling_info
 
 
 @pytest.mark.integration
@@ -12,3 +15,29 @@ def test_add_start_times(log_name, entry_point):
     log = preprocessor.run()
 
     assert log[log_ids.start_time].isna().sum() == 0
+
+
+def test_parallel_preprocessing(entry_point):
+    log_ids = APROMORE_LOG_IDS
+    event_log = read_csv_log(entry_point / "Simple_log_no_start_times.csv", log_ids)
+    serial_log = Preprocessor(event_log.copy(), log_ids).run()
+    parallel_log = Preprocessor(event_log.copy(), log_ids).run(num_workers=3)
+
+    pd.testing.assert_frame_equal(serial_log, parallel_log)
+
+
+def test_enabled_times_without_checked_pix_version(entry_point, monkeypatch):
+    log_ids = APROMORE_LOG_IDS
+    event_log = read_csv_log(entry_point / "Resource_model_optimization_test.csv", log_ids)
+    configuration = StartTimeEstimatorConfiguration(log_ids=log_ids, consider_start_times=True)
+    concurrency_oracle = OverlappingConcurrencyOracle(event_log, configuration)
+    traces = [trace for _, trace in event_log.groupby(log_ids.case)][:20]
+    expected = [_enabled_times_of_trace(trace, concurrency_oracle) for trace in traces]
+
+    # With an unchecked version of pix-framework, the enabled times are computed with the public API of the oracle
+    monkeypatch.setattr("simod.event_log.preprocessor._ENABLING_INFO_PIX_VERSIONS", [])
+    _has_checked_enabling_info.cache_clear()
+    try:
+        assert [_enabled_times_of_trace(trace, concurrency_oracle) for trace in traces] == expected
+    finally:
+        _has_checked_enabling_info.cache_clear()
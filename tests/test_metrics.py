@@ -1,6 +1,7 @@
 import pytest
 from pix_framework.io.event_log import DEFAULT_XES_IDS, read_csv_log
-from simod.metrics import get_absolute_emd
+from simod.metrics import ReferenceProfile, compute_metric, get_absolute_emd
+from simod.settings.common_settings import Metric
 
 test_cases = [
     {
@@ -29,3 +30,26 @@ def test_absolute_timestamp_emd(entry_point, test_data):
     # Test similar log
     emd = get_absolute_emd(original_log, original_log_ids, original_log, simulated_log_ids)
     assert emd == 0.0
+
+
+@pytest.mark.parametrize("metric", list(Metric))
+def test_reference_profile(entry_point, metric):
+    original_log = read_csv_log(entry_point / "LoanApp_simplified.csv.gz", DEFAULT_XES_IDS)
+    simulated_log = read_csv_log(entry_point / "LoanApp_simplified_2.csv.gz", DEFAULT_XES_IDS)
+    # Reduce the logs to keep the pairwise trace comparisons of the DL distance fast
+    original_log = original_log[
+        original_log[DEFAULT_XES_IDS.case].isin(original_log[DEFAULT_XES_IDS.case].unique()[:100])
+    ]
+    simulated_log = simulated_log[
+        simulated_log[DEFAULT_XES_IDS.case].isin(simulated_log[DEFAULT_XES_IDS.case].unique()[:100])
+    ]
+
+    reference_profile = ReferenceProfile(original_log, DEFAULT_XES_IDS, [metric])
+
+    # The distance computed with the precomputed profile is the same as computing it from both logs
+    expected = compute_metric(metric, original_log, DEFAULT_XES_IDS, simulated_log, DEFAULT_XES_IDS)
+    assert reference_profile.compute_metric(metric, simulated_log, DEFAULT_XES_IDS) == pytest.approx(expected)
+    # Metrics not included in the profile are rejected
+    other_metric = next(other for other in Metric if other is not metric)
+    with pytest.raises(ValueError):
+        reference_profile.compute_metric(other_metric, simulated_log, DEFAULT_XES_IDS)
@@ -2,7 +2,7 @@ from pathlib import Path
 
 import pandas as pd
 import pytest
-from hyperopt import STATUS_OK
+from hyperopt import STATUS_FAIL, STATUS_OK, hp
 from pix_framework.discovery.case_arrival import discover_case_arrival_model
 from pix_framework.discovery.gateway_probabilities import compute_gateway_probabilities
 from pix_framework.discovery.resource_calendar_and_performance.calendar_discovery_parameters import CalendarType
@@ -21,6 +21,7 @@ from simod.event_log.event_log import EventLog
 from simod.resource_model.optimizer import ResourceModelOptimizer
 from simod.resource_model.settings import HyperoptIterationParams
 from simod.settings.common_settings import Metric
+from simod.settings.preprocessing_settings import PreprocessingSettings
 from simod.settings.resource_model_settings import ResourceModelSettings
 from simod.simulation.parameters.BPS_model import BPSModel
 
@@ -50,6 +51,17 @@ resource_model_config_intervals = {
     },
 }
 
+resource_model_config_parallel_trials = resource_model_config_intervals | {"max_parallel_trials": 2}
+
+resource_model_config_adaptive_replications = resource_model_config_intervals | {
+    "num_evaluations_per_iteration": 4,
+    "adaptive_replications": True,
+}
+
+resource_model_config_racing = resource_model_config_intervals | {"num_evaluations_per_iteration": 4, "racing": True}
+
+resource_model_config_simulation_budget = resource_model_config_intervals | {"simulation_budget": 10}
+
 resource_model_config_fuzzy = {
     "optimization_metric": "circadian_emd",
     "num_iterations": 5,
@@ -73,12 +85,43 @@ test_cases = [
         "event_log": "Resource_model_optimization_test.csv",
         "process_model": "Resource_model_optimization_test.bpmn",
     },
+    {
+        "name": "Parallel trials",
+        "settings": resource_model_config_parallel_trials,
+        "event_log": "Resource_model_optimization_test.csv",
+        "process_model": "Resource_model_optimization_test.bpmn",
+    },
+    {
+        "name": "Adaptive replications",
+        "settings": resource_model_config_adaptive_replications,
+        "event_log": "Resource_model_optimization_test.csv",
+        "process_model": "Resource_model_optimization_test.bpmn",
+    },
+    {
+        "name": "Racing",
+        "settings": resource_model_config_racing,
+        "event_log": "Resource_model_optimization_test.csv",
+        "process_model": "Resource_model_optimization_test.bpmn",
+    },
+    {
+        "name": "Simulation budget",
+        "settings": resource_model_config_simulation_budget,
+        "event_log": "Resource_model_optimization_test.csv",
+        "process_model": "Resource_model_optimization_test.bpmn",
+    },
     {
         "name": "Fuzzy",
         "settings": resource_model_config_fuzzy,
         "event_log": "Resource_model_optimization_test.csv",
         "process_model": "Resource_model_optimization_test.bpmn",
     },
+    {
+        "name": "Compact log",
+        "settings": resource_model_config_single_values,
+        "event_log": "Resource_model_optimization_test.csv",
+        "process_model": "Resource_model_optimization_test.bpmn",
+        "compact_log": True,
+    },
 ]
 
 
@@ -88,7 +131,11 @@ def test_resource_model_optimizer(entry_point, test_data):
     base_dir = PROJECT_DIR / "outputs" / get_random_folder_id(prefix="test_resource_model_optimizer_")
     create_folder(base_dir)
     log_path = entry_point / test_data["event_log"]
-    event_log = EventLog.from_path(log_path, APROMORE_LOG_IDS)
+    event_log = EventLog.from_path(
+        log_path,
+        APROMORE_LOG_IDS,
+        preprocessing_settings=PreprocessingSettings(compact_log=test_data.get("compact_log", False)),
+    )
     process_model_path = entry_point / test_data["process_model"]
 
     case_arrival_model = discover_case_arrival_model(
@@ -121,7 +168,7 @@ def test_resource_model_optimizer(entry_point, test_data):
     assert result.output_dir is not None
     assert result.output_dir.exists()
     # Assert discovery parameters depending on the algorithm
-    if test_data["name"] == "Single values":
+    if test_data["name"] in ["Single values", "Compact log"]:
         assert result.optimization_metric == Metric.ABSOLUTE_EMD
         assert result.calendar_discovery_params.discovery_type == CalendarType.DIFFERENTIATED_BY_POOL
         assert (
@@ -132,7 +179,7 @@ def test_resource_model_optimizer(entry_point, test_data):
         assert result.calendar_discovery_params.confidence == 0.05
         assert result.calendar_discovery_params.support == 0.5
         assert result.calendar_discovery_params.participation == 0.4
-    elif test_data["name"] == "Intervals":
+    elif test_data["name"] in ["Intervals", "Parallel trials", "Adaptive replications", "Racing", "Simulation budget"]:
         assert result.optimization_metric == Metric.CIRCADIAN_EMD
         assert result.calendar_discovery_params.discovery_type == CalendarType.DIFFERENTIATED_BY_RESOURCE
         assert (
@@ -188,5 +235,129 @@ def test_resource_model_optimizer(entry_point, test_data):
     )
     # Assert that the returned result actually has the smallest distance
     assert len(optimizer.evaluation_measurements) > 0
+    # Assert that the number of replications of each iteration is recorded
+    measurements = optimizer.evaluation_measurements[
+        optimizer.evaluation_measurements["status"].isin([STATUS_OK, "pruned"])
+    ]
+    replications = measurements.groupby("output_dir")["num_replications"]
+    assert (replications.size() == replications.first()).all()
+    assert (measurements["num_replications"] <= settings.num_evaluations_per_iteration).all()
+    assert len(optimizer._bayes_trials.trials) == settings.num_iterations
     iteration_results = pd.DataFrame(optimizer._bayes_trials.results).sort_values(by="loss", ascending=True)
     assert iteration_results[iteration_results["status"] == STATUS_OK].iloc[0]["output_dir"] == result.output_dir
+    # Assert that the discarded iterations are reported to hyperopt with their (truncated) loss
+    if "pruned" in iteration_results:
+        pruned_results = iteration_results[iteration_results["pruned"] == True]  # noqa: E712
+        assert (pruned_results["status"] == STATUS_OK).all()
+        assert (pruned_results["loss"] > iteration_results.iloc[0]["loss"]).all()
+
+
+@pytest.mark.integration
+def test_resource_model_optimizer_resume(entry_point):
+    base_dir = PROJECT_DIR / "outputs" / get_random_folder_id(prefix="test_resource_model_optimizer_")
+    create_folder(base_dir)
+    event_log = EventLog.from_path(entry_point / "Resource_model_optimization_test.csv", APROMORE_LOG_IDS)
+    process_model_path = entry_point / "Resource_model_optimization_test.bpmn"
+    bps_model = BPSModel(
+        process_model=process_model_path,
+        gateway_probabilities=compute_gateway_probabilities(
+            event_log=event_log.train_validation_partition,
+            log_ids=event_log.log_ids,
+            bpmn_graph=BPMNGraph.from_bpmn_path(process_model_path),
+        ),
+        case_arrival_model=discover_case_arrival_model(event_log.train_validation_partition, event_log.log_ids),
+    )
+    checkpoint_path = base_dir / "progress.pkl"
+
+    # Interrupted optimization (simulated by a smaller number of iterations)
+    ResourceModelOptimizer(
+        event_log=event_log,
+        bps_model=bps_model,
+        settings=ResourceModelSettings.from_dict(resource_model_config_intervals | {"num_iterations": 2}),
+        base_directory=base_dir,
+        checkpoint_path=checkpoint_path,
+    ).run()
+    assert checkpoint_path.exists()
+
+    # The resumed optimization only evaluates the remaining iterations
+    optimizer = ResourceModelOptimizer(
+        event_log=event_log,
+        bps_model=bps_model,
+        settings=ResourceModelSettings.from_dict(resource_model_config_intervals | {"num_iterations": 4}),
+        base_directory=base_dir,
+        checkpoint_path=checkpoint_path,
+    )
+    optimizer.run()
+    assert len(optimizer._bayes_trials.trials) == 4
+    assert optimizer.iteration_index == 4
+    assert optimizer.evaluation_measurements["output_dir"].nunique() == 4
+
+
+@pytest.mark.integration
+def test_resource_model_optimizer_multi_fidelity(entry_point):
+    base_dir = PROJECT_DIR / "outputs" / get_random_folder_id(prefix="test_resource_model_optimizer_")
+    create_folder(base_dir)
+    event_log = EventLog.from_path(entry_point / "Resource_model_optimization_test.csv", APROMORE_LOG_IDS)
+    process_model_path = entry_point / "Resource_model_optimization_test.bpmn"
+    bps_model = BPSModel(
+        process_model=process_model_path,
+        gateway_probabilities=compute_gateway_probabilities(
+            event_log=event_log.train_validation_partition,
+            log_ids=event_log.log_ids,
+            bpmn_graph=BPMNGraph.from_bpmn_path(process_model_path),
+        ),
+        case_arrival_model=discover_case_arrival_model(event_log.train_validation_partition, event_log.log_ids),
+    )
+    settings = ResourceModelSettings.from_dict(
+        resource_model_config_intervals | {"num_iterations": 9, "multi_fidelity": True}
+    )
+    optimizer = ResourceModelOptimizer(
+        event_log=event_log,
+        bps_model=bps_model,
+        settings=settings,
+        base_directory=base_dir,
+    )
+    result = optimizer.run()
+
+    # All the iterations are evaluated with the lowest fidelity, and the best one is the one of the highest rung
+    assert len(optimizer._bayes_trials.trials) == 9
+    assert sorted(optimizer.evaluation_measurements["fidelity"].unique()) == pytest.approx([1 / 9, 1 / 3, 1.0])
+    results = pd.DataFrame(optimizer._bayes_trials.results)
+    assert results[results["rung"] == 2]["output_dir"].tolist() == [result.output_dir]
+    assert (results["rung"] == 1).sum() == 2
+
+
+def test_resource_model_optimizer_fidelities(entry_point, tmp_path):
+    event_log = EventLog.from_path(entry_point / "Resource_model_optimization_test.csv", APROMORE_LOG_IDS)
+    optimizer = ResourceModelOptimizer(
+        event_log=event_log,
+        bps_model=BPSModel(process_model=entry_point / "Resource_model_optimization_test.bpmn"),
+        settings=ResourceModelSettings.from_dict(
+            resource_model_config_single_values | {"num_iterations": 27, "multi_fidelity": True}
+        ),
+        base_directory=tmp_path,
+    )
+
+    # Rungs for the 3 points of a finite search space, instead of the 27 iterations
+    finite_space = {"granularity": hp.choice("granularity", [15, 30, 60]), "confidence": 0.05}
+    assert optimizer._get_fidelities(finite_space) == pytest.approx([1 / 3, 1.0])
+    # Rungs for the 27 iterations over a continuous search space, down to 10 of the 100 validation cases
+    continuous_space = {"granularity": hp.uniform("granularity", 15, 60), "confidence": 0.05}
+    assert optimizer._get_fidelities(continuous_space) == pytest.approx([1 / 9, 1 / 3, 1.0])
+
+
+def test_resource_model_optimizer_over_budget_response(tmp_path):
+    over_budget_measurements = [
+        {"metric": Metric.CIRCADIAN_EMD, "failure_reason": "Simulation exceeded the budget of 10 events"}
+    ]
+    status, response = ResourceModelOptimizer._define_response(
+        STATUS_OK, over_budget_measurements, tmp_path, tmp_path / "model.bpmn"
+    )
+
+    # Failed, telling the reason apart from other failures
+    assert status == STATUS_FAIL
+    assert response["status"] == STATUS_FAIL
+    assert response["loss"] == 1.0
+    assert response["failure_reason"] == "Simulation exceeded the budget of 10 events"
+    status, response = ResourceModelOptimizer._define_response(STATUS_FAIL, None, tmp_path, tmp_path / "model.bpmn")
+    assert "failure_reason" not in response
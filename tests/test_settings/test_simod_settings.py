@@ -14,6 +14,7 @@ common:
     - dl
     - absolute_event_distribution
   discover_data_attributes: true
+  seed: 7
 preprocessing:
   multitasking: false
 control_flow:
@@ -59,6 +60,7 @@ common:
     - dl
     - absolute_event_distribution
   discover_case_attributes: true
+  seed: 7
 preprocessing:
   multitasking: false
 control_flow:
@@ -8,6 +8,7 @@ from pix_framework.io.bpmn import get_activities_names_from_bpmn
 from pix_framework.io.event_log import DEFAULT_XES_IDS
 
 from simod.event_log.event_log import EventLog
+from simod.runtime_meter import RuntimeMeter
 from simod.settings.common_settings import PROJECT_DIR
 from simod.settings.simod_settings import SimodSettings
 from simod.simod import Simod
@@ -170,3 +171,54 @@ def test_missing_activities_repaired(entry_point):
         filter(lambda x: x.activity_id == activity_id, resource_model.activity_resource_distributions)
     )
     assert len(activity_distributions) == 1
+
+
+def test_optimization_arrival_model_of_sample(entry_point, tmp_path):
+    settings = SimodSettings.default()
+    settings.common.log_ids = DEFAULT_XES_IDS
+    settings.preprocessing.sample_fraction = 0.25
+    event_log = EventLog.from_path(entry_point / "LoanApp_simplified.csv.gz", DEFAULT_XES_IDS)
+    simod = Simod(settings, event_log=event_log, output_dir=tmp_path)
+    simod._discover_initial_bps_model(None, RuntimeMeter())
+
+    # The optimization phases simulate the sampled cases over the same period, so they arrive less frequently
+    full_inter_arrival = simod._best_bps_model.case_arrival_model.inter_arrival_times["distribution_params"][0]
+    sample_model = simod._optimization_bps_model()
+    sample_inter_arrival = sample_model.case_arrival_model.inter_arrival_times["distribution_params"][0]
+    assert sample_inter_arrival["value"] > 2 * full_inter_arrival["value"]
+    # The model of the final discovery keeps the arrival model of the full train+validation log
+    assert simod._best_bps_model.case_arrival_model.inter_arrival_times["distribution_params"][0] == full_inter_arrival
+
+
+def test_drawn_seed_kept_when_resuming(entry_point, tmp_path):
+    settings = SimodSettings.default()
+    settings.common.log_ids = DEFAULT_XES_IDS
+    settings.common.seed = None
+    event_log = EventLog.from_path(entry_point / "LoanApp_simplified.csv.gz", DEFAULT_XES_IDS)
+    simod = Simod(settings, event_log=event_log, output_dir=tmp_path)
+
+    # The drawn seed is not written into the settings of the caller
+    assert settings.common.seed is None
+    # The resumed run uses the same seed, and a new run draws a new one
+    resumed = Simod(settings, event_log=event_log, output_dir=tmp_path, resume=True)
+    assert resumed._seed == simod._seed
+    restarted = Simod(settings, event_log=event_log, output_dir=tmp_path)
+    assert settings.common.seed is None
+    assert restarted._checkpoint.load_seed() == restarted._seed
+
+
+def test_resume_with_different_settings(entry_point, tmp_path):
+    settings = SimodSettings.default()
+    settings.common.log_ids = DEFAULT_XES_IDS
+    event_log = EventLog.from_path(entry_point / "LoanApp_simplified.csv.gz", DEFAULT_XES_IDS)
+    Simod(settings, event_log=event_log, output_dir=tmp_path)
+
+    # Same configuration and event log
+    Simod(settings.model_copy(deep=True), event_log=event_log, output_dir=tmp_path, resume=True)
+    # Different configuration or event log
+    other_settings = settings.model_copy(deep=True)
+    other_settings.control_flow.num_iterations += 1
+    with pytest.raises(ValueError):
+        Simod(other_settings, event_log=event_log, output_dir=tmp_path, resume=True)
+    with pytest.raises(ValueError):
+        Simod(settings, event_log=event_log.sample(fraction=0.5), output_dir=tmp_path, resume=True)
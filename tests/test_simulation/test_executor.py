@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from simod.simulation.executor import SimulationExecutor
+
+
+def _square(value: int) -> int:
+    return value * value
+
+
+def test_executor_reused_across_calls():
+    executor = SimulationExecutor(num_workers=2).start()
+    try:
+        assert executor.is_running
+        assert executor.map(_square, [1, 2, 3]) == [1, 4, 9]
+        # Same pool serves consecutive batches of tasks
+        assert executor.map(_square, range(5)) == [0, 1, 4, 9, 16]
+        assert executor.submit(_square, 7).result() == 49
+    finally:
+        executor.shutdown()
+    assert not executor.is_running
+
+
+def test_executor_context_manager():
+    with SimulationExecutor(num_workers=1) as executor:
+        assert executor.map(_square, [4]) == [16]
+    assert not executor.is_running
+
+
+def _fail_or_sleep(value: int) -> int:
+    if value == 0:
+        raise ValueError("Failed task")
+    time.sleep(0.5)
+    return value
+
+
+def test_executor_map_cancels_pending_tasks_on_failure():
+    with SimulationExecutor(num_workers=1) as executor:
+        futures = []
+        submit = executor.submit
+
+        def _tracked_submit(fn, *args):
+            futures.append(submit(fn, *args))
+            return futures[-1]
+
+        executor.submit = _tracked_submit
+        with pytest.raises(ValueError):
+            executor.map(_fail_or_sleep, [0, 1, 2, 3, 4])
+        # The tasks still waiting in the pool are not run
+        assert any(future.cancelled() for future in futures)
+
+
+def _wait_for(event) -> bool:
+    return event.wait(timeout=30)
+
+
+def test_executor_event_shared_with_tasks():
+    with SimulationExecutor(num_workers=2) as executor:
+        event = executor.create_event()
+        # The running task sees the event set in the main process
+        future = executor.submit(_wait_for, event)
+        event.set()
+        assert future.result()
+    assert executor._manager is None
@@ -0,0 +1,482 @@
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pix_framework.discovery.case_arrival import discover_case_arrival_model
+from pix_framework.discovery.gateway_probabilities import compute_gateway_probabilities
+from pix_framework.discovery.resource_calendar_and_performance.calendar_discovery_parameters import (
+    CalendarDiscoveryParameters,
+)
+from pix_framework.discovery.resource_model import discover_resource_model
+from pix_framework.io.bpm_graph import BPMNGraph
+from pix_framework.io.event_log import DEFAULT_XES_IDS, PROSIMOS_LOG_IDS, read_csv_log
+
+from simod.cache import disable_artifact_cache, enable_artifact_cache, get_simulation_cache
+from simod.event_log.event_log import EventLog
+from simod.settings.common_settings import Metric
+from simod.simulation.executor import SimulationExecutor
+from simod.simulation.parameters.BPS_model import BPSModel
+from simod.simulation import prosimos
+from simod.simulation.prosimos import (
+    SIMULATION_WARNINGS_FILE_NAME,
+    ProsimosSettings,
+    RacingRule,
+    ReplicationStoppingRule,
+    SimulationBudget,
+    SimulationBudgetExceeded,
+    SimulationSetup,
+    _wall_clock_limit,
+    get_replication_seed,
+    simulate,
+    simulate_and_evaluate,
+)
+
+ASSETS_DIR = Path(__file__).parent.parent / "assets"
+
+
+@pytest.fixture(scope="module")
+def event_log() -> EventLog:
+    return EventLog.from_path(ASSETS_DIR / "LoanApp_simplified.csv.gz", DEFAULT_XES_IDS)
+
+
+@pytest.fixture(scope="module")
+def bps_model_paths(event_log, tmp_path_factory) -> tuple:
+    output_dir = tmp_path_factory.mktemp("bps_model")
+    process_model = ASSETS_DIR / "LoanApp_simplified.bpmn"
+    bps_model = BPSModel(
+        process_model=process_model,
+        gateway_probabilities=compute_gateway_probabilities(
+            event_log.train_validation_partition, event_log.log_ids, BPMNGraph.from_bpmn_path(process_model)
+        ),
+        case_arrival_model=discover_case_arrival_model(event_log.train_validation_partition, event_log.log_ids),
+        resource_model=discover_resource_model(
+            event_log.train_validation_partition, event_log.log_ids, CalendarDiscoveryParameters()
+        ),
+    )
+    bps_model.replace_activity_names_with_ids()
+    return process_model, bps_model.to_json(output_dir, event_log.process_name)
+
+
+@pytest.mark.parametrize("keep_simulated_logs", [False, True])
+def test_simulate_and_evaluate(event_log, bps_model_paths, tmp_path, keep_simulated_logs):
+    process_model, parameters = bps_model_paths
+    metrics = [Metric.TWO_GRAM_DISTANCE, Metric.CIRCADIAN_EMD]
+    validation_log = event_log.validation_partition
+
+    with SimulationExecutor(num_workers=2) as executor:
+        measurements = simulate_and_evaluate(
+            process_model_path=process_model,
+            parameters_path=parameters,
+            output_dir=tmp_path,
+            simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+            simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+            validation_log=validation_log,
+            validation_log_ids=event_log.log_ids,
+            metrics=metrics,
+            num_simulations=3,
+            executor=executor,
+            keep_simulated_logs=keep_simulated_logs,
+        )
+
+    # One measurement per replication and metric, carrying only the distance values
+    assert len(measurements) == 3 * len(metrics)
+    assert {measurement["run_num"] for measurement in measurements} == {0, 1, 2}
+    for measurement in measurements:
+        assert set(measurement.keys()) == {"run_num", "metric", "distance"}
+        assert measurement["metric"] in metrics
+        assert measurement["distance"] >= 0.0
+    # The simulated logs are only written to disk when requested
+    assert len(list(tmp_path.glob("simulated_log_*.csv"))) == (3 if keep_simulated_logs else 0)
+
+
+def test_simulate_and_evaluate_cached(event_log, bps_model_paths, tmp_path):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+
+    cache = enable_artifact_cache(tmp_path / "cache", 10**9)
+    measurements = []
+    try:
+        with SimulationExecutor(num_workers=2) as executor:
+            for metrics, keep_simulated_logs in [
+                ([Metric.TWO_GRAM_DISTANCE], False),
+                ([Metric.TWO_GRAM_DISTANCE], False),
+                ([Metric.CYCLE_TIME_EMD], False),
+                ([Metric.TWO_GRAM_DISTANCE], True),
+            ]:
+                # Use the artifact cache instead of the in-memory one
+                get_simulation_cache().clear()
+                measurements.append(
+                    simulate_and_evaluate(
+                        process_model_path=process_model,
+                        parameters_path=parameters,
+                        output_dir=tmp_path,
+                        simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+                        simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+                        validation_log=validation_log,
+                        validation_log_ids=event_log.log_ids,
+                        metrics=metrics,
+                        num_simulations=2,
+                        executor=executor,
+                        keep_simulated_logs=keep_simulated_logs,
+                        seed=5,
+                    )
+                )
+    finally:
+        disable_artifact_cache()
+
+    # The second evaluation reuses the results of the first one
+    assert cache.stats()["artifacts"]["simulation_results"] == {"hits": 2, "misses": 4}
+    assert measurements[0] == measurements[1]
+    # The evaluation with other metrics, and the one keeping the simulated logs, reuse the simulated logs
+    assert cache.stats()["artifacts"]["simulated_log"] == {"hits": 4, "misses": 2}
+    assert measurements[2][0]["metric"] == Metric.CYCLE_TIME_EMD
+    assert measurements[3] == measurements[0]
+    assert len(list(tmp_path.glob("simulated_log_*.csv"))) == 2
+
+
+def test_simulate_and_evaluate_unseeded_not_cached(event_log, bps_model_paths, tmp_path):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+
+    cache = enable_artifact_cache(tmp_path / "cache", 10**9)
+    try:
+        for _ in range(2):
+            simulate_and_evaluate(
+                process_model_path=process_model,
+                parameters_path=parameters,
+                output_dir=tmp_path,
+                simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+                simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+                validation_log=validation_log,
+                validation_log_ids=event_log.log_ids,
+                metrics=[Metric.TWO_GRAM_DISTANCE],
+                num_simulations=2,
+            )
+    finally:
+        disable_artifact_cache()
+
+    # Unseeded replications are not reproducible, so their results are never reused
+    assert "simulation_results" not in cache.stats()["artifacts"]
+
+
+def test_replication_stopping_rule():
+    rule = ReplicationStoppingRule(relative_precision=0.05, confidence=0.95, batch_size=2)
+    # At least one batch, and two replications to estimate the variance
+    assert not rule.is_satisfied([0.5])
+    assert not ReplicationStoppingRule(batch_size=3).is_satisfied([0.5, 0.5])
+    # Precise enough
+    assert rule.is_satisfied([0.5, 0.5])
+    assert rule.is_satisfied([0.50, 0.51, 0.50, 0.51])
+    # Too noisy, unless it clearly cannot improve the best candidate so far
+    noisy = [0.5, 0.6, 0.55]
+    assert not rule.is_satisfied(noisy)
+    assert not ReplicationStoppingRule(incumbent_loss=0.5).is_satisfied(noisy)
+    assert ReplicationStoppingRule(incumbent_loss=0.3).is_satisfied(noisy)
+
+
+@pytest.mark.parametrize(
+    "stopping_rule, expected_replications",
+    [
+        (ReplicationStoppingRule(relative_precision=10.0, batch_size=2), 2),
+        (ReplicationStoppingRule(relative_precision=0.0, batch_size=2), 5),
+    ],
+    ids=["precise", "imprecise"],
+)
+def test_simulate_and_evaluate_adaptive(event_log, bps_model_paths, tmp_path, stopping_rule, expected_replications):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+
+    with SimulationExecutor(num_workers=2) as executor:
+        measurements = simulate_and_evaluate(
+            process_model_path=process_model,
+            parameters_path=parameters,
+            output_dir=tmp_path,
+            simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+            simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+            validation_log=validation_log,
+            validation_log_ids=event_log.log_ids,
+            metrics=[Metric.TWO_GRAM_DISTANCE],
+            num_simulations=5,
+            executor=executor,
+            stopping_rule=stopping_rule,
+        )
+
+    # The replications stop once the rule is satisfied, and never exceed the maximum
+    assert {measurement["run_num"] for measurement in measurements} == set(range(expected_replications))
+
+
+def test_racing_rule():
+    rule = RacingRule(incumbent_loss=0.5, margin=0.1, confidence=0.95)
+    assert not rule.is_losing([])
+    # One replication: losing if its distance exceeds the margin
+    assert not rule.is_losing([0.54])
+    assert rule.is_losing([0.56])
+    # Several replications: losing if the lower bound of the confidence interval exceeds the margin
+    assert not rule.is_losing([0.56, 0.9])
+    assert rule.is_losing([0.80, 0.81, 0.80])
+
+
+@pytest.mark.parametrize("incumbent_loss, pruned", [(0.0001, True), (100.0, False)], ids=["losing", "winning"])
+def test_simulate_and_evaluate_racing(event_log, bps_model_paths, tmp_path, incumbent_loss, pruned):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+
+    with SimulationExecutor(num_workers=2) as executor:
+        measurements = simulate_and_evaluate(
+            process_model_path=process_model,
+            parameters_path=parameters,
+            output_dir=tmp_path,
+            simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+            simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+            validation_log=validation_log,
+            validation_log_ids=event_log.log_ids,
+            metrics=[Metric.TWO_GRAM_DISTANCE],
+            num_simulations=6,
+            executor=executor,
+            racing_rule=RacingRule(incumbent_loss=incumbent_loss),
+        )
+
+    # A losing model is discarded without evaluating all its replications
+    num_replications = len({measurement["run_num"] for measurement in measurements})
+    assert num_replications == len(measurements)
+    if pruned:
+        assert 1 <= num_replications < 6
+    else:
+        assert num_replications == 6
+
+
+def test_get_replication_seed():
+    assert get_replication_seed(None, 0) is None
+    # Same seed for the same run and replication, different between replications and runs
+    assert get_replication_seed(42, 0) == get_replication_seed(42, 0)
+    assert get_replication_seed(42, 0) != get_replication_seed(42, 1)
+    assert get_replication_seed(42, 0) != get_replication_seed(43, 0)
+
+
+def test_simulate_seeded(event_log, bps_model_paths):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+
+    def _simulate(seed: int):
+        settings = ProsimosSettings(
+            bpmn_path=process_model,
+            parameters_path=parameters,
+            output_log_path=None,
+            num_simulation_cases=20,
+            simulation_start=validation_log[event_log.log_ids.start_time].min(),
+            seed=seed,
+        )
+        return simulate(settings).reset_index(drop=True)
+
+    # The same seed produces the same simulated log, and a different one a different log
+    pd.testing.assert_frame_equal(_simulate(1), _simulate(1))
+    assert not _simulate(1).equals(_simulate(2))
+
+
+def test_simulate_and_evaluate_seeded(event_log, bps_model_paths, tmp_path):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+
+    measurements = []
+    with SimulationExecutor(num_workers=2) as executor:
+        for seed in [5, 5, 6]:
+            # Simulate again instead of reusing the cached results
+            get_simulation_cache().clear()
+            measurements.append(
+                simulate_and_evaluate(
+                    process_model_path=process_model,
+                    parameters_path=parameters,
+                    output_dir=tmp_path,
+                    simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+                    simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+                    validation_log=validation_log,
+                    validation_log_ids=event_log.log_ids,
+                    metrics=[Metric.TWO_GRAM_DISTANCE, Metric.CYCLE_TIME_EMD],
+                    num_simulations=2,
+                    executor=executor,
+                    seed=seed,
+                )
+            )
+
+    # Reproducible replications with the same seed
+    assert measurements[0] == measurements[1]
+    assert measurements[0] != measurements[2]
+
+
+def test_simulate_and_evaluate_cached_results(event_log, bps_model_paths, tmp_path):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+    simulation_cache = get_simulation_cache()
+    simulation_cache.clear()
+
+    def evaluate(seed: int, num_simulations: int) -> list:
+        return simulate_and_evaluate(
+            process_model_path=process_model,
+            parameters_path=parameters,
+            output_dir=tmp_path,
+            simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+            simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+            validation_log=validation_log,
+            validation_log_ids=event_log.log_ids,
+            metrics=[Metric.TWO_GRAM_DISTANCE],
+            num_simulations=num_simulations,
+            seed=seed,
+        )
+
+    first = evaluate(seed=5, num_simulations=2)
+    stats = simulation_cache.stats()
+    assert stats["hits"] == 0 and stats["entries"] == 2
+    # Same replications reused, and only the new one simulated
+    second = evaluate(seed=5, num_simulations=3)
+    stats = simulation_cache.stats()
+    assert stats["hits"] == 2 and stats["entries"] == 3
+    assert second[:2] == first
+    # Modifying the returned results does not alter the cached ones
+    second[0]["distance"] = -1
+    assert evaluate(seed=5, num_simulations=2) == first
+    # Unseeded replications are not reproducible, so not cached in memory
+    evaluate(seed=None, num_simulations=2)
+    assert simulation_cache.stats()["entries"] == 3
+    simulation_cache.clear()
+
+
+def test_simulate_in_memory(event_log, bps_model_paths, tmp_path):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+    settings = ProsimosSettings(
+        bpmn_path=process_model,
+        parameters_path=parameters,
+        output_log_path=None,
+        num_simulation_cases=20,
+        simulation_start=validation_log[event_log.log_ids.start_time].min(),
+    )
+    simulated_log = simulate(settings)
+    # Simulate the same model into a CSV file to compare the format of both logs
+    settings.output_log_path = tmp_path / "simulated_log.csv"
+    assert simulate(settings) is None
+    csv_log = read_csv_log(settings.output_log_path, PROSIMOS_LOG_IDS)
+
+    assert simulated_log[PROSIMOS_LOG_IDS.case].nunique() == 20
+    assert list(simulated_log.columns) == list(csv_log.columns)
+    for column in [PROSIMOS_LOG_IDS.start_time, PROSIMOS_LOG_IDS.end_time, PROSIMOS_LOG_IDS.resource]:
+        assert simulated_log[column].dtype == csv_log[column].dtype
+
+
+def test_simulation_budget_relative_to(event_log):
+    validation_log = event_log.validation_partition
+    log_ids = event_log.log_ids
+    budget = SimulationBudget.relative_to(validation_log, log_ids, factor=2, seconds_per_event=1.0)
+
+    horizon = validation_log[log_ids.end_time].max() - validation_log[log_ids.start_time].min()
+    assert budget.max_events == 2 * len(validation_log)
+    assert budget.max_horizon == 2 * horizon
+    assert budget.max_duration == 2 * len(validation_log)
+    # Minimum wall-clock time for small logs
+    assert SimulationBudget.relative_to(validation_log, log_ids, factor=2).max_duration == 60.0
+
+
+@pytest.mark.parametrize(
+    "budget",
+    [
+        SimulationBudget(max_events=10),
+        SimulationBudget(max_horizon=pd.Timedelta(hours=1)),
+        SimulationBudget(max_duration=0.0),
+    ],
+    ids=["events", "horizon", "duration"],
+)
+def test_simulate_over_budget(event_log, bps_model_paths, budget):
+    process_model, parameters = bps_model_paths
+    settings = ProsimosSettings(
+        bpmn_path=process_model,
+        parameters_path=parameters,
+        output_log_path=None,
+        num_simulation_cases=20,
+        simulation_start=event_log.validation_partition[event_log.log_ids.start_time].min(),
+        seed=1,
+    )
+    simulated_log = simulate(settings)
+
+    with pytest.raises(SimulationBudgetExceeded):
+        simulate(replace(settings, budget=budget))
+    # The budget does not alter the simulations within it
+    settings.budget = SimulationBudget(max_events=len(simulated_log), max_horizon=pd.Timedelta(days=365))
+    pd.testing.assert_frame_equal(simulate(settings), simulated_log)
+
+
+
+def test_wall_clock_limit():
+    # Stops the code running for too long, even if not checking the budget (e.g., stuck within a simulated event)
+    with pytest.raises(SimulationBudgetExceeded):
+        with _wall_clock_limit(0.2):
+            time.sleep(10)
+    with _wall_clock_limit(10):
+        time.sleep(0.1)
+
+def test_simulate_and_evaluate_over_budget(event_log, bps_model_paths, tmp_path):
+    process_model, parameters = bps_model_paths
+    validation_log = event_log.validation_partition
+
+    with pytest.raises(SimulationBudgetExceeded):
+        simulate_and_evaluate(
+            process_model_path=process_model,
+            parameters_path=parameters,
+            output_dir=tmp_path,
+            simulation_cases=validation_log[event_log.log_ids.case].nunique(),
+            simulation_start_time=validation_log[event_log.log_ids.start_time].min(),
+            validation_log=validation_log,
+            validation_log_ids=event_log.log_ids,
+            metrics=[Metric.TWO_GRAM_DISTANCE],
+            num_simulations=2,
+            budget=SimulationBudget.relative_to(validation_log, event_log.log_ids, factor=0.5),
+        )
+
+
+def test_simulate_with_prepared_setup(event_log, bps_model_paths, tmp_path):
+    process_model, parameters = bps_model_paths
+    simulation_start = event_log.validation_partition[event_log.log_ids.start_time].min()
+    settings = ProsimosSettings(
+        bpmn_path=process_model,
+        parameters_path=parameters,
+        output_log_path=None,
+        num_simulation_cases=20,
+        simulation_start=simulation_start,
+        seed=3,
+    )
+    simulated_log = simulate(settings)
+
+    # The simulations run on copies of the prepared set-up, producing the same logs as parsing the files
+    settings.setup = SimulationSetup(process_model, parameters, 20, simulation_start)
+    pd.testing.assert_frame_equal(simulate(settings), simulated_log)
+    pd.testing.assert_frame_equal(simulate(settings), simulated_log)
+    # Also when writing the simulated log to a file
+    settings.output_log_path = tmp_path / "simulated_log.csv"
+    assert simulate(settings) is None
+    written_log = read_csv_log(settings.output_log_path, PROSIMOS_LOG_IDS)
+    assert len(written_log) == len(simulated_log)
+    assert sorted(written_log[PROSIMOS_LOG_IDS.activity]) == sorted(simulated_log[PROSIMOS_LOG_IDS.activity])
+
+
+def test_simulate_with_unchecked_prosimos_version(event_log, bps_model_paths, tmp_path, monkeypatch):
+    process_model, parameters = bps_model_paths
+    settings = ProsimosSettings(
+        bpmn_path=process_model,
+        parameters_path=parameters,
+        output_log_path=None,
+        num_simulation_cases=20,
+        simulation_start=event_log.validation_partition[event_log.log_ids.start_time].min(),
+        seed=2,
+        budget=SimulationBudget(max_events=10_000),
+        warnings_path=tmp_path / SIMULATION_WARNINGS_FILE_NAME,
+    )
+    simulated_log = simulate(settings)
+    assert settings.warnings_path.exists()
+    settings.warnings_path.unlink()
+
+    # Falls back to the public run_simulation() of Prosimos, producing the same log and warnings
+    monkeypatch.setattr(prosimos, "_has_checked_run_loop", lambda: False)
+    fallback_log = simulate(settings)
+    assert settings.warnings_path.exists()
+    assert len(fallback_log) == len(simulated_log)
+    assert sorted(fallback_log[PROSIMOS_LOG_IDS.activity]) == sorted(simulated_log[PROSIMOS_LOG_IDS.activity])
@@ -1,4 +1,17 @@
-from simod.utilities import parse_single_value_or_interval
+import threading
+
+import numpy as np
+import pytest
+from hyperopt import STATUS_OK, Domain, Trials, hp, space_eval
+
+from simod.checkpoint import load_state, save_state
+from simod.utilities import (
+    get_finite_search_space_points,
+    get_multi_fidelity_levels,
+    hyperopt_minimize,
+    parse_single_value_or_interval,
+    successive_halving,
+)
 
 
 def test_parse_single_value_or_interval(entry_point):
@@ -7,3 +20,209 @@ def test_parse_single_value_or_interval(entry_point):
     assert parse_single_value_or_interval(0.0) == 0.0
     assert parse_single_value_or_interval([0.0, 1.0]) == (0.0, 1.0)
     assert parse_single_value_or_interval([0.32, 0.78]) == (0.32, 0.78)
+
+
+@pytest.mark.parametrize("max_parallel_trials", [1, 3])
+def test_hyperopt_minimize(max_parallel_trials):
+    lock = threading.Lock()
+    running = {"current": 0, "max": 0, "started": 0}
+    # The first trials only finish once all of them are running at once
+    barrier = threading.Barrier(max_parallel_trials, timeout=30)
+
+    def objective(params: dict) -> dict:
+        with lock:
+            running["current"] += 1
+            running["max"] = max(running["max"], running["current"])
+            running["started"] += 1
+            first_batch = running["started"] <= max_parallel_trials
+        if first_batch:
+            barrier.wait()
+        with lock:
+            running["current"] -= 1
+        return {"loss": abs(params["x"] - 0.3), "status": STATUS_OK, "x": params["x"]}
+
+    space = {"x": hp.uniform("x", 0.0, 1.0), "method": hp.choice("method", ["a", "b"])}
+    trials = Trials()
+    best = hyperopt_minimize(objective, space, max_evals=10, trials=trials, max_parallel_trials=max_parallel_trials)
+
+    assert len(trials.trials) == 10
+    assert not barrier.broken
+    assert running["max"] <= max_parallel_trials
+    # All the trials have their real result, and the best one is returned as fmin does
+    assert all(result["status"] == STATUS_OK for result in trials.results)
+    assert space_eval(space, best)["x"] == min(trials.results, key=lambda result: result["loss"])["x"]
+
+
+def test_get_finite_search_space_points():
+    finite_space = {"method": hp.choice("method", ["a", "b"]), "flag": hp.choice("flag", [True, False]), "x": 0.5}
+    points = get_finite_search_space_points(Domain(lambda params: 0.0, finite_space))
+    assert len(points) == 4
+    assert {tuple(sorted(point.items())) for point in points} == {
+        (("flag", 0), ("method", 0)),
+        (("flag", 0), ("method", 1)),
+        (("flag", 1), ("method", 0)),
+        (("flag", 1), ("method", 1)),
+    }
+    continuous_space = {"method": hp.choice("method", ["a", "b"]), "x": hp.uniform("x", 0.0, 1.0)}
+    assert get_finite_search_space_points(Domain(lambda params: 0.0, continuous_space)) is None
+
+
+@pytest.mark.parametrize("max_parallel_trials", [1, 2])
+def test_hyperopt_minimize_finite_space(max_parallel_trials):
+    lock = threading.Lock()
+    evaluated = []
+    running = {"current": 0, "max": 0}
+    checkpoints = []
+
+    def objective(params: dict) -> dict:
+        with lock:
+            evaluated.append((params["method"], params["flag"]))
+            running["current"] += 1
+            running["max"] = max(running["max"], running["current"])
+        with lock:
+            running["current"] -= 1
+        return {"loss": 0.0 if params == {"method": "b", "flag": False} else 1.0, "status": STATUS_OK}
+
+    space = {"method": hp.choice("method", ["a", "b", "c"]), "flag": hp.choice("flag", [True, False])}
+    trials = Trials()
+    best = hyperopt_minimize(
+        objective,
+        space,
+        max_evals=20,
+        trials=trials,
+        max_parallel_trials=max_parallel_trials,
+        checkpoint=lambda saved_trials: checkpoints.append(len(saved_trials.trials)),
+    )
+
+    # Each point is evaluated exactly once, and the rest of the budget is not used
+    assert len(trials.trials) == 6
+    assert sorted(evaluated) == sorted((method, flag) for method in ["a", "b", "c"] for flag in [True, False])
+    assert space_eval(space, best) == {"method": "b", "flag": False}
+    # Evaluated in batches of up to [max_parallel_trials] points, saving the progress after each of them
+    assert running["max"] <= max_parallel_trials
+    assert checkpoints == list(range(max_parallel_trials, 7, max_parallel_trials))
+
+
+def test_hyperopt_minimize_finite_space_failure():
+    checkpoints = []
+
+    def objective(params: dict) -> dict:
+        if params["method"] == "c":
+            raise RuntimeError("Evaluation failed")
+        return {"loss": 1.0, "status": STATUS_OK}
+
+    space = {"method": hp.choice("method", ["a", "b", "c"])}
+    with pytest.raises(RuntimeError):
+        hyperopt_minimize(
+            objective,
+            space,
+            max_evals=20,
+            trials=Trials(),
+            checkpoint=lambda saved_trials: checkpoints.append(len(saved_trials.trials)),
+        )
+    # The progress of the batches evaluated before the failure is saved
+    assert checkpoints == [1, 2]
+
+
+@pytest.mark.parametrize("max_parallel_trials", [1, 2])
+def test_hyperopt_minimize_resume(max_parallel_trials, tmp_path):
+    evaluated = []
+
+    def objective(params: dict) -> dict:
+        evaluated.append(params["x"])
+        return {"loss": abs(params["x"] - 0.3), "status": STATUS_OK}
+
+    def checkpoint(trials: Trials):
+        save_state(tmp_path / "progress.pkl", {"trials": trials})
+
+    space = {"x": hp.uniform("x", 0.0, 1.0)}
+    hyperopt_minimize(objective, space, 4, Trials(), max_parallel_trials, checkpoint=checkpoint)
+    assert len(evaluated) == 4
+
+    # Continue the optimization from the saved trials, evaluating only the remaining candidates
+    trials = load_state(tmp_path / "progress.pkl")["trials"]
+    assert len(trials.trials) == 4
+    best = hyperopt_minimize(objective, space, 6, trials, max_parallel_trials, checkpoint=checkpoint)
+    assert len(evaluated) == 6
+    assert len(load_state(tmp_path / "progress.pkl")["trials"].trials) == 6
+    assert best["x"] == trials.trials[np.argmin(trials.losses())]["misc"]["vals"]["x"][0]
+
+
+def test_get_multi_fidelity_levels():
+    assert get_multi_fidelity_levels(1) == [1.0]
+    assert get_multi_fidelity_levels(2) == [1.0]
+    assert get_multi_fidelity_levels(10) == pytest.approx([1 / 9, 1 / 3, 1.0])
+    assert get_multi_fidelity_levels(27) == pytest.approx([1 / 27, 1 / 9, 1 / 3, 1.0])
+    assert get_multi_fidelity_levels(8, reduction_factor=2) == pytest.approx([1 / 8, 1 / 4, 1 / 2, 1.0])
+    # Without the rungs below the minimum fidelity
+    assert get_multi_fidelity_levels(27, min_fidelity=0.1) == pytest.approx([1 / 9, 1 / 3, 1.0])
+    assert get_multi_fidelity_levels(27, min_fidelity=1.0) == [1.0]
+
+
+def test_successive_halving(tmp_path):
+    def objective(params: dict) -> dict:
+        # Noisy loss at the lowest fidelity
+        noise = 0.2 if params["x"] < 0.3 else 0.0
+        return {"loss": abs(params["x"] - 0.3) + noise, "status": STATUS_OK, "output_dir": f"dir_{params['x']}"}
+
+    evaluated = []
+
+    def evaluate(result: dict, rung: int) -> float:
+        evaluated.append((result["output_dir"], rung))
+        x = float(result["output_dir"].split("_")[1])
+        return abs(x - 0.3)
+
+    def checkpoint(trials: Trials):
+        save_state(tmp_path / "progress.pkl", {"trials": trials})
+
+    space = {"x": hp.uniform("x", 0.0, 1.0)}
+    trials = Trials()
+    hyperopt_minimize(objective, space, 9, trials)
+    best, best_result = successive_halving(trials, evaluate, num_rungs=3, max_parallel_trials=2, checkpoint=checkpoint)
+
+    # 3 candidates promoted to the second rung, and the best of them to the last one
+    assert [rung for _, rung in evaluated].count(1) == 3
+    assert [rung for _, rung in evaluated].count(2) == 1
+    promoted = [output_dir for output_dir, rung in evaluated if rung == 1]
+    assert best_result["output_dir"] == min(promoted, key=lambda output_dir: abs(float(output_dir[4:]) - 0.3))
+    assert best_result["rung"] == 2
+    assert len(best_result["rung_losses"]) == 3
+    assert best["x"] == float(best_result["output_dir"][4:])
+
+    # The promotions are not evaluated again when resuming
+    trials = load_state(tmp_path / "progress.pkl")["trials"]
+    assert successive_halving(trials, evaluate, num_rungs=3)[1]["output_dir"] == best_result["output_dir"]
+    assert len(evaluated) == 4
+
+
+def test_successive_halving_failures():
+    trials = Trials()
+    hyperopt_minimize(
+        lambda params: {"loss": params["x"], "status": STATUS_OK, "output_dir": str(params["x"])},
+        {"x": hp.uniform("x", 0.0, 1.0)},
+        3,
+        trials,
+    )
+    # If all the promoted candidates fail, the best one of the previous rung is returned
+    best, best_result = successive_halving(trials, lambda result, rung: None, num_rungs=2)
+    assert best["x"] == min(result["rung_losses"][0] for result in trials.results)
+    assert best_result["rung_losses"][1] == float("inf")
+    # No successful candidates
+    assert successive_halving(Trials(), lambda result, rung: 0.0, num_rungs=2) is None
+
+
+@pytest.mark.parametrize("max_parallel_trials", [1, 2])
+def test_hyperopt_minimize_seeded(max_parallel_trials):
+    def objective(params: dict) -> dict:
+        return {"loss": abs(params["x"] - 0.3), "status": STATUS_OK}
+
+    space = {"x": hp.uniform("x", 0.0, 1.0)}
+    suggestions = []
+    for seed in [3, 3, 4]:
+        trials = Trials()
+        hyperopt_minimize(objective, space, 6, trials, max_parallel_trials, seed=seed)
+        suggestions.append([doc["misc"]["vals"]["x"][0] for doc in trials.trials])
+
+    # The same seed produces the same candidates
+    assert suggestions[0] == suggestions[1]
+    assert suggestions[0] != suggestions[2]